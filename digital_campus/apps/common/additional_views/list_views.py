@@ -2,7 +2,7 @@
 apps/common/additional_views/list_views.py
 
 Feed and profile views:
-- PostListView: Main feed combining posts and upcoming events.
+- PostListView: Main feed combining posts and upcoming events (keyset-paginated).
 - UserPostListView: Profile page showing user posts, events, and metadata.
 
 Author: Vikram Bhojanala
@@ -10,107 +10,109 @@ Last updated: 2025-05-02
 """
 
 from django.views.generic import ListView
-from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.http import JsonResponse
 from django.template.loader import render_to_string
 from django.utils import timezone
 
 from django.contrib.auth.models import User
 from apps.posts.models import Post
 from apps.events.models import Event
-from itertools import chain
 
-from django.utils import timezone
-from django.http import JsonResponse, Http404
-from django.template.loader import render_to_string
-from django.views.generic import ListView
-from itertools import chain
+from ..feed import FeedSource, feed_page
+from ..fanout import home_page
+from ..for_you import StaleCursor, for_you_page
+from ..fragments import render_items
 
-from apps.events.models import Event
-from apps.posts.models import Post
-
-
-from itertools import chain
 
 class PostListView(ListView):
-    """Home feed = mixed posts + events with filter pills and infinite scroll."""
+    """
+    Home feed = mixed posts + events with filter pills and infinite scroll.
+    Signed-in users' "all" feed is their precomputed personal feed
+    (fanout.py) and "for_you" their ranked one (for_you.py); other
+    filters read the global sources keyset-paginated (feed.py). Either
+    way a page is a list of refs rendered from cached fragments
+    (fragments.py), and carries the cursor of the next.
+    """
     model               = Post
     template_name       = "digital_campus/home.html"
     context_object_name = "posts"
-    paginate_by         = 5
+    page_size           = 5
 
     # ---------- helpers ----------
-    def _tag(self, qs, kind, ts_attr):
-        """stamp .kind  and .timestamp onto every row"""
-        for o in qs:
-            o.kind = kind
-            o.timestamp = getattr(o, ts_attr)
-        return qs
-
     def get_filter_by(self):
         return self.request.GET.get("filter_by", "all")
 
-    # ---------- queryset ----------
-    def get_queryset(self):
+    def get_sources(self):
+        """Feed sources for the active filter, and whether newest comes first."""
         f = self.get_filter_by()
 
-        posts  = Post.objects.select_related("author")\
-                             .prefetch_related("attachments")\
-                             .order_by("-date_posted")
-        
-        events = Event.objects.select_related("created_by")\
-                              .filter(starts_at__gte=timezone.now())\
-                              .order_by("starts_at")
+        posts  = FeedSource("post",  Post.objects.all(), "date_posted")
+        events = FeedSource("event", Event.objects.filter(starts_at__gte=timezone.now()), "starts_at")
 
         if f == "posts":
-            return self._tag(list(posts),  "post",  "date_posted")
+            return [posts], True
         if f == "events":
-            return self._tag(list(events), "event", "starts_at")
-        
-        if f == "new":
-            # newest across posts *and* events
-            mixed = chain(
-                self._tag(list(posts),  "post",  "date_posted"),
-                self._tag(list(events), "event", "starts_at"),
-            )
-            return sorted(mixed, key=lambda x: x.timestamp, reverse=True) 
+            return [events], False      # soonest first
+        # "all" and "new": newest across posts *and* events
+        return [posts, events], True
 
-        # mixed - Not Optimized 
-        mixed = chain(
-            self._tag(list(posts),  "post",  "date_posted"),
-            self._tag(list(events), "event", "starts_at"),
+    # ---------- queryset ----------
+    def get_queryset(self):
+        """The page's (kind, pk) refs; sets self.next_cursor."""
+        cursor = self.request.GET.get("cursor")
+        if self.get_filter_by() == "all" and self.request.user.is_authenticated:
+            # Personalized: follows, clubs and own items, precomputed (see fanout.py);
+            # None when the user follows no one, who then reads the global feed
+            page = home_page(self.request.user, cursor, self.page_size)
+            if page is not None:
+                items, self.next_cursor = page
+                return items
+        if self.get_filter_by() == "for_you" and self.request.user.is_authenticated:
+            # Ranked: engagement + recency over a bounded pool (see for_you.py)
+            items, self.next_cursor = for_you_page(self.request.user, cursor, self.page_size)
+            return items
+
+        sources, descending = self.get_sources()
+        items, self.next_cursor = feed_page(
+            sources, cursor, self.page_size, descending
         )
-
-
-        return sorted(mixed, key=lambda x: x.timestamp, reverse=True)
+        return items
 
     # ---------- context ----------
     def get_context_data(self, **kw):
-        ctx = super().get_context_data(**kw)   # handles pagination here
-        ctx["items"]      = ctx["object_list"]
-        ctx["filter_by"]  = self.get_filter_by()
+        ctx = super().get_context_data(**kw)
+        ctx["items"]       = render_items(ctx["object_list"], self.request)   # cached HTML fragments
+        ctx["next_cursor"] = self.next_cursor
+        ctx["filter_by"]   = self.get_filter_by()
         ctx["hide_params"] = True              # for _filter_pills.html
         return ctx
 
     # ---------- GET (handles Ajax) ----------
     def get(self, request, *args, **kw):
+        ajax = request.headers.get("x-requested-with") == "XMLHttpRequest"
         try:
             self.object_list = self.get_queryset()
-            context = self.get_context_data()
-        except Http404:
-            # paginator ran out – return empty slice for AJAX
-            if request.headers.get("x-requested-with") == "XMLHttpRequest":
-                return JsonResponse({"posts_html": ""})
-            raise
+        except StaleCursor:
+            # the ranking was replaced – restart instead of skipping or repeating items
+            if ajax:
+                return JsonResponse({"posts_html": "", "next_cursor": None, "stale": True}, status=409)
+            return redirect(f"{request.path}?filter_by={self.get_filter_by()}")
+        except ValueError:
+            # tampered or stale cursor – nothing more to show
+            if ajax:
+                return JsonResponse({"posts_html": "", "next_cursor": None}, status=400)
+            return redirect(request.path)
+        context = self.get_context_data()
 
         # Ajax branch
-        if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        if ajax:
             html = render_to_string(
                 "digital_campus/home_list.html",   # needs filter_by in ctx
                 context,
                 request=request,
             )
-            return JsonResponse({"posts_html": html})
+            return JsonResponse({"posts_html": html, "next_cursor": self.next_cursor})
 
         # full page
         return self.render_to_response(context)
@@ -2,17 +2,15 @@
 apps/common/apps.py
 
 AppConfig for the `common` app.
-Initializes the global search engine singleton on app startup.
+Connects the home feed signals on app startup; the search engine is
+warmed up by the `search` app (apps/search/warmup.py).
 
 Author: Vikram Bhojanala
 Last updated: 2025-05-09
 """
 
-import sys
-import logging
 from django.apps import AppConfig
 
-logger = logging.getLogger(__name__)
 
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
@@ -21,11 +19,6 @@ class CommonConfig(AppConfig):
     def ready(self):
         """
         Called on Django app startup.
-        Initializes the global SearchEngine instance if database is ready.
-
-        - Skips during migration/setup commands
-        - Safely handles missing tables or empty data
+        Connects the home feed signals (fan-out, fragment versions).
         """
-        # Avoid during migrate/makemigrations/shell/etc
-        if 'manage.py' in sys.argv and 'runserver' not in sys.argv:
-            return
+        import apps.common.signals  # noqa: F401  (registers receivers)
@@ -0,0 +1,277 @@
+"""
+apps/common/fanout.py
+
+Precomputed per-user home feeds, built by fan-out-on-write.
+
+A user's feed holds the newest FEED_LENGTH (timestamp, kind, pk) entries
+(posts, and events that have not started) from the people they follow,
+the clubs they belong to and themselves, plus the sets of followed users
+and clubs it was built from. Feeds live in the "feeds" cache, on the
+shared backend (Redis when REDIS_URL is set) so every worker sees the
+same feed, and are rebuilt once older than FEED_TTL, bounding the drift
+left by a lost update.
+
+- Write: when a post or event gets its owner, its id is pushed into the
+  feed of every follower of the author and every member of the club.
+  Only feeds already in the cache are updated; a missing feed is rebuilt
+  from the database on its next read. Updates hold a lock in the cache
+  itself, so they are atomic across workers; if it cannot be had in
+  LOCK_WAIT, the audience's feeds are dropped instead.
+- High fan-out: a source whose audience exceeds FANOUT_LIMIT (a big
+  club, a very followed user) is not pushed. It is flagged as "hot" (one
+  key per source, so flagging needs no lock) and readers following it
+  merge its newest items in at read time.
+- Read: the feed, then one get_many of its sources' hot flags; the
+  page's items are then rendered from cached fragments (fragments.py),
+  hydrating only misses. Events that have started since are dropped.
+- A user who follows no one and belongs to no club gets the global feed.
+- Following, unfollowing, joining or leaving a club drops the user's
+  feed, so the next read rebuilds it with the new sources.
+
+Author: Vikram Bhojanala
+"""
+
+import time
+import uuid
+import bisect
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from django.core.cache import caches
+from django.db.models import Q
+from django.utils import timezone
+
+from django.contrib.auth.models import User
+from apps.users.models import Profile
+from apps.clubs.models import ClubMembership
+from apps.posts.models import Post
+from apps.events.models import Event
+from .feed import encode_cursor, decode_cursor
+
+logger = logging.getLogger(__name__)
+
+# ——— Feed Limits ———
+FEED_LENGTH = 500           # Entries kept per user feed
+FANOUT_LIMIT = 2000         # Larger audiences are merged in on read instead of pushed
+FEED_TTL = 15 * 60          # Seconds before a cached feed is rebuilt from the database
+FEED_CACHE = "feeds"
+
+# ——— Cross-Process Lock ———
+LOCK_TIMEOUT = 10           # Seconds a crashed holder can block feed updates
+LOCK_WAIT = 2.0             # Seconds a push waits for the lock before dropping feeds
+LOCK_POLL = 0.01
+
+FEED_KEY = "feed:user:{}"
+HOT_KEY = "feed:hot:{}:{}"  # (source, id) -> True for high-fanout sources
+LOCK_KEY = "feed:lock"
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+Entry = Tuple[int, str, int]    # (microseconds since epoch, kind, pk), ascending in the feed
+
+
+def _micros(ts: datetime) -> int:
+    """Exact integer timestamp, so cursor ties compare equal."""
+    return (ts - EPOCH) // timedelta(microseconds=1)
+
+
+def _feeds():
+    return caches[FEED_CACHE]
+
+
+# ————— Audiences ————— #
+
+def followers(user_id: int, limit: int) -> List[int]:
+    """Up to `limit` user ids following `user_id`."""
+    return list(
+        Profile.objects.filter(following__user_id=user_id).values_list("user_id", flat=True)[:limit]
+    )
+
+
+def club_members(club_id: int, limit: int) -> List[int]:
+    """Up to `limit` user ids of the club's confirmed members."""
+    return list(
+        ClubMembership.objects.filter(club_id=club_id, status=ClubMembership.STATUS_MEMBER)
+        .values_list("profile__user_id", flat=True)[:limit]
+    )
+
+
+# ————— Write Path ————— #
+
+def _mark_hot(source: str, source_id: int) -> None:
+    _feeds().set(HOT_KEY.format(source, source_id), True, timeout=None)
+
+
+def _acquire(cache) -> Optional[str]:
+    """Takes the feeds' update lock; returns its token, or None after LOCK_WAIT."""
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(LOCK_KEY, token, timeout=LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(LOCK_POLL)
+    return token
+
+
+def _release(cache, token: str) -> None:
+    if cache.get(LOCK_KEY) == token:    # Not if it expired and another holder took it
+        cache.delete(LOCK_KEY)
+
+
+def _push(entry: Entry, user_ids: Iterable[int]) -> int:
+    """
+    Inserts `entry` into the cached feeds of `user_ids`; returns how many
+    feeds were updated.
+    """
+    cache = _feeds()
+    keys = [FEED_KEY.format(uid) for uid in set(user_ids)]
+    token = _acquire(cache)
+    if token is None:
+        logger.warning("[Feed] Lock busy; dropping %d feeds instead of updating them.", len(keys))
+        cache.delete_many(keys)
+        return 0
+    try:
+        found = cache.get_many(keys)
+        for feed in found.values():
+            items = feed["items"]
+            if entry in items:
+                continue
+            bisect.insort(items, entry)
+            if len(items) > FEED_LENGTH:
+                del items[0]
+        cache.set_many(found, timeout=FEED_TTL)
+    finally:
+        _release(cache, token)
+    return len(found)
+
+
+def fan_out(kind: str, pk: int, ts: datetime, author_id: Optional[int],
+            club_id: Optional[int]) -> None:
+    """
+    Pushes a new post or event to the feeds of its author's followers and
+    its club's members (and the author's own); hot sources are skipped.
+    """
+    entry = (_micros(ts), kind, pk)
+    audience: Set[int] = set()
+
+    for source, source_id, members in (
+        ("user", author_id, followers),
+        ("club", club_id, club_members),
+    ):
+        if source_id is None:
+            continue
+        ids = members(source_id, FANOUT_LIMIT + 1)  # One past the limit is enough to tell
+        if len(ids) > FANOUT_LIMIT:
+            _mark_hot(source, source_id)
+        else:
+            audience.update(ids)
+
+    if author_id is not None:
+        audience.add(author_id)
+    updated = _push(entry, audience)
+    logger.debug("[Feed] %s %s pushed to %d cached feeds.", kind, pk, updated)
+
+
+def invalidate_feed(user_ids: Iterable[int]) -> None:
+    """Drops feeds whose sources changed; they are rebuilt on next read."""
+    _feeds().delete_many([FEED_KEY.format(uid) for uid in user_ids])
+
+
+# ————— Read Path ————— #
+
+def _source_entries(user_ids: Iterable[int], club_ids: Iterable[int]) -> List[Entry]:
+    """
+    Newest FEED_LENGTH entries authored by `user_ids` or owned by /
+    hosted in `club_ids`, straight from the database (ascending). Like
+    the global feed, only events that have not started are included.
+    """
+    user_ids, club_ids = list(user_ids), list(club_ids)
+    posts = (
+        Post.objects.filter(Q(author_id__in=user_ids) | Q(ownership__club_id__in=club_ids))
+        .order_by("-date_posted", "-pk").values_list("date_posted", "pk")[:FEED_LENGTH]
+    )
+    events = (
+        Event.objects.filter(Q(created_by_id__in=user_ids) | Q(club_id__in=club_ids),
+                             starts_at__gte=timezone.now())
+        .order_by("-starts_at", "-pk").values_list("starts_at", "pk")[:FEED_LENGTH]
+    )
+    entries = [(_micros(ts), "post", pk) for ts, pk in posts]
+    entries += [(_micros(ts), "event", pk) for ts, pk in events]
+    return sorted(entries)[-FEED_LENGTH:]
+
+
+def build_feed(user_id: int) -> Dict[str, Any]:
+    """
+    Computes a user's feed from the database and caches it.
+    """
+    followed = set(
+        Profile.objects.filter(followers__user_id=user_id).values_list("user_id", flat=True)
+    )
+    clubs = set(
+        ClubMembership.objects.filter(profile__user_id=user_id, status=ClubMembership.STATUS_MEMBER)
+        .values_list("club_id", flat=True)
+    )
+    feed = {
+        "items": _source_entries(followed | {user_id}, clubs),
+        "users": followed,
+        "clubs": clubs,
+        "built": time.time(),
+    }
+    _feeds().set(FEED_KEY.format(user_id), feed, timeout=FEED_TTL)
+    return feed
+
+
+def _cached_feed(user_id: int) -> Dict[str, Any]:
+    """The user's cached feed, rebuilt if missing or older than FEED_TTL."""
+    feed = _feeds().get(FEED_KEY.format(user_id))
+    if feed is None or time.time() - feed.get("built", 0) > FEED_TTL:
+        feed = build_feed(user_id)  # Pushes refresh the cache timeout, not "built"
+    return feed
+
+
+def _upcoming(entries: Iterable[Entry]) -> List[Entry]:
+    """Drops events that have started since the entries were cached."""
+    now = _micros(timezone.now())
+    return [e for e in entries if e[1] != "event" or e[0] >= now]
+
+
+def feed_entries(user_id: int, feed: Optional[Dict[str, Any]] = None) -> List[Entry]:
+    """
+    The user's feed entries (ascending), with hot sources merged in.
+    """
+    feed = feed or _cached_feed(user_id)
+
+    sources = [("user", uid) for uid in feed["users"]] + [("club", cid) for cid in feed["clubs"]]
+    flags = _feeds().get_many([HOT_KEY.format(*source) for source in sources]) if sources else {}
+    pull_users = {uid for uid in feed["users"] if HOT_KEY.format("user", uid) in flags}
+    pull_clubs = {cid for cid in feed["clubs"] if HOT_KEY.format("club", cid) in flags}
+    if not (pull_users or pull_clubs):
+        return _upcoming(feed["items"])
+
+    merged = set(feed["items"]) | set(_source_entries(pull_users, pull_clubs))
+    return _upcoming(sorted(merged)[-FEED_LENGTH:])
+
+
+def home_page(user: User, cursor: Optional[str],
+              size: int) -> Optional[Tuple[List[Tuple[str, int]], Optional[str]]]:
+    """
+    Returns ((kind, pk) refs, next cursor) of the user's personalized
+    feed, newest first; cursors are the same format as feed.feed_page's.
+    Returns None for a user who follows no one and is in no club: their
+    feed would hold only their own items, so they get the global feed.
+    """
+    feed = _cached_feed(user.pk)
+    if not (feed["users"] or feed["clubs"]):
+        return None
+    entries = feed_entries(user.pk, feed)
+
+    end = len(entries)
+    if cursor:
+        ts, kind, pk = decode_cursor(cursor)
+        end = bisect.bisect_left(entries, (_micros(ts), kind, pk))
+
+    page = entries[max(end - size, 0):end][::-1]
+    next_cursor = None
+    if end > size:
+        micros, kind, pk = page[-1]
+        next_cursor = encode_cursor((EPOCH + timedelta(microseconds=micros), kind, pk))
+    return [(kind, pk) for _, kind, pk in page], next_cursor
@@ -0,0 +1,93 @@
+"""
+apps/common/feed.py
+
+Keyset-paginated home feed: a streaming merge of index-ordered querysets.
+
+Each source (posts by date_posted, upcoming events by starts_at) is read
+in its index order and only past the cursor, so a page costs
+O(page_size) rows per source whatever the table sizes. The sources'
+pages are merged with heapq.merge on (timestamp, kind, pk), the same key
+the cursor encodes, which makes the order total and stable even when
+timestamps tie. Pages are (kind, pk) refs; fragments.py renders them.
+
+Cursors are opaque to clients: URL-safe base64 of [timestamp, kind, pk].
+
+Author: Vikram Bhojanala
+"""
+
+import json
+import heapq
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from django.db.models import Q, QuerySet
+
+FeedKey = Tuple[datetime, str, int]
+
+
+@dataclass
+class FeedSource:
+    """
+    One kind of feed item: its queryset and the timestamp field it is
+    ordered by (with pk as tie-breaker), backed by an index on both.
+    """
+    kind: str
+    queryset: QuerySet
+    field: str
+
+    def after(self, cursor: Optional[FeedKey], descending: bool, limit: int) -> List[FeedKey]:
+        """
+        Keys of the first `limit` rows strictly past `cursor` in feed order.
+        """
+        qs = self.queryset
+        if cursor is not None:
+            ts, kind, pk = cursor
+            op = "lt" if descending else "gt"
+            past_ts = Q(**{f"{self.field}__{op}": ts})
+            # At the cursor's timestamp, (kind, pk) decides: compare kinds here, pks in SQL
+            if (self.kind < kind) if descending else (self.kind > kind):
+                past_ts |= Q(**{self.field: ts})
+            elif self.kind == kind:
+                past_ts |= Q(**{self.field: ts, f"pk__{op}": pk})
+            qs = qs.filter(past_ts)
+
+        prefix = "-" if descending else ""
+        rows = qs.order_by(f"{prefix}{self.field}", f"{prefix}pk").values_list(self.field, "pk")[:limit]
+        return [(ts, self.kind, pk) for ts, pk in rows]
+
+
+def encode_cursor(key: FeedKey) -> str:
+    ts, kind, pk = key
+    raw = json.dumps([ts.isoformat(), kind, pk], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> FeedKey:
+    """
+    Parses a cursor from encode_cursor(); raises ValueError if malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        ts, kind, pk = json.loads(raw)
+        return datetime.fromisoformat(ts), str(kind), int(pk)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid feed cursor {token!r}.") from e
+
+
+def feed_page(sources: Sequence[FeedSource], cursor: Optional[str], size: int,
+              descending: bool = True) -> Tuple[List[Tuple[str, int]], Optional[str]]:
+    """
+    Returns ((kind, pk) refs, next cursor) for the page after `cursor`
+    (None for the first page); the next cursor is None on the last page.
+    Only keys are read: items are rendered from cached fragments.
+    """
+    after = decode_cursor(cursor) if cursor else None
+
+    streams = [source.after(after, descending, size + 1) for source in sources]
+    merged = list(heapq.merge(*streams, reverse=descending))
+
+    page = merged[:size]
+    next_cursor = encode_cursor(page[-1]) if len(merged) > size else None
+    return [(kind, pk) for _, kind, pk in page], next_cursor
@@ -0,0 +1,158 @@
+"""
+apps/common/for_you.py
+
+Ranked "For You" home feed.
+
+The candidate pool is bounded: the user's precomputed feed (followed
+users, joined clubs, own items; see fanout.py) plus globally trending
+posts and upcoming events. Engagement for the whole pool (post like
+and comment counters, confirmed attendance) is read in one query per kind,
+and the pool is scored in one vectorized pass with
+scoring.feed_scores (recency as in final_score, plus engagement and
+affinity to the user's sources).
+
+The ranked (kind, pk) list is cached per user in the "feeds" cache,
+shared by every worker, for FOR_YOU_TTL seconds, refreshed on every page
+read, so infinite scroll pages through one stable ordering. Each ranking
+has an id, and the cursor is "offset:id"; a cursor into a ranking that
+has since expired or been replaced raises StaleCursor rather than
+indexing the new one, which would duplicate or skip items.
+
+Author: Vikram Bhojanala
+"""
+
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from django.core.cache import caches
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from django.contrib.auth.models import User
+from apps.posts.models import Post
+from apps.events.models import Event, AttendanceRecord
+from .fanout import FEED_CACHE, feed_entries
+
+# ——— Pool & Cache Limits ———
+TRENDING_DAYS = 7           # Window of posts eligible as trending
+TRENDING_POSTS = 200        # Most engaged recent posts added to every pool
+TRENDING_EVENTS = 50        # Most attended upcoming events added to every pool
+TRENDING_TTL = 300          # Seconds the shared trending list is reused
+FOR_YOU_LENGTH = 500        # Ranked items kept per user
+FOR_YOU_TTL = 300           # Seconds a user's ranking stays stable while unread
+COMMENT_WEIGHT = 2.0        # A comment counts as this many likes
+
+TRENDING_KEY = "feed:trending"
+FOR_YOU_KEY = "feed:foryou:{}"
+
+Ref = Tuple[str, int]       # (kind, pk)
+
+
+class StaleCursor(ValueError):
+    """A cursor into a ranking that has expired or been replaced since."""
+
+
+def trending() -> List[Ref]:
+    """
+    Most engaged recent posts and most attended upcoming events, shared
+    by every user's pool and recomputed every TRENDING_TTL seconds.
+    """
+    cache = caches[FEED_CACHE]
+    refs = cache.get(TRENDING_KEY)
+    if refs is not None:
+        return refs
+
+    now = timezone.now()
+    posts = (
+        Post.objects.filter(date_posted__gte=now - timedelta(days=TRENDING_DAYS))
+        .annotate(n=F("like_count") + F("comment_count"))
+        .order_by("-n", "-pk").values_list("pk", flat=True)[:TRENDING_POSTS]
+    )
+    events = (
+        Event.objects.filter(starts_at__gte=now)
+        .annotate(n=Count("attendancerecord", distinct=True))
+        .order_by("-n", "-pk").values_list("pk", flat=True)[:TRENDING_EVENTS]
+    )
+    refs = [("post", pk) for pk in posts] + [("event", pk) for pk in events]
+    cache.set(TRENDING_KEY, refs, TRENDING_TTL)
+    return refs
+
+
+def _pool_features(post_ids: List[int], event_ids: List[int]) -> Dict[Ref, Tuple[Any, float]]:
+    """
+    {(kind, pk): (timestamp, engagement)} for the pool, one query per kind.
+    Events count as fresh until they start.
+    """
+    now = timezone.now()
+    features: Dict[Ref, Tuple[Any, float]] = {}
+
+    posts = Post.objects.filter(pk__in=post_ids).values_list("pk", "date_posted", "like_count", "comment_count")
+    for pk, posted, likes, comments in posts:
+        features[("post", pk)] = (posted, likes + COMMENT_WEIGHT * comments)
+
+    attending = Count("attendancerecord", filter=Q(attendancerecord__status=AttendanceRecord.STATUS_ATTENDING))
+    events = Event.objects.filter(pk__in=event_ids).annotate(n=attending).values_list("pk", "starts_at", "n")
+    for pk, starts, attendees in events:
+        features[("event", pk)] = (min(starts, now), float(attendees))
+
+    return features
+
+
+def rank_for_user(user: User) -> List[Ref]:
+    """
+    Builds and scores the user's candidate pool; returns the ranked refs.
+    """
+    from apps.search.scoring import feed_scores, to_timestamps  # NumPy only when ranking
+    import numpy as np
+
+    own = {(kind, pk) for _, kind, pk in feed_entries(user.pk)}
+    pool = sorted(own | set(trending()))   # Deterministic order for tie-breaking
+    features = _pool_features(
+        [pk for kind, pk in pool if kind == "post"],
+        [pk for kind, pk in pool if kind == "event"],
+    )
+    refs = [ref for ref in pool if ref in features]     # Deleted since cached
+    if not refs:
+        return []
+
+    scores = feed_scores(
+        to_timestamps(features[ref][0] for ref in refs),
+        np.fromiter((features[ref][1] for ref in refs), dtype=np.float64, count=len(refs)),
+        np.fromiter((ref in own for ref in refs), dtype=np.float64, count=len(refs)),
+    )
+    order = np.argsort(-scores, kind="stable")[:FOR_YOU_LENGTH]
+    return [refs[i] for i in order]
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    """Parses an "offset:ranking id" cursor; raises ValueError if malformed."""
+    offset, _, ranking_id = cursor.partition(":")
+    if not (offset.isdigit() and ranking_id.isdigit()):
+        raise ValueError(f"Invalid feed cursor {cursor!r}.")
+    return int(offset), int(ranking_id)
+
+
+def for_you_page(user: User, cursor: Optional[str], size: int) -> Tuple[List[Ref], Optional[str]]:
+    """
+    Returns (refs, next cursor) of the user's ranked feed. The first page
+    reuses the cached ranking or builds one; a later page must index the
+    ranking its cursor was issued for, else StaleCursor is raised.
+    """
+    offset, ranking_id = _decode_cursor(cursor) if cursor else (0, None)
+
+    cache = caches[FEED_CACHE]
+    key = FOR_YOU_KEY.format(user.pk)
+    ranking = cache.get(key)
+    if ranking is None and ranking_id is None:
+        ranking = {"id": time.time_ns(), "refs": rank_for_user(user)}
+        if not cache.add(key, ranking, FOR_YOU_TTL):    # Another worker ranked first: serve theirs
+            ranking = cache.get(key) or ranking
+    elif ranking is None or ranking["id"] != ranking_id:
+        raise StaleCursor(f"Feed cursor {cursor!r} is for a replaced ranking.")
+    else:
+        cache.touch(key, FOR_YOU_TTL)   # Keep the order stable while the user scrolls
+
+    refs = ranking["refs"]
+    page = refs[offset:offset + size]
+    next_cursor = f"{offset + size}:{ranking['id']}" if offset + size < len(refs) else None
+    return page, next_cursor
@@ -0,0 +1,120 @@
+"""
+apps/common/fragments.py
+
+Rendered-HTML cache of home feed items.
+
+Each feed item (a post or event card, digital_campus/_feed_item.html) is
+cached under (kind, pk, version). Versions live in the "shared" cache,
+so a bump made by one worker is seen by all and is never culled; a
+missing one is seeded from the clock, never 0. They are bumped by
+signals whenever the item, its likes, comments or attachments change,
+so a stale fragment is never looked up again and simply expires. Fragments themselves may stay in the per-process cache.
+
+A feed page is a list of (kind, pk) refs; rendering it costs two
+get_many calls (versions, fragments), one in_bulk per kind for the
+misses only, and one set_many. Fragments hold nothing user-specific.
+
+Author: Vikram Bhojanala
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from django.core.cache import cache, caches
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString, mark_safe
+
+from apps.posts.models import Post
+from apps.events.models import Event
+
+FRAGMENT_TTL = 3600         # Seconds a fragment lives; also bounds staleness of author names/avatars
+ITEM_TEMPLATE = "digital_campus/_feed_item.html"
+VERSION_CACHE = "shared"    # Must be shared by workers and never cull
+
+VERSION_KEY = "feed:version:{}:{}"
+FRAGMENT_KEY = "feed:html:{}:{}:{}"
+
+Ref = Tuple[str, int]       # (kind, pk)
+
+
+# ————— Versions ————— #
+
+def bump_version(kind: str, pk: int) -> None:
+    """
+    Invalidates the cached fragment of one item.
+    """
+    shared = caches[VERSION_CACHE]
+    key = VERSION_KEY.format(kind, pk)
+    try:
+        shared.incr(key)
+    except ValueError:  # First change: seed past any version an emptied backend handed out
+        shared.add(key, time.time_ns(), timeout=None)
+        shared.incr(key)
+
+
+def _versions(refs: List[Ref]) -> Dict[Ref, int]:
+    """
+    Returns each ref's version. A missing one is seeded from the clock, as
+    search generations are, so it never falls back to a version whose
+    fragment may still be cached.
+    """
+    shared = caches[VERSION_CACHE]
+    keys = {ref: VERSION_KEY.format(*ref) for ref in refs}
+    found = shared.get_many(list(keys.values()))
+    missing = [key for key in keys.values() if key not in found]
+    if missing:
+        seed = time.time_ns()
+        for key in missing:
+            shared.add(key, seed, timeout=None)     # Another worker may seed first
+        found.update(shared.get_many(missing))
+    return {ref: found[key] for ref, key in keys.items()}
+
+
+# ————— Hydration ————— #
+
+def hydrate(refs: List[Ref]) -> Dict[Ref, Any]:
+    """
+    Loads the refs' objects with what the item template renders, one
+    in_bulk per kind, stamped with .kind and .timestamp. Deleted rows
+    are missing from the result.
+    """
+    pks: Dict[str, List[int]] = {"post": [], "event": []}
+    for kind, pk in refs:
+        pks[kind].append(pk)
+
+    querysets = {
+        "post":  Post.objects.select_related("author__profile").prefetch_related("attachments"),
+        "event": Event.objects.select_related("created_by__profile"),
+    }
+    objects: Dict[Ref, Any] = {}
+    for kind, ids in pks.items():
+        if not ids:
+            continue
+        for pk, obj in querysets[kind].in_bulk(ids).items():
+            obj.kind = kind
+            obj.timestamp = obj.date_posted if kind == "post" else obj.starts_at
+            objects[(kind, pk)] = obj
+    return objects
+
+
+# ————— Rendering ————— #
+
+def render_items(refs: List[Ref], request: Optional[HttpRequest] = None) -> List[SafeString]:
+    """
+    Returns the rendered HTML of each ref, in order, from the cache where
+    possible; deleted items are dropped.
+    """
+    versions = _versions(refs)
+    keys = {ref: FRAGMENT_KEY.format(ref[0], ref[1], versions[ref]) for ref in refs}
+    cached = cache.get_many(list(keys.values()))
+
+    misses = [ref for ref in refs if keys[ref] not in cached]
+    if misses:
+        rendered = {
+            keys[ref]: render_to_string(ITEM_TEMPLATE, {"item": obj}, request=request)
+            for ref, obj in hydrate(misses).items()
+        }
+        cache.set_many(rendered, FRAGMENT_TTL)
+        cached.update(rendered)
+
+    return [mark_safe(cached[keys[ref]]) for ref in refs if keys[ref] in cached]
@@ -1,135 +1,74 @@
 # apps/common/management/commands/create_dummy_data.py
 
-from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from django.utils import timezone
-from django.db import transaction
-import random
+import re
+import time
+import argparse
+from django.core.management.base import BaseCommand, CommandError
 
-from apps.users.models import Profile
-from apps.clubs.models import Club, ClubMembership
-from apps.posts.models import Post
-from apps.events.models import Event, EventOwnership, AttendanceRecord
+from apps.common.synthetic import BulkWriter, SyntheticData
 
-class Command(BaseCommand):
-    help = "Create dummy users, clubs, posts, events, and attendance records"
 
-    def handle(self, *args, **options):
-        with transaction.atomic():
-            # 1) Users & Profiles
-            users = []
-            for i in range(10):
-                username = f"user{i}"
-                email = f"user{i}@example.com"
-                u, created = User.objects.get_or_create(
-                    username=username,
-                    defaults={'email': email}
-                )
-                # Create or ensure Profile exists
-                Profile.objects.get_or_create(
-                    user=u,
-                    defaults={'bio': f'This is bio of {username}'}
-                )
-                users.append(u)
+def count(value):
+    """Parses counts like 5000, 200_000, 50k or 2M."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([kKmM]?)", value.replace("_", ""))
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid count: {value!r}")
+    number, suffix = match.groups()
+    return int(float(number) * {"": 1, "k": 10**3, "m": 10**6}[suffix.lower()])
+
 
-            # 2) Clubs & Memberships
-            clubs = []
-            for i in range(5):
-                name = f"Club {i}"
-                slug = f"club-{i}"
-                c, _ = Club.objects.get_or_create(
-                    slug=slug,
-                    defaults={'name': name, 'description': f'This is {name}'}
-                )
-                clubs.append(c)
-                # Assign one random owner
-                owner = random.choice(users)
-                ClubMembership.objects.get_or_create(
-                    profile=owner.profile,
-                    club=c,
-                    defaults={'role': 'owner'}
-                )
-                # Assign up to 3 other members
-                others = [u for u in users if u != owner]
-                k = min(len(others), 3)
-                if k > 0:
-                    for m in random.sample(others, k):
-                        ClubMembership.objects.get_or_create(
-                            profile=m.profile,
-                            club=c,
-                            defaults={'role': 'member'}
-                        )
+class Command(BaseCommand):
+    help = (
+        "Create synthetic users, follows, clubs, posts, likes, comments, events, "
+        "attendance and chat messages in bulk, e.g. "
+        "--users 200k --posts 2M --follow-degree 150 --events 50k"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=count, default=10)
+        parser.add_argument("--posts", type=count, default=15)
+        parser.add_argument("--clubs", type=count, default=5)
+        parser.add_argument("--events", type=count, default=13)
+        parser.add_argument("--chat-rooms", type=count, default=5)
+        parser.add_argument("--follow-degree", type=float, default=3, help="Mean accounts followed per user")
+        parser.add_argument("--club-size", type=float, default=4, help="Mean members per club")
+        parser.add_argument("--attendance", type=float, default=5, help="Mean attendance records per event")
+        parser.add_argument("--likes-per-post", type=float, default=2)
+        parser.add_argument("--comments-per-post", type=float, default=1)
+        parser.add_argument("--messages-per-room", type=float, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per insert and transaction")
+        parser.add_argument("--copy", action="store_true", help="Insert with COPY (PostgreSQL only)")
+        parser.add_argument("--seed", type=int, default=None)
 
-            # 3) Posts
-            posts = []
-            for i in range(15):
-                author = random.choice(users)
-                p, _ = Post.objects.get_or_create(
-                    title=f"Post Title {i}",
-                    author=author,
-                    defaults={'content': 'Lorem ipsum dolor sit amet, ' * 5}
-                )
-                posts.append(p)
+    def handle(self, *args, **options):
+        try:
+            writer = BulkWriter(options["batch_size"], options["copy"], log=self.stdout.write)
+        except ValueError as e:
+            raise CommandError(str(e))
 
-            # 4) Events
-            events = []
-            # Club-hosted events
-            for c in clubs:
-                for j in range(2):
-                    start = timezone.now() + timezone.timedelta(days=random.randint(-5, 10))
-                    e, _ = Event.objects.get_or_create(
-                        title=f"{c.name} Event {j}",
-                        club=c,
-                        defaults={
-                            'description': 'An event description ' * 3,
-                            'location': 'Some Venue',
-                            'starts_at': start,
-                            'ends_at': start + timezone.timedelta(hours=2),
-                            'created_by': random.choice(users),
-                        }
-                    )
-                    EventOwnership.objects.get_or_create(event=e, club=c)
-                    # Add some tags if taggit used
-                    try:
-                        e.requirements.add('TagA', 'TagB')
-                    except Exception:
-                        pass
-                    events.append(e)
-            # User-hosted events
-            for i in range(3):
-                author = random.choice(users)
-                start = timezone.now() + timezone.timedelta(days=random.randint(-3, 7))
-                e, _ = Event.objects.get_or_create(
-                    title=f"User {author.username} Event {i}",
-                    created_by=author,
-                    defaults={
-                        'description': 'User-hosted event desc',
-                        'location': 'Home Base',
-                        'starts_at': start,
-                        'ends_at': start + timezone.timedelta(hours=1),
-                    }
-                )
-                EventOwnership.objects.get_or_create(event=e, user=author)
-                events.append(e)
+        data = SyntheticData(
+            writer,
+            users=options["users"],
+            posts=options["posts"],
+            clubs=options["clubs"],
+            events=options["events"],
+            chat_rooms=options["chat_rooms"],
+            follow_degree=options["follow_degree"],
+            club_size=options["club_size"],
+            attendance=options["attendance"],
+            likes_per_post=options["likes_per_post"],
+            comments_per_post=options["comments_per_post"],
+            messages_per_room=options["messages_per_room"],
+            seed=options["seed"],
+        )
 
-            # 5) AttendanceRecords
-            for e in events:
-                # random number of attendees up to total users
-                max_att = len(users)
-                num_att = random.randint(0, max_att)
-                if num_att > 0:
-                    for u in random.sample(users, num_att):
-                        status = random.choice([
-                            AttendanceRecord.STATUS_REQUESTED,
-                            AttendanceRecord.STATUS_ATTENDING
-                        ])
-                        rec, _ = AttendanceRecord.objects.get_or_create(
-                            event=e,
-                            user=u,
-                            defaults={'status': status}
-                        )
-                        if status == AttendanceRecord.STATUS_ATTENDING:
-                            rec.responded_at = timezone.now()
-                            rec.save()
+        started = time.perf_counter()
+        try:
+            counts = data.generate()
+        except ValueError as e:
+            raise CommandError(str(e))
 
-            self.stdout.write(self.style.SUCCESS("Dummy data created successfully!"))
+        total = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Dummy data created successfully: {total:,} rows in {time.perf_counter() - started:.1f}s."
+        ))
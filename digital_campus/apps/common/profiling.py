@@ -0,0 +1,310 @@
+"""
+apps/common/profiling.py
+
+Request profiling: SQL query counts, duplicated queries, DB time and
+total time per view and per template.
+
+ProfilingMiddleware is removed at startup unless PROFILING_ENABLED is set
+or PROFILING_HEADER_TOKEN is configured. When active it profiles a
+PROFILING_SAMPLE_RATE share of requests, plus every request sending
+`X-Profile: <PROFILING_HEADER_TOKEN>`. Queries are captured with
+database execute wrappers, so it works with DEBUG off.
+
+A profiled request:
+- adds to the per-view and per-template totals served in Prometheus
+  text format by the `metrics/` endpoint (staff or the X-Profile token);
+- gets Server-Timing and X-Query-Count response headers;
+- is logged (one JSON line on this module's logger) if it took longer
+  than PROFILING_SLOW_MS, for a PROFILING_SLOW_LOG_RATE share of them.
+
+Duplicated queries are grouped by fingerprint (the SQL with literals
+and IN-lists collapsed): one fingerprint repeated per row is the
+signature of an N+1 pattern.
+
+Author: Vikram Bhojanala
+"""
+
+import re
+import hmac
+import json
+import time
+import random
+import logging
+import threading
+from contextlib import ExitStack
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+# ——— Reporting ———
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # Seconds
+TOP_DUPLICATES = 5      # Fingerprints listed in a slow-request log line
+SQL_PREVIEW = 300       # Characters of a fingerprint kept in the log
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with literals replaced by ? and IN-lists collapsed."""
+    sql = _NUMBER.sub("?", _STRING.sub("?", sql))
+    return _IN_LIST.sub("IN (...)", sql.replace("%s", "?"))
+
+
+# ————— Per-Request Collector ————— #
+
+class RequestProfile:
+    """
+    Queries and template renders of one request. Queries are attributed
+    to the innermost template being rendered when they ran, if any.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.fingerprints: Dict[str, int] = {}
+        self.templates: Dict[str, List[float]] = {}  # name -> [renders, queries, seconds]
+        self.stack: List[str] = []
+
+    def record_query(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict) -> Any:
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+            key = fingerprint(sql)
+            self.fingerprints[key] = self.fingerprints.get(key, 0) + 1
+            if self.stack:
+                self.templates[self.stack[-1]][1] += 1
+
+    def duplicates(self) -> List[Tuple[str, int]]:
+        """Fingerprints run more than once, most repeated first."""
+        repeated = [(sql, n) for sql, n in self.fingerprints.items() if n > 1]
+        return sorted(repeated, key=lambda item: -item[1])
+
+    @property
+    def duplicate_queries(self) -> int:
+        return sum(n - 1 for _, n in self.duplicates())
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+# ————— Template Hook ————— #
+
+_hook_lock = threading.Lock()
+_hooked = False
+
+
+def install_template_hook() -> None:
+    """
+    Wraps Template._render (as Django's test runner does) to time each
+    render of the profiled request; a no-op for other requests.
+    """
+    global _hooked
+    from django.template.base import Template
+
+    with _hook_lock:
+        if _hooked:
+            return
+        original = Template._render
+
+        def _render(self: Template, context: Any) -> str:
+            profile = _current.get()
+            if profile is None:
+                return original(self, context)
+
+            name = self.origin.template_name or self.name or "<string>"
+            stats = profile.templates.setdefault(name, [0, 0, 0.0])
+            profile.stack.append(name)
+            started = time.perf_counter()
+            try:
+                return original(self, context)
+            finally:
+                profile.stack.pop()
+                stats[0] += 1
+                stats[2] += time.perf_counter() - started
+
+        Template._render = _render
+        _hooked = True
+
+
+# ————— Aggregated Metrics ————— #
+
+class _Series:
+    """Running totals of one view or template."""
+    __slots__ = ("count", "queries", "duplicates", "db_seconds", "seconds", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.queries = 0
+        self.duplicates = 0
+        self.db_seconds = 0.0
+        self.seconds = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+
+_metrics_lock = threading.Lock()
+_views: Dict[Tuple[str, str], _Series] = {}      # (view name, method) -> totals
+_templates: Dict[str, _Series] = {}
+
+
+def _record(view: str, method: str, profile: RequestProfile, seconds: float) -> None:
+    with _metrics_lock:
+        series = _views.setdefault((view, method), _Series())
+        series.count += 1
+        series.queries += profile.queries
+        series.duplicates += profile.duplicate_queries
+        series.db_seconds += profile.db_seconds
+        series.seconds += seconds
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                series.buckets[i] += 1
+
+        for name, (renders, queries, template_seconds) in profile.templates.items():
+            series = _templates.setdefault(name, _Series())
+            series.count += renders
+            series.queries += queries
+            series.seconds += template_seconds
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_metrics() -> str:
+    """
+    Returns the collected totals in the Prometheus text exposition format.
+    """
+    with _metrics_lock:
+        views = sorted(_views.items())
+        templates = sorted(_templates.items())
+
+    lines = []
+
+    def family(name: str, kind: str, help_text: str) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    view_labels = [(f'view="{_label(view)}",method="{method}"', s) for (view, method), s in views]
+
+    family("django_view_requests_total", "counter", "Profiled requests.")
+    lines += [f"django_view_requests_total{{{labels}}} {s.count}" for labels, s in view_labels]
+    family("django_view_queries_total", "counter", "SQL queries run by profiled requests.")
+    lines += [f"django_view_queries_total{{{labels}}} {s.queries}" for labels, s in view_labels]
+    family("django_view_duplicate_queries_total", "counter", "Repeats of an already-run query fingerprint.")
+    lines += [f"django_view_duplicate_queries_total{{{labels}}} {s.duplicates}" for labels, s in view_labels]
+    family("django_view_db_seconds_total", "counter", "Time spent in SQL queries.")
+    lines += [f"django_view_db_seconds_total{{{labels}}} {s.db_seconds:.6f}" for labels, s in view_labels]
+
+    family("django_view_duration_seconds", "histogram", "Total request time.")
+    for labels, s in view_labels:
+        for bound, n in zip(DURATION_BUCKETS, s.buckets):
+            lines.append(f'django_view_duration_seconds_bucket{{{labels},le="{bound}"}} {n}')
+        lines.append(f'django_view_duration_seconds_bucket{{{labels},le="+Inf"}} {s.count}')
+        lines.append(f"django_view_duration_seconds_sum{{{labels}}} {s.seconds:.6f}")
+        lines.append(f"django_view_duration_seconds_count{{{labels}}} {s.count}")
+
+    template_labels = [(f'template="{_label(name)}"', s) for name, s in templates]
+    family("django_template_renders_total", "counter", "Template renders, including includes.")
+    lines += [f"django_template_renders_total{{{labels}}} {s.count}" for labels, s in template_labels]
+    family("django_template_queries_total", "counter", "SQL queries run while the template was innermost.")
+    lines += [f"django_template_queries_total{{{labels}}} {s.queries}" for labels, s in template_labels]
+    family("django_template_seconds_total", "counter", "Render time, including nested templates.")
+    lines += [f"django_template_seconds_total{{{labels}}} {s.seconds:.6f}" for labels, s in template_labels]
+
+    return "\n".join(lines) + "\n"
+
+
+# ————— Access ————— #
+
+def sent_token(request: HttpRequest, token: Optional[str]) -> bool:
+    """True if the request sends `X-Profile: <token>`, compared in constant time."""
+    sent = request.headers.get("X-Profile")
+    return bool(token and sent) and hmac.compare_digest(sent.encode(), token.encode())
+
+
+def may_read_metrics(request: HttpRequest) -> bool:
+    """Staff, or a scraper sending `X-Profile: <PROFILING_HEADER_TOKEN>`."""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    return sent_token(request, getattr(settings, "PROFILING_HEADER_TOKEN", None))
+
+
+# ————— Middleware ————— #
+
+class ProfilingMiddleware:
+    """
+    Profiles sampled or header-flagged requests; see the module docstring.
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]) -> None:
+        self.enabled = getattr(settings, "PROFILING_ENABLED", False)
+        self.token = getattr(settings, "PROFILING_HEADER_TOKEN", None)
+        if not (self.enabled or self.token):
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 1.0)
+        self.slow_seconds = getattr(settings, "PROFILING_SLOW_MS", 500) / 1000
+        self.slow_log_rate = getattr(settings, "PROFILING_SLOW_LOG_RATE", 1.0)
+        install_template_hook()
+
+    def _wanted(self, request: HttpRequest) -> bool:
+        if sent_token(request, self.token):
+            return True
+        return self.enabled and random.random() < self.sample_rate
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not self._wanted(request):
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        seconds = time.perf_counter() - profile.started
+        match = request.resolver_match
+        view = match.view_name if match else "<unresolved>"
+        _record(view, request.method, profile, seconds)
+
+        response["Server-Timing"] = f"db;dur={profile.db_seconds * 1000:.1f}, total;dur={seconds * 1000:.1f}"
+        response["X-Query-Count"] = str(profile.queries)
+
+        if seconds >= self.slow_seconds and random.random() < self.slow_log_rate:
+            self._log_slow(request, response, view, profile, seconds)
+        return response
+
+    @staticmethod
+    def _log_slow(request: HttpRequest, response: HttpResponse, view: str,
+                  profile: RequestProfile, seconds: float) -> None:
+        logger.warning("[Profiling] Slow request %s", json.dumps({
+            "view":       view,
+            "path":       request.path,
+            "method":     request.method,
+            "status":     response.status_code,
+            "total_ms":   round(seconds * 1000, 1),
+            "db_ms":      round(profile.db_seconds * 1000, 1),
+            "queries":    profile.queries,
+            "duplicates": [
+                {"count": n, "sql": sql[:SQL_PREVIEW]} for sql, n in profile.duplicates()[:TOP_DUPLICATES]
+            ],
+            "templates":  {
+                name: {"renders": renders, "queries": queries, "ms": round(t * 1000, 1)}
+                for name, (renders, queries, t) in profile.templates.items()
+            },
+        }))
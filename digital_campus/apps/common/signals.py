@@ -0,0 +1,93 @@
+"""
+apps/common/signals.py
+
+Keeps the precomputed home feeds (fanout.py) in sync: new posts and
+events are pushed once their ownership row exists, and feeds whose
+sources change (follows, club memberships) are dropped for a rebuild.
+Also bumps the fragment version (fragments.py) of any post or event
+whose rendered card changes. Everything runs after the surrounding
+transaction commits.
+
+Author: Vikram Bhojanala
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.users.models import Profile
+from apps.clubs.models import ClubMembership
+from apps.posts.models import Post, PostOwnership, PostLike, Comment, Attachment
+from apps.events.models import Event, EventOwnership
+from .fanout import fan_out, invalidate_feed
+from .fragments import bump_version
+
+
+# ————— New Content ————— #
+@receiver(post_save, sender=PostOwnership)
+def fan_out_post(sender, instance, created, **kwargs):
+    # Ownership is created right after the post, so it knows the club
+    if created:
+        post = instance.post
+        transaction.on_commit(
+            lambda: fan_out("post", post.pk, post.date_posted, post.author_id, instance.club_id)
+        )
+
+
+@receiver(post_save, sender=EventOwnership)
+def fan_out_event(sender, instance, created, **kwargs):
+    if created:
+        event = instance.event
+        club_id = event.club_id or instance.club_id
+        transaction.on_commit(
+            lambda: fan_out("event", event.pk, event.starts_at, event.created_by_id, club_id)
+        )
+
+
+# ————— Feed Sources ————— #
+@receiver(m2m_changed, sender=Profile.following.through)
+def following_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drops the feeds of the profiles whose `following` changed."""
+    if action in ("post_add", "post_remove"):
+        changed = Profile.objects.filter(pk__in=pk_set) if reverse else None
+    elif action == "pre_clear":
+        changed = instance.followers.all() if reverse else None
+    else:
+        return
+
+    user_ids = [instance.user_id] if changed is None else list(changed.values_list("user_id", flat=True))
+    transaction.on_commit(lambda: invalidate_feed(user_ids))
+
+
+@receiver(post_save, sender=ClubMembership)
+@receiver(post_delete, sender=ClubMembership)
+def membership_changed(sender, instance, **kwargs):
+    user_id = Profile.objects.filter(pk=instance.profile_id).values_list("user_id", flat=True).first()
+    if user_id is not None:
+        transaction.on_commit(lambda: invalidate_feed([user_id]))
+
+
+# ————— Rendered Fragments ————— #
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    pk = instance.pk    # delete() clears it before on_commit runs
+    transaction.on_commit(lambda: bump_version("post", pk))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: bump_version("event", pk))
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_delete, sender=PostLike)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def post_part_changed(sender, instance, **kwargs):
+    post_id = instance.post_id
+    transaction.on_commit(lambda: bump_version("post", post_id))
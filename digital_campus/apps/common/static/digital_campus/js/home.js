@@ -1,6 +1,7 @@
-let page     = 2;      // first Ajax page
+// opaque keyset cursor of the next page; empty once the feed is exhausted
+let cursor   = document.getElementById('loading').dataset.nextCursor || '';
 let loading  = false;
-let finished = false;  // flips to true when server sends an empty slice
+let finished = !cursor;
 
 function currentFilter () {
   const p = new URLSearchParams(window.location.search);
@@ -13,16 +14,23 @@ async function loadNext () {
   document.getElementById('loading').style.display = 'block';
 
   try {
-    const res = await fetch(`?page=${page}&filter_by=${currentFilter()}`, {
+    const params = new URLSearchParams({ cursor, filter_by: currentFilter() });
+    const res = await fetch(`?${params}`, {
       headers: { 'X-Requested-With': 'XMLHttpRequest' }
     });
-    const data = await res.json();       // blank JSON if 404 intercepted
+    const data = await res.json();       // blank JSON on a bad cursor
+    if (data.stale) {
+      // the ranking was replaced since this page: restart from the top
+      window.location.reload();
+      return;
+    }
     if (data.posts_html && data.posts_html.trim()) {
       document
         .getElementById('post-container')
         .insertAdjacentHTML('beforeend', data.posts_html);
-      page++;
-      loading = false;
+      cursor   = data.next_cursor || '';
+      finished = !cursor;
+      loading  = false;
       document.getElementById('loading').style.display = 'none';
     } else {
       finished = true;
@@ -0,0 +1,46 @@
+// "Load more" buttons on the search results page.
+// Each section (posts, users, clubs, events) pages through its own cursor;
+// SEARCH_MORE_URL and SEARCH_PARAMS are set by search_results.html.
+
+async function loadMore (button) {
+  if (button.disabled) return;
+  button.disabled = true;
+
+  const params = new URLSearchParams({
+    ...SEARCH_PARAMS,
+    type:   button.dataset.section,
+    cursor: button.dataset.cursor
+  });
+
+  try {
+    const res  = await fetch(`${SEARCH_MORE_URL}?${params}`, {
+      headers: { 'X-Requested-With': 'XMLHttpRequest' }
+    });
+    const data = await res.json();
+
+    if (data.stale) {
+      // Results changed since this page was ranked: restart from the top
+      window.location.reload();
+      return;
+    }
+
+    document
+      .getElementById(`search-${button.dataset.section}`)
+      .insertAdjacentHTML('beforeend', data.html || '');
+
+    if (data.next_cursor === null || data.next_cursor === undefined) {
+      button.parentElement.remove();
+    } else {
+      button.dataset.cursor = data.next_cursor;
+      button.disabled = false;
+    }
+  } catch (e) {
+    console.error('Load more error:', e);
+    button.innerText = 'Couldn’t load more';
+  }
+}
+
+document.addEventListener('click', (e) => {
+  const button = e.target.closest('.load-more');
+  if (button) loadMore(button);
+});
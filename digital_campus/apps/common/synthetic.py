@@ -0,0 +1,485 @@
+"""
+apps/common/synthetic.py
+
+Bulk synthetic data for load and performance testing.
+
+Generates users, profiles, a follow graph, clubs and memberships, posts
+(with ownership, likes and comments), events (with ownership and
+attendance) and chat rooms with messages, at production scale.
+
+Rows are built lazily and written in batches, each batch in its own
+transaction: bulk_create by default, or COPY FROM STDIN on PostgreSQL.
+Primary keys are assigned up front from each table's current maximum,
+so relations are computed arithmetically instead of re-read, and memory
+stays bounded by the batch size.
+
+Shapes are heavy-tailed like real social data: follow degrees, club
+sizes, attendance, likes, comments and chat volumes are Pareto
+distributed around the requested mean, and who gets followed, posts,
+likes or chats follows a Zipf-like popularity ranking.
+
+Bulk writes bypass save() and signals: profiles are created here, post
+like/comment counters are reconciled at the end, and the search index
+picks the data up on its next rebuild.
+
+Run it with `manage.py create_dummy_data`.
+
+Author: Vikram Bhojanala
+"""
+
+import time
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Type
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Max
+
+from apps.users.models import Profile
+from apps.clubs.models import Club, ClubMembership
+from apps.posts.models import Post, PostOwnership, PostLike, Comment
+from apps.posts.counters import reconcile_counters
+from apps.events.models import Event, EventOwnership, AttendanceRecord
+from apps.chat.models import ChatRoom, ChatMessage
+
+logger = logging.getLogger(__name__)
+
+# ——— Distribution Shape ———
+PARETO_ALPHA = 2.0          # Tail of per-row counts; lower is heavier
+POPULARITY_EXPONENT = 1.0   # Zipf exponent of who is followed, posts, likes, chats
+
+# ——— Mix ———
+CLUB_POST_RATIO = 0.2       # Posts owned by a club rather than their author
+CLUB_EVENT_RATIO = 0.6      # Events hosted by a club
+FEATURED_RATIO = 0.03       # Featured clubs and events
+PRIVATE_ROOM_RATIO = 0.7    # Direct 1:1 rooms among chat rooms
+GROUP_ROOM_SIZE = 12        # Mean participants of a group room
+ATTENDING_RATIO = 0.8       # Attendance records already approved
+HISTORY_DAYS = 365          # Content is spread over this many past days
+
+DEFAULT_PASSWORD = "password"
+
+WORDS = (
+    "campus study group lecture exam project lab library coffee midterm final "
+    "club meeting event workshop seminar hackathon research thesis career fair "
+    "intern network music art sports game night trip volunteer robotics code "
+    "design startup debate chess film photo dance choir theatre garden food "
+    "free pizza welcome week orientation alumni talk panel review session notes"
+).split()
+
+
+# ————— Sampling ————— #
+
+def pareto_counts(rng: np.random.Generator, n: int, mean: float, cap: int) -> np.ndarray:
+    """
+    Returns n heavy-tailed counts averaging about `mean`, each at most `cap`.
+    """
+    if n <= 0 or mean <= 0 or cap <= 0:
+        return np.zeros(max(n, 0), dtype=np.int64)
+    scale = mean * (PARETO_ALPHA - 1) / PARETO_ALPHA
+    counts = np.rint((rng.pareto(PARETO_ALPHA, n) + 1) * scale)
+    return np.minimum(counts, cap).astype(np.int64)
+
+
+class Popularity:
+    """
+    Samples indices 0..n-1 with Zipf-like weights over a random ranking,
+    so a few indices are drawn very often and most rarely.
+    """
+
+    def __init__(self, rng: np.random.Generator, n: int,
+                 exponent: float = POPULARITY_EXPONENT) -> None:
+        self.rng = rng
+        self.rank = rng.permutation(n)
+        cdf = np.cumsum(1.0 / np.arange(1, n + 1) ** exponent)
+        self.cdf = cdf / cdf[-1] if n else cdf
+
+    def sample(self, size: int) -> np.ndarray:
+        picks = np.searchsorted(self.cdf, self.rng.random(size))
+        return self.rank[np.minimum(picks, len(self.rank) - 1)]
+
+
+def edges(counts: np.ndarray, targets: np.ndarray, first: int = 0,
+          allow_self: bool = True) -> Iterator[tuple]:
+    """
+    Yields unique (source, target) pairs: source first+i gets counts[i]
+    of `targets`, in order. Duplicates (and self-loops, unless allowed)
+    are dropped, so sources may end up with slightly fewer.
+    """
+    sources = np.repeat(np.arange(first, first + len(counts)), counts)
+    keep = np.ones(len(sources), dtype=bool) if allow_self else sources != targets
+    pairs = np.unique(np.column_stack([sources[keep], targets[keep]]), axis=0)
+    return map(tuple, pairs.tolist())
+
+
+# ————— Writing ————— #
+
+def _batches(objs: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    it = iter(objs)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def next_id(model: Type[models.Model]) -> int:
+    """First free primary key of `model`."""
+    return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+
+def reset_sequences(model_list: Iterable[Type[models.Model]]) -> None:
+    """
+    Moves id sequences past explicitly assigned keys (no-op on SQLite).
+    """
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), list(model_list)):
+            cursor.execute(sql)
+
+
+@contextmanager
+def explicit_dates(*model_list: Type[models.Model]) -> Iterator[None]:
+    """
+    Lets generated rows keep the timestamps set on them: auto_now_add
+    would otherwise stamp every bulk row with the insert time.
+    """
+    fields = [
+        f for model in model_list for f in model._meta.concrete_fields
+        if getattr(f, "auto_now_add", False)
+    ]
+    for f in fields:
+        f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f in fields:
+            f.auto_now_add = True
+
+
+class BulkWriter:
+    """
+    Inserts unsaved instances batch by batch, each batch in its own
+    transaction, with bulk_create or (copy=True) PostgreSQL COPY.
+    """
+
+    def __init__(self, batch_size: int = 5000, copy: bool = False,
+                 log: Callable[[str], None] = logger.info) -> None:
+        if copy and connection.vendor != "postgresql":
+            raise ValueError(f"COPY needs PostgreSQL, not {connection.vendor}.")
+        self.batch_size = batch_size
+        self.copy = copy
+        self.log = log
+        self.counts: Dict[str, int] = {}
+
+    def write(self, model: Type[models.Model], objs: Iterable[models.Model]) -> int:
+        """
+        Inserts every instance of `objs` into `model`'s table and
+        returns how many were written.
+        """
+        written, started = 0, time.perf_counter()
+        for batch in _batches(objs, self.batch_size):
+            with transaction.atomic():
+                if self.copy:
+                    self._copy(model, batch)
+                else:
+                    model.objects.bulk_create(batch)
+            written += len(batch)
+
+        label = model._meta.label
+        self.counts[label] = self.counts.get(label, 0) + written
+        elapsed = time.perf_counter() - started
+        if written:
+            self.log(f"{label}: {written:,} rows in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f}/s)")
+        return written
+
+    @staticmethod
+    def _copy(model: Type[models.Model], batch: List[models.Model]) -> None:
+        opts = model._meta
+        # Through rows leave their key to the database
+        fields = [f for f in opts.concrete_fields if not (f.primary_key and batch[0].pk is None)]
+        quote = connection.ops.quote_name
+        columns = ", ".join(quote(f.column) for f in fields)
+        with connection.cursor() as cursor:
+            with cursor.copy(f"COPY {quote(opts.db_table)} ({columns}) FROM STDIN") as copy:
+                for obj in batch:
+                    copy.write_row([f.get_db_prep_save(f.pre_save(obj, True), connection) for f in fields])
+
+
+# ————— Generator ————— #
+
+class SyntheticData:
+    """
+    Generates one dataset. Counts are totals; the per-row options are
+    means of heavy-tailed distributions.
+    """
+
+    def __init__(self, writer: BulkWriter, *, users: int, posts: int, clubs: int, events: int,
+                 chat_rooms: int, follow_degree: float, club_size: float, attendance: float,
+                 likes_per_post: float, comments_per_post: float, messages_per_room: float,
+                 seed: Optional[int] = None) -> None:
+        self.writer = writer
+        self.n_users, self.n_posts, self.n_clubs = users, posts, clubs
+        self.n_events, self.n_rooms = events, chat_rooms
+        self.follow_degree = follow_degree
+        self.club_size = club_size
+        self.attendance = attendance
+        self.likes_per_post = likes_per_post
+        self.comments_per_post = comments_per_post
+        self.messages_per_room = messages_per_room
+
+        self.rng = np.random.default_rng(seed)
+        self.now = datetime.now(timezone.utc)
+        self.chunk = writer.batch_size
+
+    # ————— Helpers ————— #
+    def _text(self, words: int) -> str:
+        return " ".join(WORDS[i] for i in self.rng.integers(len(WORDS), size=words))
+
+    def _past(self, n: int, days: float = HISTORY_DAYS) -> List[datetime]:
+        seconds = self.rng.random(n) * days * 86400
+        return [self.now - timedelta(seconds=float(s)) for s in seconds]
+
+    def _user(self, i: int) -> int:
+        return self.user0 + int(i)
+
+    def _profile(self, i: int) -> int:
+        return self.profile0 + int(i)
+
+    def _ranges(self, n: int) -> Iterator[range]:
+        for start in range(0, n, self.chunk):
+            yield range(start, min(start + self.chunk, n))
+
+    # ————— Entry Point ————— #
+    def generate(self) -> Dict[str, int]:
+        """
+        Writes the whole dataset and returns the row count per model.
+        """
+        if self.n_users < 2:
+            raise ValueError("At least two users are needed.")
+
+        self.user0, self.profile0 = next_id(User), next_id(Profile)
+        self.club0, self.post0, self.event0 = next_id(Club), next_id(Post), next_id(Event)
+        self.room0 = next_id(ChatRoom)
+
+        # Who is followed, who posts and who engages are separate rankings
+        self.celebrity = Popularity(self.rng, self.n_users)
+        self.activity = Popularity(self.rng, self.n_users)
+
+        dated = (Club, ClubMembership, Post, PostLike, Comment, AttendanceRecord, ChatMessage)
+        with explicit_dates(*dated):
+            self.users()
+            self.follows()
+            self.clubs()
+            self.posts()
+            self.events()
+            self.chat()
+
+        reset_sequences([User, Profile, Club, Post, Event, ChatRoom])
+        reconcile_counters(first_pk=self.post0)    # Bulk likes/comments skipped the counter signals
+        return dict(self.writer.counts)
+
+    # ————— Users ————— #
+    def users(self) -> None:
+        password = make_password(DEFAULT_PASSWORD)  # Hashed once: hashing per user would dominate
+        joined = self._past(self.n_users, HISTORY_DAYS * 2)
+
+        self.writer.write(User, (
+            User(
+                id=self._user(i),
+                username=f"synth{self._user(i)}",
+                email=f"synth{self._user(i)}@example.com",
+                first_name=WORDS[i % len(WORDS)].title(),
+                last_name=WORDS[(i // len(WORDS)) % len(WORDS)].title(),
+                password=password,
+                date_joined=joined[i],
+            )
+            for i in range(self.n_users)
+        ))
+        self.writer.write(Profile, (
+            Profile(id=self._profile(i), user_id=self._user(i), bio=self._text(12))
+            for i in range(self.n_users)
+        ))
+
+    def follows(self) -> None:
+        Follow = Profile.following.through
+
+        def rows() -> Iterator[models.Model]:
+            for span in self._ranges(self.n_users):
+                counts = pareto_counts(self.rng, len(span), self.follow_degree, self.n_users - 1)
+                targets = self.celebrity.sample(int(counts.sum()))
+                for src, dst in edges(counts, targets, span.start, allow_self=False):
+                    yield Follow(from_profile_id=self._profile(src), to_profile_id=self._profile(dst))
+
+        self.writer.write(Follow, rows())
+
+    # ————— Clubs ————— #
+    def clubs(self) -> None:
+        self.club_owner = self.activity.sample(self.n_clubs)
+        created = self._past(self.n_clubs)
+        featured = self.rng.random(self.n_clubs) < FEATURED_RATIO
+
+        self.writer.write(Club, (
+            Club(
+                id=self.club0 + i,
+                name=f"Synth Club {self.club0 + i}",
+                slug=f"synth-club-{self.club0 + i}",
+                description=self._text(30),
+                creator_id=self._profile(self.club_owner[i]),
+                created_at=created[i],
+                is_featured=bool(featured[i]),
+            )
+            for i in range(self.n_clubs)
+        ))
+
+        def rows() -> Iterator[models.Model]:
+            for span in self._ranges(self.n_clubs):
+                counts = pareto_counts(self.rng, len(span), self.club_size, self.n_users)
+                members = self.activity.sample(int(counts.sum()))
+                for club, member in edges(counts, members, span.start):
+                    if member == self.club_owner[club]:
+                        continue
+                    yield ClubMembership(
+                        profile_id=self._profile(member), club_id=self.club0 + club,
+                        role="member", status=ClubMembership.STATUS_MEMBER,
+                        joined_at=created[club],
+                    )
+                for club in span:
+                    yield ClubMembership(
+                        profile_id=self._profile(self.club_owner[club]), club_id=self.club0 + club,
+                        role="owner", status=ClubMembership.STATUS_MEMBER,
+                        joined_at=created[club],
+                    )
+
+        self.writer.write(ClubMembership, rows())
+
+    # ————— Posts ————— #
+    def posts(self) -> None:
+        authors = self.activity.sample(self.n_posts)
+        club_owned = (self.rng.random(self.n_posts) < CLUB_POST_RATIO) if self.n_clubs else np.zeros(self.n_posts, bool)
+        owning_club = self.rng.integers(max(self.n_clubs, 1), size=self.n_posts)
+
+        for span in self._ranges(self.n_posts):
+            posted = self._past(len(span))
+            self.writer.write(Post, (
+                Post(
+                    id=self.post0 + i,
+                    title=self._text(int(self.rng.integers(3, 9))).capitalize(),
+                    content=self._text(int(self.rng.integers(20, 120))),
+                    author_id=self._user(authors[i]),
+                    date_posted=posted[i - span.start],
+                )
+                for i in span
+            ))
+            self.writer.write(PostOwnership, (
+                PostOwnership(post_id=self.post0 + i, club_id=self.club0 + int(owning_club[i]))
+                if club_owned[i] else
+                PostOwnership(post_id=self.post0 + i, user_id=self._user(authors[i]))
+                for i in span
+            ))
+            self._engagement(span, posted)
+
+    def _engagement(self, span: range, posted: List[datetime]) -> None:
+        def reactions(model: Type[models.Model], mean: float, unique: bool) -> Iterator[models.Model]:
+            counts = pareto_counts(self.rng, len(span), mean, self.n_users)
+            people = self.activity.sample(int(counts.sum()))
+            if unique:
+                pairs = edges(counts, people, span.start)
+            else:
+                pairs = zip(np.repeat(np.arange(span.start, span.stop), counts).tolist(), people.tolist())
+            for post, person in pairs:
+                extra = dict(content=self._text(int(self.rng.integers(4, 25)))) if model is Comment else {}
+                yield model(
+                    post_id=self.post0 + post, user_id=self._profile(person),
+                    created_at=min(posted[post - span.start] + timedelta(minutes=float(self.rng.exponential(600))), self.now),
+                    **extra,
+                )
+
+        self.writer.write(PostLike, reactions(PostLike, self.likes_per_post, unique=True))
+        self.writer.write(Comment, reactions(Comment, self.comments_per_post, unique=False))
+
+    # ————— Events ————— #
+    def events(self) -> None:
+        hosts = self.activity.sample(self.n_events)
+        by_club = (self.rng.random(self.n_events) < CLUB_EVENT_RATIO) if self.n_clubs else np.zeros(self.n_events, bool)
+        clubs = self.rng.integers(max(self.n_clubs, 1), size=self.n_events)
+        featured = self.rng.random(self.n_events) < FEATURED_RATIO
+        # Mostly past events, a quarter upcoming
+        starts = [self.now + timedelta(days=float(d)) for d in self.rng.uniform(-180, 60, self.n_events)]
+
+        club_id = lambda i: self.club0 + int(clubs[i]) if by_club[i] else None
+        self.writer.write(Event, (
+            Event(
+                id=self.event0 + i,
+                title=self._text(int(self.rng.integers(2, 6))).title(),
+                description=self._text(40),
+                location=f"Room {int(self.rng.integers(100, 500))}",
+                starts_at=starts[i],
+                ends_at=starts[i] + timedelta(hours=2),
+                created_by_id=self._user(hosts[i]),
+                club_id=club_id(i),
+                is_featured=bool(featured[i]),
+            )
+            for i in range(self.n_events)
+        ))
+        self.writer.write(EventOwnership, (
+            EventOwnership(event_id=self.event0 + i, club_id=club_id(i),
+                           user_id=None if by_club[i] else self._user(hosts[i]))
+            for i in range(self.n_events)
+        ))
+
+        def rows() -> Iterator[models.Model]:
+            for span in self._ranges(self.n_events):
+                counts = pareto_counts(self.rng, len(span), self.attendance, self.n_users)
+                for event, person in edges(counts, self.activity.sample(int(counts.sum())), span.start):
+                    requested = starts[event] - timedelta(days=float(self.rng.uniform(1, 14)))
+                    attending = self.rng.random() < ATTENDING_RATIO
+                    yield AttendanceRecord(
+                        event_id=self.event0 + event, user_id=self._user(person),
+                        status=AttendanceRecord.STATUS_ATTENDING if attending else AttendanceRecord.STATUS_REQUESTED,
+                        requested_at=requested,
+                        responded_at=requested + timedelta(hours=float(self.rng.uniform(1, 48))) if attending else None,
+                    )
+
+        self.writer.write(AttendanceRecord, rows())
+
+    # ————— Chat ————— #
+    def chat(self) -> None:
+        private = self.rng.random(self.n_rooms) < PRIVATE_ROOM_RATIO
+        self.writer.write(ChatRoom, (
+            ChatRoom(
+                id=self.room0 + i,
+                name=f"synth-{'dm' if private[i] else 'group'}-{self.room0 + i}",
+                is_private=bool(private[i]),
+            )
+            for i in range(self.n_rooms)
+        ))
+
+        sizes = np.where(private, 2, np.maximum(pareto_counts(self.rng, self.n_rooms, GROUP_ROOM_SIZE, self.n_users), 2))
+        people = self.activity.sample(int(sizes.sum()))
+        participants: Dict[int, List[int]] = {}
+        for room, person in edges(sizes, people):
+            participants.setdefault(room, []).append(person)
+
+        Participant = ChatRoom.participants.through
+        self.writer.write(Participant, (
+            Participant(chatroom_id=self.room0 + room, user_id=self._user(person))
+            for room, members in participants.items() for person in members
+        ))
+
+        def rows() -> Iterator[models.Model]:
+            for span in self._ranges(self.n_rooms):
+                counts = pareto_counts(self.rng, len(span), self.messages_per_room, 10 ** 7)
+                for room, n in zip(span, counts.tolist()):
+                    members = participants.get(room)
+                    if not members:
+                        continue
+                    senders = self.rng.integers(len(members), size=n)
+                    for sent, sender in zip(sorted(self._past(n, 90)), senders.tolist()):
+                        yield ChatMessage(
+                            room_id=self.room0 + room, user_id=self._user(members[sender]),
+                            content=self._text(int(self.rng.integers(2, 20))), timestamp=sent,
+                        )
+
+        self.writer.write(ChatMessage, rows())
@@ -1,3 +1,277 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from apps.events.models import Event
+from apps.posts.models import Post
+from . import fanout, for_you, fragments
+from .profiling import ProfilingMiddleware, sent_token
+from .feed import FeedSource, decode_cursor, encode_cursor, feed_page
+from .fixture_loader import iter_records
+
+RECORDS = [
+    {"model": "posts.post", "pk": pk, "fields": {"title": f"Post {pk}", "content": "x" * (pk * 7 % 53)}}
+    for pk in range(1, 40)
+] + [{"model": "posts.post", "pk": 99, "fields": {"title": "brackets ] , [ and \"quotes\"", "content": ""}}]
+
+
+class IterRecordsTests(SimpleTestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def write(self, name, text):
+        path = self.dir / name
+        if name.endswith(".gz"):
+            with gzip.open(path, "wt", encoding="utf-8") as fh:
+                fh.write(text)
+        else:
+            path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_records_split_across_chunks(self):
+        path = self.write("dump.json", json.dumps(RECORDS, indent=2))
+        for chunk_size in (1, 2, 7, 64, 1 << 20):   # Every record straddles several reads at small sizes
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(iter_records(path, chunk_size)), RECORDS)
+
+    def test_json_lines_and_gzip(self):
+        lines = "\n".join(json.dumps(r) for r in RECORDS) + "\n"
+        for name in ("dump.jsonl", "dump.jsonl.gz"):
+            with self.subTest(name=name):
+                self.assertEqual(list(iter_records(self.write(name, lines), 16)), RECORDS)
+
+    def test_empty_array(self):
+        self.assertEqual(list(iter_records(self.write("empty.json", " [ ]\n"), 4)), [])
+
+    def test_truncated_record_raises(self):
+        path = self.write("cut.json", json.dumps(RECORDS)[:-20])
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_records(path, 32))
+
+
+class ProfilingTokenTests(SimpleTestCase):
+
+    def request(self, token=None):
+        return RequestFactory().get("/", headers={} if token is None else {"X-Profile": token})
+
+    def test_sent_token(self):
+        self.assertTrue(sent_token(self.request("secret"), "secret"))
+        self.assertFalse(sent_token(self.request("secreT"), "secret"))
+        self.assertFalse(sent_token(self.request(), "secret"))
+        self.assertFalse(sent_token(self.request(""), None))
+
+    @override_settings(PROFILING_ENABLED=False, PROFILING_HEADER_TOKEN="secret")
+    def test_middleware_profiles_only_the_token(self):
+        middleware = ProfilingMiddleware(lambda request: None)
+        self.assertTrue(middleware._wanted(self.request("secret")))
+        self.assertFalse(middleware._wanted(self.request("guess")))
+
+
+class FeedTestCase(TestCase):
+    """A user with posts and events, several sharing timestamps."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("author")
+        self.now = timezone.now().replace(microsecond=0)
+        self.times = [self.now + timedelta(hours=h) for h in (1, 2, 2, 2, 3, 5)]
+
+    def post(self, at, author=None):
+        post = Post.objects.create(title="t", content="c", author=author or self.user)
+        Post.objects.filter(pk=post.pk).update(date_posted=at)  # date_posted is auto_now_add
+        return post.pk
+
+    def event(self, at, author=None):
+        return Event.objects.create(title="e", description="d", location="l",
+                                    starts_at=at, created_by=author or self.user).pk
+
+
+class FeedPageTests(FeedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.keys = [(at, "post", self.post(at)) for at in self.times]
+        self.keys += [(at, "event", self.event(at)) for at in self.times[1:5]]
+        self.sources = [
+            FeedSource("post", Post.objects.all(), "date_posted"),
+            FeedSource("event", Event.objects.all(), "starts_at"),
+        ]
+
+    def walk(self, size, descending):
+        refs, cursor = [], None
+        while True:
+            page, cursor = feed_page(self.sources, cursor, size, descending)
+            self.assertLessEqual(len(page), size)
+            refs += page
+            if cursor is None:
+                return refs
+
+    def test_pages_merge_sources_in_key_order(self):
+        for descending in (True, False):
+            expected = [(kind, pk) for _, kind, pk in sorted(self.keys, reverse=descending)]
+            for size in (1, 3, 4, len(self.keys), len(self.keys) + 1):
+                with self.subTest(descending=descending, size=size):
+                    self.assertEqual(self.walk(size, descending), expected)
+
+    def test_no_duplicates_when_timestamps_tie(self):
+        refs = self.walk(2, True)
+        self.assertEqual(len(refs), len(set(refs)))
+
+    def test_cursor_round_trip(self):
+        key = (self.now, "event", 7)
+        self.assertEqual(decode_cursor(encode_cursor(key)), key)
+        for token in ("", "not-base64!", encode_cursor(key)[:-3]):
+            with self.subTest(token=token), self.assertRaises(ValueError):
+                decode_cursor(token)
+
+
+class HomeFeedTests(FeedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = caches[fanout.FEED_CACHE]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+        self.reader = User.objects.create_user("reader")
+
+    def follow(self):
+        self.reader.profile.following.add(self.user.profile)
+
+    def refs(self):
+        page = fanout.home_page(self.reader, None, 100)
+        return None if page is None else page[0]
+
+    def test_following_no_one_reads_the_global_feed(self):
+        self.post(self.now)
+        self.assertIsNone(self.refs())
+
+    def test_followed_posts_and_upcoming_events_only(self):
+        self.follow()
+        old, new = self.post(self.now - timedelta(days=1)), self.post(self.now)
+        upcoming = self.event(self.now + timedelta(days=1))
+        self.event(self.now - timedelta(hours=1))
+        self.post(self.now, author=User.objects.create_user("stranger"))
+
+        self.assertEqual(self.refs(), [("event", upcoming), ("post", new), ("post", old)])
+
+    def test_event_dropped_once_started(self):
+        self.follow()
+        soon = self.now + timedelta(minutes=5)
+        pk = self.event(soon)
+        self.assertEqual(self.refs(), [("event", pk)])
+        with mock.patch("apps.common.fanout.timezone.now", return_value=soon + timedelta(seconds=1)):
+            self.assertEqual(self.refs(), [])
+
+    def test_fan_out_updates_cached_feeds(self):
+        self.follow()
+        self.assertEqual(self.refs(), [])
+        pk = self.post(self.now)
+        fanout.fan_out("post", pk, self.now, self.user.pk, None)
+        with mock.patch("apps.common.fanout.build_feed", side_effect=AssertionError("rebuilt")):
+            self.assertEqual(self.refs(), [("post", pk)])
+
+    def test_hot_sources_are_merged_on_read(self):
+        self.follow()
+        self.assertEqual(self.refs(), [])
+        pk = self.post(self.now)
+        with mock.patch("apps.common.fanout.FANOUT_LIMIT", 0):
+            fanout.fan_out("post", pk, self.now, self.user.pk, None)
+        self.assertEqual(self.cache.get(fanout.FEED_KEY.format(self.reader.pk))["items"], [])
+        self.assertEqual(self.refs(), [("post", pk)])
+
+    def test_busy_lock_drops_feeds_instead(self):
+        self.follow()
+        self.refs()
+        self.cache.add(fanout.LOCK_KEY, "another worker", timeout=fanout.LOCK_TIMEOUT)
+        pk = self.post(self.now)
+        with mock.patch("apps.common.fanout.LOCK_WAIT", 0):
+            self.assertEqual(fanout._push((fanout._micros(self.now), "post", pk), [self.reader.pk]), 0)
+        self.assertIsNone(self.cache.get(fanout.FEED_KEY.format(self.reader.pk)))
+        self.assertEqual(self.refs(), [("post", pk)])
+
+    def test_stale_feed_is_rebuilt(self):
+        self.follow()
+        self.refs()
+        pk = self.post(self.now)        # Written without a push, as if it had been lost
+        self.assertEqual(self.refs(), [])
+        with mock.patch("apps.common.fanout.time.time", return_value=fanout.time.time() + fanout.FEED_TTL + 1):
+            self.assertEqual(self.refs(), [("post", pk)])
+
+
+
+class ForYouTests(FeedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = caches[fanout.FEED_CACHE]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+        self.reader = User.objects.create_user("reader")
+        self.reader.profile.following.add(self.user.profile)
+        self.pks = [self.post(self.now - timedelta(hours=h)) for h in range(7)]
+
+    def test_pages_walk_one_ranking(self):
+        refs, cursor = for_you.for_you_page(self.reader, None, 3)
+        while cursor:
+            page, cursor = for_you.for_you_page(self.reader, cursor, 3)
+            refs += page
+        self.assertCountEqual(refs, [("post", pk) for pk in self.pks])
+
+    def test_replaced_ranking_rejects_old_cursors(self):
+        first, cursor = for_you.for_you_page(self.reader, None, 3)
+        self.cache.delete(for_you.FOR_YOU_KEY.format(self.reader.pk))     # Expired, or evicted
+        with self.assertRaises(for_you.StaleCursor):
+            for_you.for_you_page(self.reader, cursor, 3)
+        self.assertEqual(for_you.for_you_page(self.reader, None, 3)[0], first)
+
+    def test_ranking_is_shared_not_per_process(self):
+        _, cursor = for_you.for_you_page(self.reader, None, 3)
+        caches["default"].clear()
+        with mock.patch("apps.common.for_you.rank_for_user", side_effect=AssertionError("reranked")):
+            self.assertEqual(len(for_you.for_you_page(self.reader, cursor, 3)[0]), 3)
+
+    def test_malformed_cursor(self):
+        for cursor in ("3", "x:1", "3:"):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                for_you.for_you_page(self.reader, cursor, 3)
+
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+})
+class FragmentTests(FeedTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for alias in ("default", fragments.VERSION_CACHE):
+            caches[alias].clear()
+            self.addCleanup(caches[alias].clear)
+        self.ref = ("post", self.post(self.now))
+
+    def render(self):
+        return fragments.render_items([self.ref])[0]
+
+    def test_bump_rerenders(self):
+        self.assertIn("c</p>", self.render())
+        Post.objects.filter(pk=self.ref[1]).update(content="edited")
+        fragments.bump_version(*self.ref)
+        self.assertIn("edited", self.render())
+
+    def test_evicted_version_is_not_reused(self):
+        fragments.bump_version(*self.ref)
+        self.render()
+        caches[fragments.VERSION_CACHE].delete(fragments.VERSION_KEY.format(*self.ref))
+        caches["default"].set(fragments.FRAGMENT_KEY.format(*self.ref, 0), "stale")
+        self.assertNotEqual(self.render(), "stale")
+        self.assertEqual(fragments._versions([self.ref]), fragments._versions([self.ref]))
@@ -5,6 +5,7 @@ URL configuration for the `common` app, handling:
 - Post feeds
 - Static info pages
 - API endpoint for course detail
+- Profiling metrics for Prometheus
 
 Author: Vikram Bhojanala
 Last updated: 2025-05-09
@@ -17,6 +18,7 @@ from .views import (
     about,
     account,
     CourseAutocomplete,
+    profiling_metrics,
 )
 
 # Modular Views
@@ -41,4 +43,7 @@ urlpatterns = [
 
     # ——— API ———
     path("api/digital_campus/<str:name>/", CourseDetailView.as_view(), name="api-course-detail"),
+
+    # ——— Monitoring ———
+    path("metrics/", profiling_metrics, name="profiling-metrics"),
 ]
@@ -4,6 +4,8 @@ apps/common/views.py
 Contains shared views for the Digital Campus project, including:
 - Static pages (About, Account)
 - Autocomplete for course selection
+- Request profiling metrics (Prometheus text format), for staff or
+  requests sending the X-Profile token
 
 Integrates home feed scoring (recency, relevance) via modular imports.
 
@@ -12,9 +14,10 @@ Last updated: 2025-05-09
 """
 
 from django.shortcuts import render
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
 from dal import autocomplete
 from .models import Course
+from .profiling import may_read_metrics, render_metrics
 
 
 # ————————————————————————————————————
@@ -49,3 +52,17 @@ class CourseAutocomplete(autocomplete.Select2QuerySetView):
             qs = qs.filter(name__icontains=self.q)
 
         return qs
+
+
+# ————————————————————————————————————
+# Monitoring
+# ————————————————————————————————————
+def profiling_metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Serve ProfilingMiddleware totals in the Prometheus text format.
+    Per-view SQL timings describe the site's internals, so only staff
+    and token-holding scrapers may read them.
+    """
+    if not may_read_metrics(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,16 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("events", "0006_eventtag_taggedeventtag_event_tags"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="event",
+            index=models.Index(fields=["starts_at", "id"], name="event_feed_idx"),
+        ),
+    ]
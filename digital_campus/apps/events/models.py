@@ -96,6 +96,10 @@ class Event(models.Model):
 
     class Meta:
         ordering = ["-is_featured", "starts_at"]
+        indexes = [
+            # Home feed keyset order (apps/common/feed.py)
+            models.Index(fields=["starts_at", "id"], name="event_feed_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.starts_at:%b %d, %Y})"
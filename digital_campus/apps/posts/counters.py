@@ -0,0 +1,77 @@
+"""
+apps/posts/counters.py
+
+Denormalized Post.like_count / Post.comment_count.
+
+The columns are moved with F() expressions (UPDATE ... SET n = n + 1),
+so concurrent likes never lose an increment, from the PostLike and
+Comment signals in signals.py; callers wrap the write in
+transaction.atomic() so row and counter commit together.
+
+Bulk writes (bulk_create, queryset.delete() of fast-deletable rows,
+raw SQL) bypass those signals. reconcile_counters() recomputes the
+columns from the source tables in pk batches and rewrites only the
+rows that drifted.
+
+Author: Vikram Bhojanala
+"""
+
+from typing import Callable, Optional
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Post, PostLike, Comment
+
+RECONCILE_BATCH = 5000      # Posts compared per query
+
+
+def adjust(post_id: int, field: str, delta: int) -> None:
+    """Atomically adds `delta` to one counter column of a post, never below 0."""
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(**{f"{field}__gte": -delta})    # Drifted low: leave it to reconcile
+    posts.update(**{field: F(field) + delta})
+
+
+def _actual(model) -> Coalesce:
+    """Correlated COUNT of `model` rows per post, 0 when there are none."""
+    rows = (
+        model.objects.filter(post_id=OuterRef("pk")).order_by()
+        .values("post_id").annotate(n=Count("pk")).values("n")
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def reconcile_counters(batch_size: int = RECONCILE_BATCH, first_pk: int = 0,
+                       log: Optional[Callable[[str], None]] = None) -> int:
+    """
+    Rewrites like_count / comment_count of every post (from `first_pk`
+    on) whose stored value differs from the real count; returns how many
+    posts were fixed.
+    """
+    fixed = scanned = 0
+    last = first_pk - 1
+    while True:
+        ids = list(
+            Post.objects.filter(pk__gt=last).order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        last = ids[-1]
+        scanned += len(ids)
+
+        drifted = (
+            Post.objects.filter(pk__gte=ids[0], pk__lte=last)
+            .annotate(actual_likes=_actual(PostLike), actual_comments=_actual(Comment))
+            .filter(~Q(like_count=F("actual_likes")) | ~Q(comment_count=F("actual_comments")))
+            .values_list("pk", "actual_likes", "actual_comments")
+        )
+        posts = [Post(pk=pk, like_count=likes, comment_count=comments) for pk, likes, comments in drifted]
+        if posts:
+            with transaction.atomic():
+                Post.objects.bulk_update(posts, ["like_count", "comment_count"])
+            fixed += len(posts)
+        if log:
+            log(f"{scanned:,} posts checked, {fixed:,} fixed")
+    return fixed
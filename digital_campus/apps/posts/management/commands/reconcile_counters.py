@@ -0,0 +1,28 @@
+# apps/posts/management/commands/reconcile_counters.py
+
+import time
+from django.core.management.base import BaseCommand
+
+from apps.posts.counters import RECONCILE_BATCH, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.like_count and Post.comment_count from the like and comment "
+        "tables in batches, rewriting only the posts whose counters drifted"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=RECONCILE_BATCH,
+            help="Posts compared per query",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        fixed = reconcile_counters(options["batch_size"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Reconciled post counters: {fixed:,} posts fixed in {time.perf_counter() - started:.1f}s."
+        ))
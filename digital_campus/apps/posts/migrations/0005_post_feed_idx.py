@@ -0,0 +1,16 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0004_posttag_taggedposttag_alter_post_tags"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(fields=["date_posted", "id"], name="post_feed_idx"),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-17 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counts(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+
+    def actual(model_name):
+        rows = (
+            apps.get_model("posts", model_name).objects.filter(post_id=OuterRef("pk")).order_by()
+            .values("post_id").annotate(n=Count("pk")).values("n")
+        )
+        return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+    Post.objects.update(like_count=actual("PostLike"), comment_count=actual("Comment"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("posts", "0005_post_feed_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -72,24 +72,28 @@ class Post(models.Model):
     author      = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     date_posted = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized, kept in step by apps/posts/signals.py; `reconcile_counters` repairs drift
+    like_count    = models.PositiveIntegerField(default=0, editable=False)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
     tags = TaggableManager(
         through=TaggedPostTag,
         blank=True,
         help_text='Hashtag-style labels for discovery and algorithmic grouping.'
     )
 
+    class Meta:
+        indexes = [
+            # Home feed keyset order (apps/common/feed.py)
+            models.Index(fields=["date_posted", "id"], name="post_feed_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
     def get_absolute_url(self):
         return reverse("posts:post-detail", kwargs={"pk": self.pk})
     
-    def like_count(self):
-        return self.likes.count()
-
-    def comment_count(self):
-        return self.comments.count()
-    
     @property
     def owner(self):
         if hasattr(self, "ownership"):
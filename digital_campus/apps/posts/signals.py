@@ -0,0 +1,36 @@
+"""
+apps/posts/signals.py
+
+Keeps Post.like_count and Post.comment_count in step with their rows
+(see counters.py). The UPDATE runs inside the transaction of the write
+that fired it.
+
+Author: Vikram Bhojanala
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Post, PostLike, Comment
+from .counters import adjust
+
+COUNTERS = {PostLike: "like_count", Comment: "comment_count"}
+
+
+def _deleting_post(origin) -> bool:
+    """True when the delete cascades from the post itself: its row goes too."""
+    return isinstance(origin, Post) or getattr(origin, "model", None) is Post
+
+
+@receiver(post_save, sender=PostLike)
+@receiver(post_save, sender=Comment)
+def counted_row_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:     # Fixture rows arrive with their post's counts
+        adjust(instance.post_id, COUNTERS[sender], 1)
+
+
+@receiver(post_delete, sender=PostLike)
+@receiver(post_delete, sender=Comment)
+def counted_row_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleting_post(origin):
+        adjust(instance.post_id, COUNTERS[sender], -1)
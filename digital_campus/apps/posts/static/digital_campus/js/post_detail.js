@@ -29,6 +29,8 @@ function toggleLike(postId) {
     .then(data => {
       const btn = document.getElementById(`like-btn-${postId}`);
       if (btn) btn.classList.toggle('active', data.liked);
+      const count = document.getElementById(`like-count-${postId}`);
+      if (count) count.textContent = data.like_count;
     })
     .catch(() => console.warn('Like request failed'));
 }
@@ -1,3 +1,61 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from .counters import adjust, reconcile_counters
+from .models import Comment, Post, PostLike
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user("author", password="pw")
+        self.fans = [User.objects.create_user(f"fan{i}").profile for i in range(3)]
+        self.post = Post.objects.create(title="t", content="c", author=self.author)
+
+    def counts(self, post=None):
+        post = post or self.post
+        post.refresh_from_db(fields=["like_count", "comment_count"])
+        return post.like_count, post.comment_count
+
+    def test_signals_keep_counts(self):
+        likes = [PostLike.objects.create(post=self.post, user=fan) for fan in self.fans]
+        comment = Comment.objects.create(post=self.post, user=self.fans[0], content="hi")
+        self.assertEqual(self.counts(), (3, 1))
+
+        likes[0].delete()
+        comment.delete()
+        self.assertEqual(self.counts(), (2, 0))
+
+    def test_adjust_never_goes_negative(self):
+        adjust(self.post.pk, "like_count", 2)
+        adjust(self.post.pk, "like_count", -3)
+        self.assertEqual(self.counts(), (2, 0))
+        adjust(self.post.pk, "like_count", -2)
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_reconcile_fixes_only_drifted_posts(self):
+        other = Post.objects.create(title="t2", content="c", author=self.author)
+        PostLike.objects.bulk_create([PostLike(post=self.post, user=fan) for fan in self.fans])   # No signals
+        Comment.objects.create(post=other, user=self.fans[0], content="hi")
+        Post.objects.filter(pk=other.pk).update(like_count=5)
+
+        self.assertEqual(reconcile_counters(batch_size=1), 2)
+        self.assertEqual(self.counts(), (3, 0))
+        self.assertEqual(self.counts(other), (0, 1))
+        self.assertEqual(reconcile_counters(), 0)
 
-# Create your tests here.
+    def test_edit_keeps_counts(self):
+        # The view loaded the post before this like; saving it must not write like_count back
+        stale = Post.objects.get(pk=self.post.pk)
+        PostLike.objects.create(post=self.post, user=self.fans[0])
+        self.client.force_login(self.author)
+        with mock.patch("apps.posts.views.PostUpdateView.get_object", return_value=stale):
+            response = self.client.post(
+                reverse("posts:post-update", args=[self.post.pk]), {"title": "edited", "content": "c"},
+            )
+        self.assertEqual(response.status_code, 302)
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.title, self.post.like_count), ("edited", 1))
@@ -5,6 +5,7 @@ from django.shortcuts import get_object_or_404, redirect
 from .models import Post, Attachment, PostLike, PostOwnership
 from .forms import PostWithFilesForm           
 from django.urls import reverse
+from django.db import transaction
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden, JsonResponse
 from .forms import CommentForm
@@ -62,10 +63,14 @@ class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     template_name = "posts/post_form.html"
 
     def form_valid(self, form):
-        response = super().form_valid(form)               # saves and sets self.object
+        # Write only the edited columns: a full save would put back the
+        # like/comment counts read with the form, undoing F() updates since
+        self.object = form.save(commit=False)
+        self.object.save(update_fields=form._meta.fields)
+        form.save_m2m()
         for f in self.request.FILES.getlist("files"):
             Attachment.objects.create(post=self.object, file=f)
-        return response
+        return redirect(self.get_success_url())
 
     def test_func(self):
         return self.get_object().author == self.request.user
@@ -100,13 +105,15 @@ def like_post(request, post_id):
     if request.method != 'POST':
         return JsonResponse({'detail': 'Method not allowed'}, status=405)
     post = get_object_or_404(Post, id=post_id)
-    like, created = PostLike.objects.get_or_create(post=post, user=request.user.profile)
-    if not created:
-        like.delete()
-        liked = False
-    else:
-        liked = True
-    return JsonResponse({'liked': liked, 'like_count': post.likes.count()})
+    with transaction.atomic():  # like row and post.like_count commit together
+        like, created = PostLike.objects.get_or_create(post=post, user=request.user.profile)
+        if not created:
+            like.delete()
+            liked = False
+        else:
+            liked = True
+    post.refresh_from_db(fields=['like_count'])
+    return JsonResponse({'liked': liked, 'like_count': post.like_count})
 
 
 ## Post Comment View
@@ -119,5 +126,6 @@ def add_comment(request, post_id):
             comment = form.save(commit=False)
             comment.user = request.user.profile
             comment.post = post
-            comment.save()
+            with transaction.atomic():  # comment row and post.comment_count commit together
+                comment.save()
     return redirect('posts:post-detail', pk=post.id)
\ No newline at end of file
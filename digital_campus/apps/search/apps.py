@@ -2,7 +2,13 @@
 apps/search/apps.py
 
 AppConfig for the `search` app.
-Initializes the global search engine singleton on app startup.
+Registers the signal handlers that keep the search engine and the
+autocomplete index up to date, and arranges for both to be warmed in a
+background thread once the server handles its first request (warmup.py).
+
+ready() does no database I/O and imports none of scikit-learn, NumPy or
+RapidFuzz, so migrate, shell and worker boot only pay for Django itself.
+Readiness is reported by the search/health/ endpoint.
 
 Author: Vikram Bhojanala
 Last updated: 2025-05-09
@@ -10,7 +16,7 @@ Last updated: 2025-05-09
 
 import sys
 from django.apps import AppConfig
-from django.db.utils import OperationalError, ProgrammingError
+from django.core.signals import request_started
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,13 +29,7 @@ class SearchConfig(AppConfig):
         if 'manage.py' in sys.argv and 'runserver' not in sys.argv:
             return
 
-        try:
-            from .engine import initialize_engine
-            from apps.posts.models import Post
-            from django.contrib.auth import get_user_model
+        from . import signals  # Noqa: registers index update handlers
+        from .warmup import start_warmup
 
-            initialize_engine(Post.objects.all(),
-                              get_user_model().objects.all())
-            logger.info("[SearchEngine] Index built successfully.")
-        except (OperationalError, ProgrammingError) as e:
-            logger.warning(f"[SearchEngine] Skipped init: {e}")
+        request_started.connect(start_warmup, dispatch_uid="search-warmup")
@@ -0,0 +1,297 @@
+"""
+apps/search/bench.py
+
+Search benchmark and relevance/latency regression harness.
+
+Builds the SearchEngine and SuggestIndex over synthetic corpora (no
+database), then measures index build time, resident memory added by the
+build and the index arrays' size, p50/p95/p99
+latency of search, spell correction and autocomplete, and NDCG@10 on a
+labelled query set derived from the corpus' topics. Results are plain
+JSON, so runs from different commits can be compared with compare().
+
+Corpus model: posts are drawn from TOPICS synthetic topics, each with
+its own vocabulary, mixed with shared filler words. A query is two words
+of one topic; a post of that topic is relevant (gain 1), and more so if
+a query word is in its title (gain 2).
+
+Run it with `manage.py bench_search`.
+
+Author: Vikram Bhojanala
+"""
+
+import gc
+import platform
+import random
+import string
+import subprocess
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import psutil
+
+from .engine import SearchEngine
+from .suggest import SuggestIndex, Suggestion, _tokens
+
+# ——— Corpus Shape ———
+TOPICS = 50
+TOPIC_WORDS = 20            # Vocabulary per topic
+FILLER_WORDS = 5000         # Vocabulary shared by all topics
+USERS_PER_POST = 0.1        # Users generated per post
+
+# ——— Measurement ———
+QUERIES = 200               # Timed calls per operation
+NDCG_AT = 10
+
+# ——— Regression Thresholds (compare) ———
+LATENCY_TOLERANCE = 0.20    # Allowed relative p95 slowdown
+NDCG_TOLERANCE = 0.02       # Allowed absolute NDCG drop
+
+
+# ————— Synthetic Corpus ————— #
+
+class _Tags:
+    """Stands in for a TaggableManager: .all() yields objects with .name."""
+
+    def __init__(self, names: Sequence[str]) -> None:
+        self._tags = [SimpleNamespace(name=n) for n in names]
+
+    def all(self) -> List[Any]:
+        return self._tags
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+
+class Corpus:
+    """
+    Synthetic posts and users shaped like the model instances the field
+    extractors read, plus the topic of every post (the relevance labels).
+    """
+
+    def __init__(self, posts: int, seed: int = 0) -> None:
+        rng = random.Random(seed)
+        self.rng = rng
+        self.topics = [[_word(rng) for _ in range(TOPIC_WORDS)] for _ in range(TOPICS)]
+        self.filler = [_word(rng) for _ in range(FILLER_WORDS)]
+
+        now = datetime.now(timezone.utc)
+        self.posts, self.post_topic = [], []
+        for pk in range(1, posts + 1):
+            topic = rng.randrange(TOPICS)
+            vocab = self.topics[topic]
+            title = rng.sample(vocab, rng.randint(2, 4)) + rng.sample(self.filler, 2)
+            content = [
+                rng.choice(vocab) if rng.random() < 0.3 else rng.choice(self.filler)
+                for _ in range(rng.randint(30, 80))
+            ]
+            self.posts.append(SimpleNamespace(
+                pk=pk,
+                title=" ".join(title),
+                content=" ".join(content),
+                tags=_Tags(rng.sample(vocab, 2)),
+                ownership=None,
+                date_posted=now - timedelta(minutes=pk),
+            ))
+            self.post_topic.append(topic)
+
+        self.users = [
+            SimpleNamespace(
+                pk=pk,
+                username=f"{rng.choice(self.filler)}{pk}",
+                first_name=rng.choice(self.filler).title(),
+                last_name=rng.choice(self.filler).title(),
+                profile=SimpleNamespace(bio=" ".join(rng.sample(self.filler, 8))),
+                date_joined=now - timedelta(hours=pk),
+            )
+            for pk in range(1, max(int(posts * USERS_PER_POST), 1) + 1)
+        ]
+
+    def sources(self) -> Dict[str, List[Any]]:
+        return {"post": self.posts, "user": self.users}
+
+    def suggestions(self) -> List[Suggestion]:
+        return [
+            Suggestion(type="Post", pk=p.pk, label=p.title, url="", tokens=_tokens(p.title))
+            for p in self.posts
+        ] + [
+            Suggestion(type="User", pk=u.pk, label=u.username, url="", tokens=_tokens(u.username))
+            for u in self.users
+        ]
+
+    # ————— Labelled Queries ————— #
+    def queries(self, n: int) -> List[Tuple[str, Dict[int, int]]]:
+        """
+        Returns n (query, {post pk: gain}) pairs.
+        """
+        by_topic: Dict[int, List[Any]] = {}
+        for post, topic in zip(self.posts, self.post_topic):
+            by_topic.setdefault(topic, []).append(post)
+
+        labelled = []
+        for _ in range(n):
+            topic = self.rng.randrange(TOPICS)
+            words = self.rng.sample(self.topics[topic], 2)
+            labels = {
+                post.pk: 2 if any(w in post.title.split() for w in words) else 1
+                for post in by_topic.get(topic, [])
+            }
+            labelled.append((" ".join(words), labels))
+        return labelled
+
+    def typo(self, word: str) -> str:
+        """One random deletion, substitution or transposition."""
+        i = self.rng.randrange(len(word) - 1)
+        edit = self.rng.choice(("delete", "substitute", "transpose"))
+        if edit == "delete":
+            return word[:i] + word[i + 1:]
+        if edit == "substitute":
+            return word[:i] + self.rng.choice(string.ascii_lowercase) + word[i + 1:]
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+# ————— Metrics ————— #
+
+def ndcg(ranked: Sequence[int], labels: Dict[int, int], k: int = NDCG_AT) -> float:
+    """NDCG@k of a ranked pk list against graded labels."""
+    gains = np.array([labels.get(pk, 0) for pk in ranked[:k]], dtype=np.float64)
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = float((gains * discounts[:len(gains)]).sum())
+    ideal = np.sort(np.fromiter(labels.values(), dtype=np.float64))[::-1][:k]
+    idcg = float((ideal * discounts[:len(ideal)]).sum())
+    return dcg / idcg if idcg else 0.0
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ms = np.array(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def _timed(fn: Any, args: Sequence[Any]) -> Tuple[List[float], List[Any]]:
+    samples, results = [], []
+    for arg in args:
+        started = time.perf_counter()
+        results.append(fn(arg))
+        samples.append(time.perf_counter() - started)
+    return samples, results
+
+
+def _index_bytes(se: SearchEngine) -> int:
+    m = se.doc_matrix
+    arrays = (m.data, m.indices, m.indptr, se.idf, se.term_max, se.doc_ids,
+              se.doc_types, se.doc_dates, se.doc_flags, se.alive)
+    return int(sum(a.nbytes for a in arrays))
+
+
+# ————— Runner ————— #
+
+def run_size(posts: int, queries: int = QUERIES, seed: int = 0) -> Dict[str, Any]:
+    """
+    Benchmarks one corpus size and returns its results.
+    """
+    corpus = Corpus(posts, seed)
+    labelled = corpus.queries(queries)
+    gc.collect()
+
+    process = psutil.Process()
+    rss_before = process.memory_info().rss
+    started = time.perf_counter()
+    se = SearchEngine()
+    se.build_index(corpus.sources())
+    build_seconds = time.perf_counter() - started
+    gc.collect()
+    rss_growth = process.memory_info().rss - rss_before
+
+    started = time.perf_counter()
+    suggest = SuggestIndex()
+    suggest.build(corpus.suggestions())
+    suggest_seconds = time.perf_counter() - started
+
+    # First stage only: stages loaded from disk would make runs incomparable
+    search = lambda q: se.search(q, top_k=NDCG_AT, rerank=False, semantic=False)
+    search_samples, hits = _timed(search, [q for q, _ in labelled])
+    scores = [
+        ndcg([doc.id for doc, _ in result if doc.type == "post"], labels)
+        for result, (_, labels) in zip(hits, labelled)
+    ]
+
+    misspelled = []
+    for query, _ in labelled:
+        words = query.split()
+        misspelled.append((" ".join([corpus.typo(words[0])] + words[1:]), query))
+    spell_samples, corrections = _timed(se.correct_query, [typo for typo, _ in misspelled])
+    spell_accuracy = np.mean([c == q for c, (_, q) in zip(corrections, misspelled)])
+
+    prefixes = [q.split()[0][:corpus.rng.randint(2, 5)] for q, _ in labelled]
+    suggest_samples, _ = _timed(suggest.match, prefixes)
+
+    return {
+        "posts":             posts,
+        "users":             len(corpus.users),
+        "terms":             int(se.doc_matrix.shape[1]),
+        "build_seconds":     round(build_seconds, 3),
+        "build_rss_mb":      round(rss_growth / 2**20, 1),
+        "index_mb":          round(_index_bytes(se) / 2**20, 1),
+        "suggest_build_seconds": round(suggest_seconds, 3),
+        "search":            _percentiles(search_samples),
+        "spell":             {**_percentiles(spell_samples), "accuracy": round(float(spell_accuracy), 4)},
+        "autocomplete":      _percentiles(suggest_samples),
+        f"ndcg@{NDCG_AT}":   round(float(np.mean(scores)), 4),
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: Sequence[int], queries: int = QUERIES, seed: int = 0) -> Dict[str, Any]:
+    """
+    Benchmarks every corpus size; the result is JSON-serializable.
+    """
+    return {
+        "commit":     _commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python":     platform.python_version(),
+        "machine":    platform.machine(),
+        "seed":       seed,
+        "queries":    queries,
+        "results":    [run_size(n, queries, seed) for n in sizes],
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """
+    Returns the regressions of `current` against `baseline`, one line
+    each, for corpus sizes present in both: p95 latencies more than
+    LATENCY_TOLERANCE slower, or NDCG more than NDCG_TOLERANCE lower.
+    """
+    regressions = []
+    before = {r["posts"]: r for r in baseline.get("results", [])}
+    for now in current.get("results", []):
+        old = before.get(now["posts"])
+        if old is None:
+            continue
+
+        for op in ("search", "spell", "autocomplete"):
+            was, is_ = old[op]["p95_ms"], now[op]["p95_ms"]
+            if was and is_ > was * (1 + LATENCY_TOLERANCE):
+                regressions.append(f"{now['posts']} posts: {op} p95 {was}ms -> {is_}ms")
+
+        key = f"ndcg@{NDCG_AT}"
+        if now[key] < old[key] - NDCG_TOLERANCE:
+            regressions.append(f"{now['posts']} posts: {key} {old[key]} -> {now[key]}")
+
+    return regressions
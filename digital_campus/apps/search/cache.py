@@ -0,0 +1,144 @@
+"""
+apps/search/cache.py
+
+Query result cache for /search and /autocomplete.
+
+Entries hold ranked id lists (never model instances) in a per-process
+LRU with a TTL. Each entry remembers the generation of every document
+type it was computed from; save/delete signals bump those generations,
+so any write to a type invalidates the cached results that contain it.
+
+Generation counters live in the "shared" cache (Redis when REDIS_URL is
+set), so a write in one worker invalidates entries in all of them. A
+counter that is missing (never written, or evicted) is seeded from the
+clock rather than 0 or 1, so it can never come back at a value that old
+entries were computed at.
+
+Author: Vikram Bhojanala
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, Optional, Tuple
+from django.core.cache import caches
+
+# ——— Cache Limits ———
+QUERY_CACHE_SIZE = 1024     # Entries kept per process
+QUERY_CACHE_TTL = 300       # Seconds before an entry is recomputed regardless
+
+GENERATION_CACHE = "shared"
+GENERATION_KEY = "search:generation:{}"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases and collapses whitespace, so equivalent queries share an entry."""
+    return " ".join(query.lower().split())
+
+
+# ————— Generations ————— #
+
+def generations(doc_types: Iterable[str]) -> Tuple[int, ...]:
+    """
+    Returns the current generation of each document type, in order.
+    """
+    shared = caches[GENERATION_CACHE]
+    keys = [GENERATION_KEY.format(t) for t in doc_types]
+    found = shared.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        seed = time.time_ns()
+        for key in missing:
+            shared.add(key, seed, timeout=None)     # Another worker may seed first
+        found.update(shared.get_many(missing))
+    return tuple(found.get(key, 0) for key in keys)
+
+
+def bump_generation(doc_type: str) -> None:
+    """
+    Invalidates every cached result computed from `doc_type`.
+    """
+    shared = caches[GENERATION_CACHE]
+    key = GENERATION_KEY.format(doc_type)
+    try:
+        shared.incr(key)
+    except ValueError:  # Missing: seed it, then count this write
+        shared.add(key, time.time_ns(), timeout=None)
+        shared.incr(key)
+
+
+# ————— Cache ————— #
+
+class QueryCache:
+    """
+    Thread-safe LRU of computed results with TTL and generation checks.
+    """
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[int, ...], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, current: Tuple[int, ...]) -> Optional[Any]:
+        """
+        Returns the cached value if it is fresh and was computed at the
+        `current` generations, else None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires, gens, value = entry
+            if expires < time.monotonic() or gens != current:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, current: Tuple[int, ...], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, current, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def lookup(self, key: Hashable, doc_types: Iterable[str],
+               compute: Callable[[], Any]) -> Tuple[Any, Tuple[int, ...]]:
+        """
+        Returns (value, generations it was computed at) for `key`,
+        computing and storing the value on a miss.
+
+        Generations are read before computing, so a write landing mid-compute
+        leaves the new entry already stale rather than hiding the write.
+        """
+        current = generations(doc_types)
+        value = self.get(key, current)
+        if value is None:
+            value = compute()
+            self.set(key, current, value)
+        return value, current
+
+    def get_or_compute(self, key: Hashable, doc_types: Iterable[str],
+                       compute: Callable[[], Any]) -> Any:
+        """Returns the cached value for `key`, computing and storing it on a miss."""
+        return self.lookup(key, doc_types, compute)[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# ————— Singleton ————— #
+
+query_cache = QueryCache()
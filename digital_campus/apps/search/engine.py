@@ -1,164 +1,1223 @@
 """
-engine.py — Pluggable TF-IDF Search Engine for Digital Campus
+engine.py — Pluggable BM25F Search Engine for Digital Campus
 ─────────────────────────────────────────────────────────────────────
 
-Implements a lightweight vector-based search engine over posts and users using:
-- TF-IDF vectorization
-- Cosine similarity
-- Optional fuzzy spell-correction via RapidFuzz
+Implements a lightweight ranked search engine over posts, users, clubs and events using:
+- Field-weighted BM25F term weights (title, content, tags, location, club, bio)
+- Dot-product scoring via an inverted index (column-major postings)
+- Top-k selection with argpartition and MaxScore-style early termination
+- Type, date-range and featured filters as masks over per-row attribute arrays
+- Spell correction via a SymSpell deletion index over the vocabulary (spelling.py)
+- Incremental updates (append / replace / tombstone) with background compaction
+- Background rebuilds in one process (build command or sidecar), written
+  as index versions that workers reload and swap in atomically
+- On-disk persistence, memory-mapped at load so workers share one page-cached copy
+- Optional sidecar mode: one process owns the index, workers query it (service.py)
+
+The index holds no ORM objects: each row maps to a (type, pk) pair kept in
+compact NumPy arrays, and hits are hydrated with one in_bulk() per type.
 
 Designed for easy extension:
-- Hooks for re-ranking (ML, embeddings, etc.)
-- Singleton-compatible for AppConfig initialization
+- Pluggable second-stage re-ranking over offline features (rerank.py)
+- Optional dense-embedding retrieval fused by reciprocal rank (semantic.py)
+- Singleton warmed in the background after startup (warmup.py)
 
-Author: Vikram Bhojanala  
+Author: Vikram Bhojanala
 Last updated: 2025-05-09
 """
 
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict, Any
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from rapidfuzz import process
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Tuple, Optional, Dict, Any, Iterable
+from django.apps import apps
+from django.conf import settings
+from sklearn.feature_extraction.text import CountVectorizer
+import scipy.sparse as sp
 import numpy as np
+import threading
+import logging
+import json
+import time
+import os
 import re
 
+from .spelling import SpellIndex
+from .warmup import mark_ready
+from .rerank import rerank_stage, load_rerank_stage
+from .semantic import semantic_index, load_semantic_index, rrf
+
+logger = logging.getLogger(__name__)
+
+# ——— Index Maintenance ———
+COMPACT_TOMBSTONE_RATIO = 0.2   # Compact once 20% of rows are dead
+DELTA_MERGE_ROWS = 2048         # Fold the write buffer into the postings past this size
+ROW_ARRAYS = ("doc_ids", "doc_types", "doc_dates", "doc_flags", "alive")  # Per-row attribute arrays
+
+# ——— Background Rebuilds ———
+REBUILD_MIN_RATIO = 0.5         # Reject a rebuild holding under half the live documents
+RELOAD_JOURNAL_SIZE = 50_000    # Recent writes kept for replay onto a reloaded version
+RELOAD_REPLAY_MARGIN = 5.0      # Seconds before a version's build start also replayed (clock skew)
+
+# ——— BM25F Ranking ———
+BM25_K1 = 1.2                   # Term-frequency saturation
+FIELD_WEIGHTS = {               # Boost applied to a term occurrence in each field
+    "title":    3.0,
+    "tags":     2.0,
+    "club":     1.5,
+    "location": 1.0,
+    "content":  1.0,
+    "bio":      1.0,
+}
+FIELD_B = {                     # Length normalization per field (0 = none, 1 = full)
+    "title":    0.3,
+    "tags":     0.3,
+    "club":     0.0,
+    "location": 0.3,
+    "content":  0.75,
+    "bio":      0.75,
+}
+FIELDS = tuple(FIELD_WEIGHTS)
+
+# ——— Persistence ———
+INDEX_FORMAT_VERSION = 4        # Bump whenever the on-disk layout changes
+DOC_TYPES = ("post", "user", "club", "event")  # Type code (doc_types value) = position in this tuple
+CURRENT_POINTER = "CURRENT"     # File naming the active index version
+
+# ——— Filtering ———
+FLAG_FEATURED = 1               # doc_flags bit: club or event marked is_featured
+DATE_FIELDS = {                 # Date each document type is filtered on (doc_dates)
+    "post":  "date_posted",
+    "user":  "date_joined",
+    "club":  "created_at",
+    "event": "starts_at",
+}
+
+# ——— Hydration ———
+DOC_MODELS = {
+    "post":  "posts.Post",
+    "user":  settings.AUTH_USER_MODEL,
+    "club":  "clubs.Club",
+    "event": "events.Event",
+}
+
 
 @dataclass
 class Document:
     """
-    Represents a searchable unit (user or post) with metadata.
+    A search hit: the indexed (type, pk) pair, plus the model
+    instance once hydrate() has fetched it.
     """
     id: int
-    text: str
-    meta: Dict[str, Any]  # e.g. {"type": "post", "obj": post}
+    type: str
+    obj: Any = None
+
+
+# ————— Field Extraction ————— #
+
+def _names(manager: Any) -> str:
+    # .all() rather than .names() so prefetched tags are reused
+    return " ".join(tag.name for tag in manager.all())
+
+
+def post_fields(post: Any) -> Dict[str, str]:
+    """Returns the indexed fields of a Post."""
+    ownership = getattr(post, "ownership", None)
+    club = ownership.club if ownership is not None else None
+    return {
+        "title":   post.title,
+        "content": post.content,
+        "tags":    _names(post.tags),
+        "club":    club.name if club is not None else "",
+    }
+
+
+def user_fields(user: Any) -> Dict[str, str]:
+    """Returns the indexed fields of a User."""
+    profile = getattr(user, "profile", None)
+    return {
+        "title": f"{user.username} {user.first_name} {user.last_name}",
+        "bio":   profile.bio if profile is not None else "",
+    }
+
+
+def club_fields(club: Any) -> Dict[str, str]:
+    """Returns the indexed fields of a Club."""
+    return {
+        "title":   club.name,
+        "content": club.description,
+    }
+
+
+def event_fields(event: Any) -> Dict[str, str]:
+    """Returns the indexed fields of an Event."""
+    return {
+        "title":    event.title,
+        "content":  event.description,
+        "location": event.location,
+        "tags":     f"{_names(event.tags)} {_names(event.requirements)}",
+        "club":     event.club.name if event.club_id else "",
+    }
+
+
+FIELD_EXTRACTORS = {
+    "post":  post_fields,
+    "user":  user_fields,
+    "club":  club_fields,
+    "event": event_fields,
+}
+
+
+def document_fields(doc_type: str, obj: Any) -> Dict[str, str]:
+    """Returns the indexed fields of any indexed model instance."""
+    return FIELD_EXTRACTORS[doc_type](obj)
+
+
+def document_attrs(doc_type: str, obj: Any) -> Tuple[int, int]:
+    """
+    Returns the filterable attributes of an indexed model instance:
+    (date as Unix seconds, flag bits).
+    """
+    date = getattr(obj, DATE_FIELDS[doc_type], None)
+    flags = FLAG_FEATURED if getattr(obj, "is_featured", False) else 0
+    return (int(date.timestamp()) if date is not None else 0, flags)
+
+
+def corpus_querysets() -> Dict[str, Any]:
+    """
+    Returns one queryset per document type, with the relations
+    read by the field extractors fetched up front.
+    """
+    model = lambda doc_type: apps.get_model(DOC_MODELS[doc_type])
+    return {
+        "post":  model("post").objects.select_related("ownership__club").prefetch_related("tags"),
+        "user":  model("user").objects.select_related("profile"),
+        "club":  model("club").objects.all(),
+        "event": model("event").objects.select_related("club").prefetch_related("tags", "requirements"),
+    }
+
+
+def _column_max(matrix: Any) -> np.ndarray:
+    """
+    Largest weight per column of a CSC matrix (0 for empty columns).
+    """
+    out = np.zeros(matrix.shape[1], dtype=np.float64)
+    nonempty = np.flatnonzero(np.diff(matrix.indptr))
+    if len(nonempty):
+        out[nonempty] = np.maximum.reduceat(matrix.data, matrix.indptr[nonempty])
+    return out
+
+
+def _postings(matrix: Any, term: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns (rows, weights) of a term's posting list; rows are sorted.
+    """
+    start, end = matrix.indptr[term], matrix.indptr[term + 1]
+    return matrix.indices[start:end], matrix.data[start:end]
 
 
 class SearchEngine:
     """
-    Core search engine using TF-IDF and cosine similarity.
-    Supports indexing, searching, and spell correction.
+    Core search engine ranking documents with field-weighted BM25F.
+    Supports indexing, incremental updates, searching, and spell correction.
+
+    Each (document, term) cell of `doc_matrix` holds the term's saturated
+    BM25F weight: per-field counts are length-normalized against that
+    field's average length, boosted by FIELD_WEIGHTS, summed and passed
+    through the k1 saturation once. A query's score is then the dot product
+    with its terms' IDFs, so retrieval stays a walk over posting lists.
+
+    `doc_matrix` is stored column-major (CSC), so each column slice is a
+    term's posting list and a query only touches the postings of its own
+    terms. Each row also carries its type, date and flag bits in parallel
+    arrays, so filters are boolean masks combined with `alive` and never
+    reach the database. Rows are never rewritten in place: an update appends a row to a
+    small write buffer and tombstones the old one in `alive`; the buffer is
+    folded into the postings by compaction. Vocabulary, IDF and average
+    field lengths stay fixed between full builds, so writes never trigger
+    a refit.
+
+    The per-row arrays are views over buffers grown by doubling, so an
+    append is amortized O(1). Compaction builds the new arrays without
+    the lock and only swaps references under it; tombstones and appends
+    landing meanwhile are carried over.
     """
 
     def __init__(self) -> None:
-        self.vectorizer = TfidfVectorizer(stop_words="english")
-        self.doc_matrix = None
-        self.documents: List[Document] = []
+        self.vectorizer = CountVectorizer(stop_words="english", dtype=np.float64)
+        self.doc_matrix = None                         # CSC: docs x terms
+        self.idf = np.zeros(0)                         # per-term BM25 IDF
+        self.field_avglen: Dict[str, float] = {}       # field -> average length (in terms)
+        self.term_max = np.zeros(0)                    # per-term max weight (MaxScore bounds)
+        self.doc_ids = np.zeros(0, dtype=np.int64)     # row -> pk
+        self.doc_types = np.zeros(0, dtype=np.int8)    # row -> index into DOC_TYPES
+        self.doc_dates = np.zeros(0, dtype=np.int64)   # row -> DATE_FIELDS value (Unix seconds)
+        self.doc_flags = np.zeros(0, dtype=np.uint8)   # row -> FLAG_* bits
+        self.alive = np.zeros(0, dtype=bool)           # False = tombstoned row
+        self._pending: List[Any] = []                  # rows not yet in doc_matrix
+        self._pending_csc = None                       # cached CSC of _pending
+        self._spelling = SpellIndex()                  # rebuilt with the index, off the lock
+        self.built_at: Optional[datetime] = None       # when the corpus was read
+        self._buffers: Dict[str, np.ndarray] = {}      # ROW_ARRAYS name -> backing buffer
+        self._capacity = 0                             # rows the buffers hold; 0 = none yet
+        self._dead = 0
+        self._dead_log: Optional[List[np.ndarray]] = None  # rows tombstoned while compacting
+        self._compacting = False
+        self._lock = threading.RLock()
 
     # ————— Indexing ————— #
-    def build_index(self, all_posts: List[Any], all_users: List[Any]) -> None:
+    def build_index(self, sources: Dict[str, Iterable[Any]]) -> None:
         """
-        Builds the TF-IDF index from all posts and users.
+        Builds the BM25F index from {doc_type: objects}, e.g. corpus_querysets().
         """
-        self.documents = []
+        started_at = datetime.now(timezone.utc)   # Writes after this may be missing
+        columns: Dict[str, List[str]] = {name: [] for name in FIELDS}
+        ids, types, dates, flags = [], [], [], []
+
+        for doc_type, objs in sources.items():
+            code = DOC_TYPES.index(doc_type)
+            for obj in objs:
+                fields = document_fields(doc_type, obj)
+                for name in FIELDS:
+                    columns[name].append(fields.get(name, ""))
+                date, bits = document_attrs(doc_type, obj)
+                ids.append(obj.pk)
+                types.append(code)
+                dates.append(date)
+                flags.append(bits)
 
-        for post in all_posts:
-            text = f"{post.title} {post.content}"
-            self.documents.append(Document(
-                id=post.pk,
-                text=text,
-                meta={"type": "post", "obj": post}
-            ))
+        self.vectorizer.fit(" ".join(parts) for parts in zip(*columns.values()))
+        counts = self._field_counts(columns)
+        avglen = {}
+        for name, matrix in counts.items():
+            lengths = np.asarray(matrix.sum(axis=1)).ravel()
+            avglen[name] = float(lengths[lengths > 0].mean()) if lengths.any() else 0.0
 
-        for user in all_users:
-            text = f"{user.username} {user.first_name} {user.last_name}"
-            self.documents.append(Document(
-                id=user.pk,
-                text=text,
-                meta={"type": "user", "obj": user}
-            ))
+        matrix = self._bm25f(counts, avglen).tocsc()
+        df = np.diff(matrix.indptr)
+        n = matrix.shape[0]
+        spelling = self._spell_index(matrix, self.vectorizer.get_feature_names_out())
 
-        corpus = [doc.text for doc in self.documents]
-        self.doc_matrix = self.vectorizer.fit_transform(corpus)
+        with self._lock:
+            self.doc_matrix = matrix
+            self.idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            self.field_avglen = avglen
+            self.term_max = _column_max(matrix)
+            self.doc_ids = np.array(ids, dtype=np.int64)
+            self.doc_types = np.array(types, dtype=np.int8)
+            self.doc_dates = np.array(dates, dtype=np.int64)
+            self.doc_flags = np.array(flags, dtype=np.uint8)
+            self.alive = np.ones(len(ids), dtype=bool)
+            self._buffers, self._capacity = {}, 0
+            self._pending = []
+            self._pending_csc = None
+            self._spelling = spelling
+            self._dead = 0
+            self.built_at = started_at
+
+    def _field_counts(self, columns: Dict[str, List[str]]) -> Dict[str, Any]:
+        """
+        Term counts per field (one CSR matrix per field, one row per document).
+        """
+        return {name: self.vectorizer.transform(columns[name]) for name in FIELDS}
+
+    @staticmethod
+    def _bm25f(counts: Dict[str, Any], avglen: Dict[str, float]) -> Any:
+        """
+        Combines per-field term counts into saturated BM25F weights (CSR):
+        tf~ = sum_f w_f * tf_f / (1 - b_f + b_f * len_f / avglen_f),
+        weight = tf~ * (k1 + 1) / (tf~ + k1).
+        """
+        pseudo = None
+        for name, matrix in counts.items():
+            if not avglen.get(name):
+                continue  # Field empty across the corpus
+            b = FIELD_B[name]
+            lengths = np.asarray(matrix.sum(axis=1)).ravel()
+            norm = FIELD_WEIGHTS[name] / (1.0 - b + b * lengths / avglen[name])
+            part = sp.diags(norm) @ matrix
+            pseudo = part if pseudo is None else pseudo + part
+
+        if pseudo is None:
+            first = next(iter(counts.values()))
+            return sp.csr_matrix(first.shape, dtype=np.float64)
+
+        pseudo = sp.csr_matrix(pseudo)
+        pseudo.data = pseudo.data * (BM25_K1 + 1) / (pseudo.data + BM25_K1)
+        return pseudo
+
+    # ————— Incremental Updates ————— #
+    def upsert(self, doc_type: str, pk: int, fields: Dict[str, str],
+               attrs: Tuple[int, int] = (0, 0)) -> None:
+        """
+        Appends a document, tombstoning its previous version if indexed.
+        `attrs` is the (date, flags) pair from document_attrs().
+        Terms outside the fitted vocabulary are ignored until the next build.
+        """
+        if self.doc_matrix is None:
+            return  # Not yet indexed
+
+        columns = {name: [fields.get(name, "")] for name in FIELDS}
+        row = self._bm25f(self._field_counts(columns), self.field_avglen)
+        code = DOC_TYPES.index(doc_type)
+
+        # New words become correctable right away, even outside the vocabulary
+        analyze = self.vectorizer.build_analyzer()
+        for token in set(analyze(" ".join(fields.values()))):
+            self._spelling.add(token)
+
+        with self._lock:
+            self._tombstone(code, pk)
+            self._pending.append(row)
+            self._pending_csc = None
+            self._append_row((pk, code, attrs[0], attrs[1], True))
+
+        self.maybe_compact()
+
+    def _append_row(self, values: Tuple[Any, ...]) -> None:
+        """
+        Appends one row to ROW_ARRAYS, doubling the buffers when full.
+        Caller must hold the lock.
+        """
+        n = len(self.alive)
+        if n >= self._capacity:
+            # Also the first append after a build, load or compaction: the
+            # arrays may be memory-mapped, or sized exactly
+            capacity = max(2 * n, 64)
+            for name in ROW_ARRAYS:
+                current = getattr(self, name)
+                buffer = np.empty(capacity, dtype=current.dtype)
+                buffer[:n] = current
+                self._buffers[name] = buffer
+            self._capacity = capacity
+        for name, value in zip(ROW_ARRAYS, values):
+            buffer = self._buffers[name]
+            buffer[n] = value
+            setattr(self, name, buffer[:n + 1])
+
+    def remove(self, doc_type: str, pk: int) -> None:
+        """
+        Tombstones the document; its row is dropped at the next compaction.
+        """
+        with self._lock:
+            self._tombstone(DOC_TYPES.index(doc_type), pk)
+        self.maybe_compact()
+
+    def _tombstone(self, code: int, pk: int) -> None:
+        # Vectorized scan instead of a (type, pk) -> row dict, which would
+        # cost ~100 bytes per document for the life of the process.
+        rows = np.flatnonzero((self.doc_ids == pk) & (self.doc_types == code) & self.alive)
+        if len(rows):
+            self.alive[rows] = False
+            self._dead += len(rows)
+            if self._dead_log is not None:
+                self._dead_log.append(rows)
+
+    def _pending_matrix(self) -> Any:
+        """
+        Returns the write buffer as a CSC matrix, or None. Caller must hold the lock.
+        """
+        if self._pending and self._pending_csc is None:
+            self._pending_csc = sp.vstack(self._pending, format="csc")
+        return self._pending_csc if self._pending else None
+
+    def _snapshot(self) -> Tuple[Any, List[Any], Dict[str, np.ndarray]]:
+        """
+        Returns (doc_matrix, write buffer rows, ROW_ARRAYS views) as of now,
+        in O(write buffer). Caller must hold the lock.
+        """
+        return self.doc_matrix, list(self._pending), {name: getattr(self, name) for name in ROW_ARRAYS}
+
+    @staticmethod
+    def _live_rows(matrix: Any, pending: List[Any], alive: np.ndarray) -> Tuple[Any, np.ndarray]:
+        """
+        Returns (CSR of the live rows of a snapshot, including its write
+        buffer, and their row numbers). O(N): call without the lock.
+        """
+        keep = np.flatnonzero(alive)
+        merged = sp.vstack([matrix, *pending], format="csr")
+        return merged[keep], keep
+
+    @property
+    def live_count(self) -> int:
+        return len(self.alive) - self._dead
+
+    @property
+    def tombstone_ratio(self) -> float:
+        return self._dead / len(self.alive) if len(self.alive) else 0.0
+
+    def compact(self) -> None:
+        """
+        Drops tombstoned rows, folds the write buffer into the postings
+        and renumbers the live documents.
+
+        The O(N) work runs on a snapshot without the lock, so searches
+        and writes continue meanwhile. Under the lock, only the rows
+        written since the snapshot are carried over: appends are copied
+        into the spare capacity of the new arrays and tombstones are
+        mapped to their new row numbers.
+        """
+        with self._lock:
+            matrix, pending, arrays = self._snapshot()
+            self._dead_log = []
+
+        try:
+            n = len(arrays["alive"])
+            live, keep = self._live_rows(matrix, pending, arrays["alive"])
+            compacted = live.tocsc()
+            term_max = _column_max(compacted)
+            capacity = len(keep) + DELTA_MERGE_ROWS     # Room for appends made meanwhile
+            buffers = {}
+            for name in ROW_ARRAYS:
+                buffer = np.empty(capacity, dtype=arrays[name].dtype)
+                buffer[:len(keep)] = True if name == "alive" else arrays[name][keep]
+                buffers[name] = buffer
+
+            with self._lock:
+                # Rows appended since the snapshot stay in the write buffer
+                extra = len(self.alive) - n
+                if len(keep) + extra > capacity:   # Write burst past the spare room: rare
+                    capacity = 2 * (len(keep) + extra)
+                    for name in ROW_ARRAYS:
+                        grown = np.empty(capacity, dtype=buffers[name].dtype)
+                        grown[:len(keep)] = buffers[name][:len(keep)]
+                        buffers[name] = grown
+                for name in ROW_ARRAYS:
+                    buffers[name][len(keep):len(keep) + extra] = getattr(self, name)[n:]
+
+                # Tombstones since the snapshot, on rows the compaction kept
+                dead = 0
+                if self._dead_log:
+                    rows = np.unique(np.concatenate(self._dead_log))
+                    rows = rows[rows < n]
+                    pos = np.searchsorted(keep, rows)
+                    hit = pos < len(keep)
+                    hit[hit] = keep[pos[hit]] == rows[hit]
+                    buffers["alive"][pos[hit]] = False
+                    dead = int(np.count_nonzero(hit))
+                dead += int(extra - np.count_nonzero(buffers["alive"][len(keep):len(keep) + extra]))
+
+                self.doc_matrix = compacted
+                self.term_max = term_max
+                for name in ROW_ARRAYS:
+                    setattr(self, name, buffers[name][:len(keep) + extra])
+                self._buffers, self._capacity = buffers, capacity
+                self._pending = self._pending[len(pending):]
+                self._pending_csc = None
+                self._dead = dead
+        finally:
+            with self._lock:
+                self._dead_log = None
+
+        logger.info("[SearchEngine] Compacted index to %d documents.", len(keep))
+
+    def maybe_compact(self, threshold: float = COMPACT_TOMBSTONE_RATIO) -> None:
+        """
+        Starts a background compaction once enough rows are tombstoned
+        or the write buffer has grown past DELTA_MERGE_ROWS.
+        """
+        with self._lock:
+            if self._compacting:
+                return
+            if self.tombstone_ratio < threshold and len(self._pending) < DELTA_MERGE_ROWS:
+                return
+            self._compacting = True
+
+        threading.Thread(
+            target=self._compact_in_background,
+            name="search-compaction",
+            daemon=True,
+        ).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception:
+            logger.exception("[SearchEngine] Compaction failed.")
+        finally:
+            self._compacting = False
+
+    # ————— Persistence ————— #
+    def save(self, directory: Path) -> None:
+        """
+        Writes the index to `directory` (which must not exist yet):
+        vocabulary, IDF, average field lengths, the CSC doc_matrix arrays (postings), per-term
+        maxima and the doc-id/type/date/flag table. Tombstoned rows are dropped.
+        """
+        with self._lock:
+            matrix, pending, arrays = self._snapshot()
+
+        live, keep = self._live_rows(matrix, pending, arrays["alive"])
+        doc_ids = arrays["doc_ids"][keep]
+        doc_types = arrays["doc_types"][keep]
+        doc_dates = arrays["doc_dates"][keep]
+        doc_flags = arrays["doc_flags"][keep]
+
+        matrix = live.tocsc()
+        matrix.sort_indices()
+        directory.mkdir(parents=True)
+
+        np.save(directory / "data.npy", matrix.data)
+        np.save(directory / "indices.npy", matrix.indices)
+        np.save(directory / "indptr.npy", matrix.indptr)
+        np.save(directory / "term_max.npy", _column_max(matrix))
+        np.save(directory / "idf.npy", self.idf)
+        np.save(directory / "doc_ids.npy", doc_ids)
+        np.save(directory / "doc_types.npy", doc_types)
+        np.save(directory / "doc_dates.npy", doc_dates)
+        np.save(directory / "doc_flags.npy", doc_flags)
+
+        terms = self.vectorizer.get_feature_names_out().tolist()
+        (directory / "vocabulary.json").write_text(json.dumps(terms), encoding="utf-8")
+        (directory / "manifest.json").write_text(json.dumps({
+            "format_version": INDEX_FORMAT_VERSION,
+            "layout":         "csc",
+            "ranking":        "bm25f",
+            "field_avglen":   self.field_avglen,
+            "created_at":     (self.built_at or datetime.now(timezone.utc)).isoformat(),
+            "documents":      int(matrix.shape[0]),
+            "terms":          int(matrix.shape[1]),
+            "nnz":            int(matrix.nnz),
+        }), encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory: Path, mmap: bool = True) -> "SearchEngine":
+        """
+        Loads an index written by save(). With mmap=True the matrix arrays
+        are memory-mapped read-only, so every process on the host shares
+        the same page-cached copy; incremental updates copy on merge.
+        """
+        manifest = json.loads((directory / "manifest.json").read_text(encoding="utf-8"))
+        if manifest.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported search index format {manifest.get('format_version')!r} "
+                f"in {directory} (expected {INDEX_FORMAT_VERSION})."
+            )
+
+        mmap_mode = "r" if mmap else None
+        terms = json.loads((directory / "vocabulary.json").read_text(encoding="utf-8"))
+
+        se = cls()
+        se.vectorizer = CountVectorizer(
+            stop_words="english",
+            dtype=np.float64,
+            vocabulary={term: i for i, term in enumerate(terms)},
+        )
+        se.idf = np.load(directory / "idf.npy")
+        se.field_avglen = manifest["field_avglen"]
+
+        se.doc_matrix = sp.csc_matrix(
+            (
+                np.load(directory / "data.npy", mmap_mode=mmap_mode),
+                np.load(directory / "indices.npy", mmap_mode=mmap_mode),
+                np.load(directory / "indptr.npy", mmap_mode=mmap_mode),
+            ),
+            shape=(manifest["documents"], manifest["terms"]),
+        )
+        se.term_max = np.load(directory / "term_max.npy")
+        se.doc_ids = np.load(directory / "doc_ids.npy", mmap_mode=mmap_mode)
+        se.doc_types = np.load(directory / "doc_types.npy", mmap_mode=mmap_mode)
+        se.doc_dates = np.load(directory / "doc_dates.npy", mmap_mode=mmap_mode)
+        se.doc_flags = np.load(directory / "doc_flags.npy", mmap_mode=mmap_mode)
+        se.alive = np.ones(manifest["documents"], dtype=bool)
+        se.built_at = datetime.fromisoformat(manifest["created_at"])
+        se._spelling = cls._spell_index(se.doc_matrix, terms)
+        return se
 
     # ————— Spell Correction ————— #
+    @staticmethod
+    def _spell_index(matrix: Any, terms: Iterable[str]) -> SpellIndex:
+        """
+        SymSpell index over the vocabulary, weighted by document frequency.
+        Built by build_index() and load(), never in a request: expanding a
+        large vocabulary takes seconds, and is done before the engine is
+        swapped in, without holding the lock searches take.
+        """
+        spelling = SpellIndex()
+        df = np.diff(matrix.indptr)
+        for col, term in enumerate(terms):
+            spelling.add(term, int(df[col]) or 1)
+        return spelling
+
+    @property
+    def spelling(self) -> SpellIndex:
+        """The vocabulary's SymSpell index (empty until the engine is indexed)."""
+        return self._spelling
+
+    def correct_word(self, token: str, threshold: int = 80) -> str:
+        """
+        Returns the best dictionary match for a single lowercase token.
+        Stop words are never "corrected" into content words.
+        """
+        if token in self.vectorizer.get_stop_words():
+            return token
+        return self.spelling.correct(token, score_cutoff=threshold)
+
+    def correct_words(self, tokens: List[str], threshold: int = 80) -> List[str]:
+        """Corrects each token; one call (and one sidecar round trip) per query."""
+        return [self.correct_word(token, threshold) for token in tokens]
+
     def correct_query(self, query: str, threshold: int = 80) -> str:
         """
-        Attempts to correct query tokens using fuzzy matching
-        against the TF-IDF vocabulary.
+        Attempts to correct query tokens against the indexed vocabulary.
         """
-        if not hasattr(self.vectorizer, "vocabulary_"):
+        if self.doc_matrix is None:
             return query  # Not yet indexed
 
-        vocab = list(self.vectorizer.vocabulary_.keys())
         tokens = re.findall(r"\w+", query.lower())
-        corrected = []
-
-        for token in tokens:
-            suggestion = process.extractOne(token, vocab)
-            if suggestion and suggestion[1] >= threshold:
-                corrected.append(suggestion[0])
-            else:
-                corrected.append(token)
-
-        return " ".join(corrected)
+        return " ".join(self.correct_word(token, threshold) for token in tokens)
 
     # ————— Search ————— #
-    def search(self, query: str, top_k: int = 20) -> List[Tuple[Document, float]]:
+    def search(self, query: str, top_k: int = 20, early_termination: bool = True,
+               types: Optional[Iterable[str]] = None, since: Optional[int] = None,
+               until: Optional[int] = None, featured: Optional[bool] = None,
+               rerank: bool = True, semantic: bool = True) -> List[Tuple[Document, float]]:
         """
-        Returns the top-k most relevant documents to the query.
+        Returns the top-k most relevant documents to the query (not hydrated).
+
+        Only the postings of the query's terms are read, so cost scales with
+        their lengths rather than the corpus size. `types` restricts hits to
+        those document types, `since`/`until` (Unix seconds, inclusive) to a
+        DATE_FIELDS range and `featured` to featured (or other) documents;
+        filtered-out rows are treated like tombstones, so the top-k bounds
+        only compete among eligible rows.
+
+        When a re-ranking stage is installed (and `rerank` is set), the top
+        stage.candidates first-stage hits are re-scored by its model and
+        the best top_k of those are returned.
+
+        When a semantic index is installed (and `semantic` is set), its
+        nearest neighbours under the same filters are fused with the
+        lexical ranking by RRF, and the returned scores are RRF scores.
+        Queries with no indexed term are then answered semantically.
         """
-        if not self.doc_matrix or not self.documents:
-            return []
+        if self.doc_matrix is None:
+            return []  # Not yet indexed
 
+        sem = semantic_index() if semantic else None
         query_vec = self.vectorizer.transform([query])
-        sims = cosine_similarity(query_vec, self.doc_matrix).flatten()
-        top_indices = sims.argsort()[::-1][:top_k]
+        if query_vec.nnz == 0 and sem is None:
+            return []
+
+        stage = rerank_stage() if rerank else None
+        final_k = top_k
+        if stage is not None:
+            top_k = max(top_k, stage.candidates)
+
+        with self._lock:
+            matrix, pending, term_max = self.doc_matrix, self._pending_matrix(), self.term_max
+            alive, doc_ids, doc_types = self.alive, self.doc_ids, self.doc_types
+            doc_dates, doc_flags = self.doc_dates, self.doc_flags
+
+        alive = self._filter_mask(alive, doc_types, doc_dates, doc_flags,
+                                  types, since, until, featured)
+        if not alive.any():
+            return []
+
+        if query_vec.nnz:
+            rows, scores = self._lexical(matrix, pending, term_max, alive, query_vec,
+                                         top_k, early_termination)
+        else:
+            rows, scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        if stage is not None and len(rows):
+            reranked = stage.rerank(doc_types[rows], doc_ids[rows], doc_dates[rows], scores)
+            if reranked is not None:
+                scores = reranked
+        order = np.argsort(-scores, kind="stable")
+
+        if sem is not None:
+            keep = lambda r: self._filter_mask(
+                np.ones(len(r), dtype=bool), sem.doc_types[r], sem.doc_dates[r],
+                sem.doc_flags[r], types, since, until, featured,
+            )
+            lexical = [(int(doc_types[rows[i]]), int(doc_ids[rows[i]])) for i in order]
+            fused = rrf([lexical, sem.query(query, keep=keep)])[:final_k]
+            return [(Document(id=pk, type=DOC_TYPES[code]), score) for (code, pk), score in fused]
 
         return [
-            (self.documents[i], float(sims[i]))
-            for i in top_indices if sims[i] > 0
+            (Document(id=int(doc_ids[rows[i]]), type=DOC_TYPES[doc_types[rows[i]]]), float(scores[i]))
+            for i in order[:final_k]
         ]
 
-    # ————— Future Enhancements ————— #
-    # def embed_and_rerank(self, query: str): ...
-    # def learn_to_rank(self, features, labels): ...
+    def _lexical(self, matrix: Any, pending: Any, term_max: np.ndarray, alive: np.ndarray,
+                 query_vec: Any, top_k: int,
+                 early_termination: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25F first stage: returns (rows, scores) of the top_k live hits, unordered.
+        """
+        # Repeated query terms count once; each contributes idf * BM25F weight
+        terms = query_vec.indices
+        weights = self.idf[terms]
+        rows, scores = self._score_postings(
+            matrix, terms, weights, weights * term_max[terms],
+            alive, top_k, early_termination,
+        )
+
+        if pending is not None:
+            # The write buffer is small: score it exhaustively
+            offset = matrix.shape[0]
+            p_rows, p_scores = self._score_postings(
+                pending, terms, weights, None, alive[offset:], top_k, False,
+            )
+            rows = np.concatenate([rows, p_rows + offset])
+            scores = np.concatenate([scores, p_scores])
+
+        keep = alive[rows] & (scores > 0)
+        rows, scores = rows[keep], scores[keep]
+
+        if len(rows) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            rows, scores = rows[top], scores[top]
+        return rows, scores
+
+    @staticmethod
+    def _filter_mask(alive: np.ndarray, doc_types: np.ndarray, doc_dates: np.ndarray,
+                     doc_flags: np.ndarray, types: Optional[Iterable[str]],
+                     since: Optional[int], until: Optional[int],
+                     featured: Optional[bool]) -> np.ndarray:
+        """
+        Returns `alive` narrowed to the rows passing every given filter.
+        """
+        mask = alive
+        if types is not None:
+            codes = [DOC_TYPES.index(t) for t in types]
+            mask = mask & np.isin(doc_types, codes)
+        if since is not None:
+            mask = mask & (doc_dates >= since)
+        if until is not None:
+            mask = mask & (doc_dates <= until)
+        if featured is not None:
+            mask = mask & (((doc_flags & FLAG_FEATURED) != 0) == featured)
+        return mask
+
+    @staticmethod
+    def _score_postings(matrix: Any, terms: np.ndarray, weights: np.ndarray,
+                        bounds: Optional[np.ndarray], alive: np.ndarray,
+                        top_k: int, early_termination: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Accumulates query·doc dot products over the posting lists of `terms`
+        in a CSC segment. Returns (candidate rows, scores).
+
+        With early termination (MaxScore), terms are visited in decreasing
+        order of their score upper bound. Once the bounds of the unvisited
+        terms sum to less than the current k-th best score, no unseen row can
+        reach the top-k, so the remaining terms are only looked up (binary
+        search) for rows that are still competitive.
+        """
+        if bounds is not None:
+            order = np.argsort(-bounds)
+            terms, weights, bounds = terms[order], weights[order], bounds[order]
+            remaining = np.cumsum(bounds[::-1])[::-1]  # remaining[i] = sum(bounds[i:])
+
+        rows = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float64)
+
+        for i, (term, weight) in enumerate(zip(terms, weights)):
+            if early_termination and bounds is not None and i > 0:
+                live = alive[rows]
+                if np.count_nonzero(live) >= top_k:
+                    threshold = np.partition(scores[live], -top_k)[-top_k]
+                    if remaining[i] < threshold:
+                        return SearchEngine._score_candidates(
+                            matrix, terms[i:], weights[i:], rows, scores,
+                            live & (scores + remaining[i] >= threshold),
+                        )
+
+            p_rows, p_weights = _postings(matrix, term)
+            rows, inverse = np.unique(np.concatenate([rows, p_rows]), return_inverse=True)
+            scores = np.bincount(
+                inverse,
+                weights=np.concatenate([scores, weight * p_weights]),
+                minlength=len(rows),
+            )
+
+        return rows, scores
+
+    @staticmethod
+    def _score_candidates(matrix: Any, terms: np.ndarray, weights: np.ndarray,
+                          rows: np.ndarray, scores: np.ndarray,
+                          keep: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Adds the contribution of `terms` to the kept candidate rows only,
+        via binary search in each (sorted) posting list.
+        """
+        rows, scores = rows[keep], scores[keep].copy()
+        for term, weight in zip(terms, weights):
+            p_rows, p_weights = _postings(matrix, term)
+            if not len(p_rows):
+                continue
+            pos = np.minimum(np.searchsorted(p_rows, rows), len(p_rows) - 1)
+            hit = p_rows[pos] == rows
+            scores[hit] += weight * p_weights[pos[hit]]
+        return rows, scores
+
+
+# ————— Hydration ————— #
+
+def hydrate(results: List[Tuple[Document, float]],
+            querysets: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+    """
+    Attaches model instances to hits with one in_bulk() query per type.
+    `querysets` optionally maps a type to the queryset to fetch from
+    (e.g. with select_related for the template). Hits whose rows were
+    deleted since indexing are dropped.
+    """
+    querysets = querysets or {}
+    wanted: Dict[str, List[int]] = {}
+    for doc, _ in results:
+        wanted.setdefault(doc.type, []).append(doc.id)
+
+    fetched = {
+        doc_type: querysets.get(doc_type, apps.get_model(DOC_MODELS[doc_type]).objects).in_bulk(pks)
+        for doc_type, pks in wanted.items()
+    }
+
+    hydrated = []
+    for doc, score in results:
+        obj = fetched[doc.type].get(doc.id)
+        if obj is not None:
+            doc.obj = obj
+            hydrated.append((doc, score))
+    return hydrated
 
 
 # ————— Singleton & Access Helpers ————— #
 
-_engine_singleton: Optional[SearchEngine] = None
+_engine_singleton: Optional[SearchEngine] = None  # or a RemoteSearchEngine
 
 def engine() -> SearchEngine:
     """
     Returns the global SearchEngine singleton.
-    Should be initialized in AppConfig.ready().
+    If it is not ready yet, starts the background warm-up (a no-op when one
+    is already running) and raises RuntimeError, so callers degrade to
+    empty results instead of blocking on the build.
     """
     if _engine_singleton is None:
-        raise RuntimeError("SearchEngine not initialized. Call in AppConfig.ready().")
+        from .warmup import start_warmup
+        start_warmup()
+        raise RuntimeError("SearchEngine is warming up.")
     return _engine_singleton
 
-def initialize_engine(posts: List[Any], users: List[Any]) -> SearchEngine:
+def initialize_engine(sources: Optional[Dict[str, Iterable[Any]]] = None) -> SearchEngine:
     """
-    Initializes and stores the global SearchEngine.
+    Initializes and stores the global SearchEngine, built from
+    corpus_querysets() unless `sources` is given.
     Should be called only once (e.g., from AppConfig).
     """
     global _engine_singleton
     _engine_singleton = SearchEngine()
-    _engine_singleton.build_index(posts, users)
+    _engine_singleton.build_index(sources if sources is not None else corpus_querysets())
     return _engine_singleton
 
+def load_engine(directory: Path) -> SearchEngine:
+    """
+    Loads a persisted index (memory-mapped) and stores it as the global SearchEngine.
+    """
+    global _engine_singleton, _loaded_dir
+    _engine_singleton = SearchEngine.load(directory)
+    _loaded_dir = Path(directory)
+    return _engine_singleton
+
+def connect_engine(path: Path) -> Any:
+    """
+    Stores a client for the search sidecar (service.py) as the global engine,
+    so this process holds no index of its own.
+    """
+    global _engine_singleton
+    from .service import RemoteSearchEngine
+    _engine_singleton = RemoteSearchEngine(path)
+    return _engine_singleton
+
+def _apply(method: str, *args: Any) -> None:
+    """
+    Applies a write to the global engine. While a rebuild is running it is
+    journaled so the rebuilt index can replay it before the swap; while
+    the reload watcher runs it is kept in the recent-writes log, replayed
+    onto a newer persisted version before that one is swapped in.
+    """
+    with _swap_lock:
+        se = _engine_singleton
+        if _journal is not None:
+            _journal.append((method, args))
+        if _reloader is not None:
+            _recent.append((time.time(), method, args))
+    if se is not None:
+        getattr(se, method)(*args)
+
+def index_document(doc_type: str, obj: Any) -> None:
+    """
+    Upserts a model instance into the global engine, if one is initialized
+    or being built. Fields (tags, club name, bio) are only read when there
+    is an index to update.
+    """
+    if _engine_singleton is not None or _journal is not None:
+        _apply("upsert", doc_type, obj.pk, document_fields(doc_type, obj),
+               document_attrs(doc_type, obj))
+
+def remove_document(doc_type: str, pk: int) -> None:
+    """Tombstones a document in the global engine, if one is initialized or being built."""
+    if _engine_singleton is not None or _journal is not None:
+        _apply("remove", doc_type, pk)
+
 def search(q: str, k: int = 20) -> List[Tuple[Document, float]]:
-    """Wrapper for global search()."""
-    return engine().search(q, top_k=k)
+    """Wrapper for global search(), hydrated with model instances."""
+    return hydrate(engine().search(q, top_k=k))
 
 def correct(q: str) -> str:
     """Wrapper for global correct_query()."""
     return engine().correct_query(q)
 
 
-# ————— Example Usage ————— #
-if __name__ == "__main__":
-    from django.contrib.auth import get_user_model
-    from apps.posts.models import Post
+# ————— Background Rebuilds ————— #
+
+_swap_lock = threading.Lock()        # Guards the singleton swap and the journal
+_rebuild_lock = threading.Lock()     # One rebuild at a time
+_journal: Optional[List[Tuple[str, Tuple[Any, ...]]]] = None  # Writes made during a rebuild
+_recent: deque = deque(maxlen=RELOAD_JOURNAL_SIZE)           # (time, method, args) for reloads
+_scheduler: Optional[threading.Thread] = None
+_reloader: Optional[threading.Thread] = None
+_loaded_dir: Optional[Path] = None    # Persisted version serving, if loaded from disk
+_seen_dir: Optional[Path] = None      # Newest version tried, loaded or rejected
+_rebuild_stats: Dict[str, Any] = {
+    "build_seconds": None,
+    "rebuilds":      0,
+    "failures":      0,
+    "last_error":    None,
+}
+
+def _validate(fresh: SearchEngine, current: Any) -> None:
+    """
+    Raises ValueError if `fresh` looks unfit to replace `current`.
+    """
+    if fresh.doc_matrix is None or fresh.doc_matrix.shape[0] != len(fresh.doc_ids):
+        raise ValueError("Rebuilt index is inconsistent.")
+    if isinstance(current, SearchEngine) and fresh.live_count < REBUILD_MIN_RATIO * current.live_count:
+        raise ValueError(
+            f"Rebuilt index has {fresh.live_count} documents, "
+            f"down from {current.live_count}; keeping the current index."
+        )
+
+def rebuild_engine(sources: Optional[Dict[str, Iterable[Any]]] = None,
+                   root: Optional[Path] = None) -> bool:
+    """
+    Builds a fresh SearchEngine off to the side and, once validated, swaps
+    it in as the global engine. Searches already running keep the index
+    they started with. Writes made during the build, including those
+    sent by workers to the sidecar, are replayed onto the new index
+    before the swap, so none are lost. With `root`, the new index is also
+    written there as the CURRENT version, for workers to reload.
+
+    Returns False if another rebuild is running or this one failed.
+    """
+    global _engine_singleton, _journal
+    if not _rebuild_lock.acquire(blocking=False):
+        return False
+
+    try:
+        with _swap_lock:
+            _journal = []
+
+        started = time.monotonic()
+        fresh = SearchEngine()
+        fresh.build_index(sources if sources is not None else corpus_querysets())
+        elapsed = time.monotonic() - started
+        _validate(fresh, _engine_singleton)
+
+        with _swap_lock:
+            for method, args in _journal:
+                getattr(fresh, method)(*args)
+            _engine_singleton = fresh
+
+        _rebuild_stats.update(build_seconds=round(elapsed, 3), last_error=None)
+        _rebuild_stats["rebuilds"] += 1
+        logger.info("[SearchEngine] Rebuilt index with %d documents in %.2fs.",
+                    fresh.live_count, elapsed)
+        mark_ready()
+        if root is not None:
+            directory = write_index(fresh, root)
+            logger.info("[SearchEngine] Wrote index version %s.", directory)
+        return True
+    except Exception as e:
+        _rebuild_stats["failures"] += 1
+        _rebuild_stats["last_error"] = f"{type(e).__name__}: {e}"
+        logger.exception("[SearchEngine] Rebuild failed.")
+        return False
+    finally:
+        with _swap_lock:
+            _journal = None
+        _rebuild_lock.release()
+
+def start_rebuild_scheduler(interval: float, root: Optional[Path] = None) -> None:
+    """
+    Rebuilds the global engine every `interval` seconds in a daemon thread,
+    writing each rebuild under `root` if given. Only the process owning
+    the index runs this (the sidecar); web workers reload versions
+    instead (start_reload_watcher). A non-positive interval disables
+    scheduled rebuilds.
+    """
+    global _scheduler
+    if interval <= 0 or _scheduler is not None:
+        return
+
+    def run() -> None:
+        from django.db import close_old_connections
+        while True:
+            time.sleep(interval)
+            try:
+                rebuild_engine(root=root)
+                load_offline_stages()  # Picks up features and vectors refreshed offline
+            finally:
+                close_old_connections()
+
+    _scheduler = threading.Thread(target=run, name="search-rebuild", daemon=True)
+    _scheduler.start()
+
+def reload_engine(root: Path) -> bool:
+    """
+    Swaps in the CURRENT persisted version under `root` (memory-mapped)
+    if it is newer than the one serving. Writes this process applied
+    since that version started reading the corpus are replayed onto it
+    first. Returns True if it swapped.
+    """
+    global _engine_singleton, _loaded_dir, _seen_dir
+    directory = current_index_dir(root)
+    if directory is None or directory in (_loaded_dir, _seen_dir):
+        return False
+    _seen_dir = directory   # A rejected version is not retried
+
+    try:
+        fresh = SearchEngine.load(directory)
+        _validate(fresh, _engine_singleton)
+    except (OSError, ValueError) as e:
+        _rebuild_stats["failures"] += 1
+        _rebuild_stats["last_error"] = f"{type(e).__name__}: {e}"
+        logger.warning("[SearchEngine] Not reloading %s: %s", directory, e)
+        return False
 
-    posts = Post.objects.all()
-    users = get_user_model().objects.all()
+    since = fresh.built_at.timestamp() - RELOAD_REPLAY_MARGIN if fresh.built_at else 0.0
+    with _swap_lock:
+        while _recent and _recent[0][0] < since:
+            _recent.popleft()
+        for _, method, args in _recent:
+            getattr(fresh, method)(*args)
+        _engine_singleton = fresh
+        _loaded_dir = directory
 
+    _rebuild_stats["rebuilds"] += 1
+    mark_ready()
+    logger.info("[SearchEngine] Reloaded index version %s (%d documents).", directory, fresh.live_count)
+    return True
+
+def start_reload_watcher(interval: float, root: Path) -> None:
+    """
+    Checks every `interval` seconds for a newer index version under `root`
+    (written by `manage.py build_search_index` or the sidecar) and for
+    refreshed offline stages, in a daemon thread. Web workers run this
+    instead of rebuilding, so they keep sharing one page-cached index.
+    A non-positive interval disables reloads.
+    """
+    global _reloader
+    if interval <= 0 or _reloader is not None:
+        return
+
+    def run() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                reload_engine(root)
+                load_offline_stages()
+            except Exception:
+                logger.exception("[SearchEngine] Reload failed.")
+
+    with _swap_lock:    # Writes are logged for replay from now on
+        _reloader = threading.Thread(target=run, name="search-reload", daemon=True)
+    _reloader.start()
+
+def load_offline_stages() -> None:
+    """
+    (Re)loads the stages built offline: re-ranking features and the
+    semantic index. A stage that fails to load keeps its previous version.
+    """
+    for name, load in (("Rerank", load_rerank_stage), ("Semantic", load_semantic_index)):
+        try:
+            load()
+        except (OSError, ValueError) as e:
+            logger.warning("[%s] Could not load: %s", name, e)
+
+def index_metrics() -> Dict[str, Any]:
+    """
+    Returns index health: live document count, when the index was built,
+    its age in seconds, the duration and outcome of rebuilds, and the
+    age of the re-ranking features and their fallback count.
+    Asks the sidecar when this process uses one.
+    """
+    se = _engine_singleton
+    if se is not None and not isinstance(se, SearchEngine):
+        return se.call("index_metrics")
+
+    built_at = se.built_at if se is not None else None
+    stage = rerank_stage()
+    return {
+        **_rebuild_stats,
+        "index_dir":   str(_loaded_dir) if _loaded_dir else None,
+        "documents":   se.live_count if se is not None else 0,
+        "built_at":    built_at.isoformat() if built_at else None,
+        "age_seconds": round((datetime.now(timezone.utc) - built_at).total_seconds(), 1) if built_at else None,
+        "rerank_features_built_at": stage.store.built_at.isoformat() if stage and stage.store.built_at else None,
+        "rerank_fallbacks": stage.fallbacks if stage else None,
+        "rerank_overruns":  stage.overruns if stage else None,
+        "semantic_documents": len(semantic_index()) if semantic_index() else None,
+    }
+
+
+# ————— Versioned Index Directories ————— #
+
+def current_index_dir(root: Path) -> Optional[Path]:
+    """
+    Returns the active index version under `root`, or None if none was built.
+    """
+    pointer = Path(root) / CURRENT_POINTER
+    if not pointer.exists():
+        return None
+    directory = Path(root) / pointer.read_text(encoding="utf-8").strip()
+    return directory if directory.is_dir() else None
+
+def write_index(se: Any, root: Path, keep: int = 3) -> Path:
+    """
+    Saves `se` (a SearchEngine, or anything with save(directory), such as
+    a re-ranking FeatureStore) as a new version under `root`, atomically
+    repoints CURRENT at it and prunes all but the newest `keep` versions.
+    """
+    root = Path(root)
+    name = f"v{INDEX_FORMAT_VERSION}-{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}"
+    directory = root / name
+    se.save(directory)
+
+    tmp_pointer = root / f".{CURRENT_POINTER}.{os.getpid()}"
+    tmp_pointer.write_text(name, encoding="utf-8")
+    os.replace(tmp_pointer, root / CURRENT_POINTER)
+
+    versions = sorted(
+        (p for p in root.iterdir() if p.is_dir() and p.name.startswith("v")),
+        key=lambda p: p.stat().st_mtime,
+    )
+    for old in versions[:-keep] if keep > 0 else []:
+        if old != directory:
+            for f in old.iterdir():
+                f.unlink()
+            old.rmdir()
+
+    return directory
+
+
+# ————— Example Usage ————— #
+if __name__ == "__main__":
     se = SearchEngine()
-    se.build_index(posts, users)
+    se.build_index(corpus_querysets())
 
     q = "matrix calculus"
     print("Did you mean:", se.correct_query(q))
-    for doc, score in se.search(q):
-        print(f"{score:.3f} — {doc.meta['type']} — {doc.meta['obj']}")
+    for doc, score in hydrate(se.search(q)):
+        print(f"{score:.3f} — {doc.type} — {doc.obj}")
@@ -18,6 +18,9 @@ class SearchForm(forms.Form):
         - query:     user-entered search string
         - filter_by: optional model type to filter results by
         - order_by:  optional field to order results
+        - date_from / date_to: optional inclusive date range (post date,
+          join date, club creation or event start)
+        - featured:  only featured clubs and events
     """
 
     query = forms.CharField(
@@ -57,3 +60,28 @@ class SearchForm(forms.Form):
             'aria-label': 'Sort search results',
         })
     )
+
+    date_from = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': 'form-control mr-sm-2',
+            'aria-label': 'From date',
+        })
+    )
+
+    date_to = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': 'form-control mr-sm-2',
+            'aria-label': 'To date',
+        })
+    )
+
+    featured = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={
+            'aria-label': 'Featured only',
+        })
+    )
@@ -0,0 +1,54 @@
+# apps/search/management/commands/bench_search.py
+
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.search.bench import run, compare
+
+
+class Command(BaseCommand):
+    help = "Benchmark search, spell correction and autocomplete on synthetic corpora (latency, memory, NDCG)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Corpus sizes, in posts",
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=200,
+            help="Timed calls per operation and size",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Write the JSON results here instead of stdout",
+        )
+        parser.add_argument(
+            "--compare",
+            default=None,
+            help="Baseline results file; exits with an error on regressions",
+        )
+
+    def handle(self, *args, **options):
+        results = run(options["sizes"], options["queries"], options["seed"])
+        payload = json.dumps(results, indent=2)
+
+        if options["output"]:
+            Path(options["output"]).write_text(payload, encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
+        else:
+            self.stdout.write(payload)
+
+        if options["compare"]:
+            baseline = json.loads(Path(options["compare"]).read_text(encoding="utf-8"))
+            regressions = compare(baseline, results)
+            if regressions:
+                raise CommandError("Regressions against baseline:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
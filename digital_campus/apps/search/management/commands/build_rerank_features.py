@@ -0,0 +1,36 @@
+# apps/search/management/commands/build_rerank_features.py
+
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from apps.search.engine import write_index
+from apps.search.rerank import build_feature_store
+
+
+class Command(BaseCommand):
+    help = "Refresh the re-ranking feature store under SEARCH_FEATURES_DIR (run offline, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Feature store root directory (defaults to settings.SEARCH_FEATURES_DIR)",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=3,
+            help="Number of feature store versions to keep, including the new one",
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options["output"] or settings.SEARCH_FEATURES_DIR)
+        root.mkdir(parents=True, exist_ok=True)
+
+        store = build_feature_store()
+        directory = write_index(store, root, keep=options["keep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-ranking features written to {directory} ({len(store)} documents)."
+        ))
@@ -0,0 +1,53 @@
+# apps/search/management/commands/build_search_index.py
+
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.db import close_old_connections
+
+from apps.search.engine import SearchEngine, corpus_querysets, write_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the search index and persist it under SEARCH_INDEX_DIR for workers to memory-map; "
+        "with --every, keep rebuilding (run exactly one such process per host)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Index root directory (defaults to settings.SEARCH_INDEX_DIR)",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=3,
+            help="Number of index versions to keep, including the new one",
+        )
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=None,
+            help="Rebuild every N seconds, forever (e.g. settings.SEARCH_REBUILD_INTERVAL)",
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options["output"] or settings.SEARCH_INDEX_DIR)
+        every = options["every"]
+
+        while True:
+            se = SearchEngine()
+            se.build_index(corpus_querysets())
+            directory = write_index(se, root, keep=options["keep"])
+
+            self.stdout.write(self.style.SUCCESS(
+                f"Search index written to {directory} ({se.doc_matrix.shape[0]} documents)."
+            ))
+            if not every:
+                return
+            del se      # Free the old index before building the next
+            close_old_connections()
+            time.sleep(every)
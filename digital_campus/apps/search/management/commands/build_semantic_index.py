@@ -0,0 +1,55 @@
+# apps/search/management/commands/build_semantic_index.py
+
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from apps.search.engine import write_index
+from apps.search.semantic import build_semantic_index
+
+
+class Command(BaseCommand):
+    help = "Embed posts, clubs and events and build the semantic (IVF) index under SEARCH_SEMANTIC_DIR"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            default=None,
+            help="sentence-transformers model (defaults to settings.SEARCH_SEMANTIC_MODEL)",
+        )
+        parser.add_argument(
+            "--lists",
+            type=int,
+            default=None,
+            help="Number of IVF lists (defaults to about sqrt(documents))",
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Index root directory (defaults to settings.SEARCH_SEMANTIC_DIR)",
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            default=3,
+            help="Number of index versions to keep, including the new one",
+        )
+
+    def handle(self, *args, **options):
+        model_name = options["model"] or settings.SEARCH_SEMANTIC_MODEL
+        if not model_name:
+            raise CommandError("Set SEARCH_SEMANTIC_MODEL or pass --model.")
+
+        try:
+            index = build_semantic_index(model_name, lists=options["lists"])
+        except ImportError:
+            raise CommandError("Semantic search needs sentence-transformers: pip install sentence-transformers")
+
+        root = Path(options["output"] or settings.SEARCH_SEMANTIC_DIR)
+        root.mkdir(parents=True, exist_ok=True)
+        directory = write_index(index, root, keep=options["keep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Semantic index written to {directory} "
+            f"({len(index)} documents, {len(index.centroids)} lists)."
+        ))
@@ -0,0 +1,52 @@
+# apps/search/management/commands/run_search_service.py
+
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from apps.search.engine import (
+    initialize_engine, load_engine, current_index_dir, start_rebuild_scheduler,
+    load_offline_stages,
+)
+from apps.search.service import SearchServer
+
+
+class Command(BaseCommand):
+    help = "Serve the search index to every worker on this host over a Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--socket",
+            default=None,
+            help="Socket path (defaults to settings.SEARCH_SERVICE_SOCKET)",
+        )
+        parser.add_argument(
+            "--index-dir",
+            default=None,
+            help="Index root directory (defaults to settings.SEARCH_INDEX_DIR)",
+        )
+
+    def handle(self, *args, **options):
+        path = options["socket"] or settings.SEARCH_SERVICE_SOCKET
+        if not path:
+            raise CommandError("Set SEARCH_SERVICE_SOCKET or pass --socket.")
+
+        root = Path(options["index_dir"] or settings.SEARCH_INDEX_DIR)
+        index_dir = current_index_dir(root)
+        if index_dir is not None:
+            load_engine(index_dir)
+            self.stdout.write(f"Loaded search index from {index_dir}.")
+        else:
+            initialize_engine()
+            self.stdout.write("Built search index from the database.")
+
+        load_offline_stages()
+        start_rebuild_scheduler(settings.SEARCH_REBUILD_INTERVAL, root)  # Versions survive restarts
+        server = SearchServer(Path(path))
+        self.stdout.write(self.style.SUCCESS(f"Search service listening on {path}."))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,319 @@
+"""
+apps/search/rerank.py
+
+Second retrieval stage: re-ranks the engine's top BM25F candidates with
+a model over precomputed engagement features.
+
+Features live in a column store (FeatureStore) built offline by
+`manage.py build_rerank_features` and memory-mapped at load, so a query
+only gathers rows for its own candidates. The model is pluggable: a
+LinearReranker with hand-set weights, or any fitted estimator with a
+predict() method (e.g. a gradient-boosted regressor) saved with joblib.
+
+Each query gets a strict time budget. The stage keeps a running
+estimate of its cost per candidate and, before scoring, re-ranks only
+as many of the best first-stage hits as fit in what is left of the
+budget; the rest keep their first-stage order below them. If too few
+fit, or the model fails, the first-stage order is kept.
+
+Author: Vikram Bhojanala
+"""
+
+import json
+import time
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ——— Stage Limits ———
+RERANK_CANDIDATES = 300     # First-stage hits handed to the re-ranker
+RERANK_BUDGET_MS = 15.0     # Per-query budget before falling back to first-stage order
+RERANK_MIN_CANDIDATES = 20  # Fewer fitting the budget than this: keep first-stage order
+BUDGET_HEADROOM = 0.8       # Share of the budget planned for, against estimate noise
+COST_SMOOTHING = 0.2        # EWMA weight of the latest per-candidate cost
+
+# ——— Features ———
+STORE_COLUMNS = (           # Refreshed offline, one row per (type, pk)
+    "likes",                # Post likes
+    "comments",             # Post comments
+    "followers",            # Followers of the user, or of a post's author
+    "members",              # Members of the club, or of a post's / event's club
+    "attendees",            # Confirmed event attendees
+)
+FEATURES = ("bm25", "recency") + STORE_COLUMNS   # Model input, in column order
+
+RECENCY_HALF_LIFE_DAYS = 30.0
+DEFAULT_WEIGHTS = {
+    "bm25":      1.0,
+    "recency":   0.5,
+    "likes":     0.15,
+    "comments":  0.1,
+    "followers": 0.05,
+    "members":   0.05,
+    "attendees": 0.1,
+}
+
+
+def _keys(doc_types: np.ndarray, doc_ids: np.ndarray) -> np.ndarray:
+    """Packs (type code, pk) pairs into sortable int64 keys."""
+    return np.asarray(doc_ids, dtype=np.int64) * 8 + np.asarray(doc_types, dtype=np.int64)
+
+
+class FeatureStore:
+    """
+    Engagement counts per document, as sorted int64 keys and a float32
+    column matrix. Documents missing from the store get zeros.
+    """
+
+    def __init__(self, keys: np.ndarray, columns: np.ndarray,
+                 built_at: Optional[datetime] = None) -> None:
+        self.keys = keys
+        self.columns = columns
+        self.built_at = built_at
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def from_rows(cls, rows: Dict[Tuple[int, int], Dict[str, float]]) -> "FeatureStore":
+        """
+        Builds a store from {(type code, pk): {column: value}}.
+        """
+        pairs = np.array(list(rows), dtype=np.int64).reshape(-1, 2)
+        keys = _keys(pairs[:, 0], pairs[:, 1])
+        columns = np.array(
+            [[values.get(name, 0.0) for name in STORE_COLUMNS] for values in rows.values()],
+            dtype=np.float32,
+        ).reshape(-1, len(STORE_COLUMNS))
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], columns[order], datetime.now(timezone.utc))
+
+    def lookup(self, doc_types: np.ndarray, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        Returns the feature rows of the given documents (n x STORE_COLUMNS).
+        """
+        out = np.zeros((len(doc_ids), len(STORE_COLUMNS)), dtype=np.float32)
+        if not len(self.keys):
+            return out
+        wanted = _keys(doc_types, doc_ids)
+        pos = np.minimum(np.searchsorted(self.keys, wanted), len(self.keys) - 1)
+        found = self.keys[pos] == wanted
+        out[found] = self.columns[pos[found]]
+        return out
+
+    # ————— Persistence ————— #
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True)
+        np.save(directory / "keys.npy", self.keys)
+        np.save(directory / "columns.npy", self.columns)
+        (directory / "manifest.json").write_text(json.dumps({
+            "columns":    list(STORE_COLUMNS),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "documents":  len(self.keys),
+        }), encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory: Path) -> "FeatureStore":
+        manifest = json.loads((directory / "manifest.json").read_text(encoding="utf-8"))
+        if tuple(manifest.get("columns", ())) != STORE_COLUMNS:
+            raise ValueError(f"Feature store {directory} has columns {manifest.get('columns')!r}.")
+        return cls(
+            np.load(directory / "keys.npy", mmap_mode="r"),
+            np.load(directory / "columns.npy", mmap_mode="r"),
+            datetime.fromisoformat(manifest["created_at"]),
+        )
+
+
+# ————— Models ————— #
+
+class LinearReranker:
+    """
+    Weighted sum of the features; engagement counts enter as log1p.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None) -> None:
+        weights = weights or DEFAULT_WEIGHTS
+        self.coef = np.array([weights.get(name, 0.0) for name in FEATURES], dtype=np.float64)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        X = X.astype(np.float64, copy=True)
+        X[:, 2:] = np.log1p(X[:, 2:])
+        return X @ self.coef
+
+
+class RerankStage:
+    """
+    Builds the feature matrix for first-stage hits and re-scores them
+    with `model` (anything with predict(X) over FEATURES columns).
+    """
+
+    def __init__(self, store: FeatureStore, model: Any,
+                 candidates: int = RERANK_CANDIDATES, budget_ms: float = RERANK_BUDGET_MS) -> None:
+        self.store = store
+        self.model = model
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        self.fallbacks = 0
+        self.overruns = 0
+        self.row_ms = self._calibrate()     # Estimated features + predict cost per candidate
+
+    def _calibrate(self) -> float:
+        """Times one predict() over a full candidate set, per row."""
+        X = np.zeros((self.candidates, len(FEATURES)))
+        started = time.perf_counter()
+        try:
+            self.model.predict(X)
+        except Exception:
+            return 0.0  # Surfaces, and falls back, on the first query
+        return (time.perf_counter() - started) * 1000 / self.candidates
+
+    def fits(self, remaining_ms: float) -> int:
+        """How many candidates the cost estimate allows in `remaining_ms`."""
+        if self.row_ms <= 0:
+            return self.candidates
+        return int(remaining_ms * BUDGET_HEADROOM / self.row_ms)
+
+    def features(self, doc_types: np.ndarray, doc_ids: np.ndarray, doc_dates: np.ndarray,
+                 scores: np.ndarray, now: float) -> np.ndarray:
+        age_days = np.maximum(now - doc_dates, 0) / 86400.0
+        recency = np.exp2(-age_days / RECENCY_HALF_LIFE_DAYS)
+        return np.column_stack([scores, recency, self.store.lookup(doc_types, doc_ids)])
+
+    def rerank(self, doc_types: np.ndarray, doc_ids: np.ndarray, doc_dates: np.ndarray,
+               scores: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Returns new scores for the candidates, or None to keep the
+        first-stage order (too few fit the budget, or model error).
+
+        Only the best first-stage hits that fit the remaining budget are
+        scored by the model; the others are placed below them, in their
+        first-stage order.
+        """
+        started = time.perf_counter()
+        elapsed_ms = lambda: (time.perf_counter() - started) * 1000
+
+        n = len(scores)
+        m = min(n, self.fits(self.budget_ms))
+        if m < min(n, RERANK_MIN_CANDIDATES):
+            return self._fall_back("only %d of %d candidates fit the budget", m, n)
+        head = np.argsort(-scores, kind="stable")
+        head, rest = head[:m], head[m:]
+
+        try:
+            X = self.features(doc_types[head], doc_ids[head], doc_dates[head], scores[head], time.time())
+            m = min(m, self.fits(self.budget_ms - elapsed_ms()))  # Deadline check before predicting
+            if m < min(n, RERANK_MIN_CANDIDATES):
+                return self._fall_back("features left room for only %d candidates", m)
+            head, rest = head[:m], np.concatenate([head[m:], rest])
+            predicted = np.asarray(self.model.predict(X[:m]), dtype=np.float64)
+        except Exception:
+            logger.exception("[Rerank] Model failed; keeping first-stage order.")
+            self.fallbacks += 1
+            return None
+
+        took_ms = elapsed_ms()
+        self.row_ms += COST_SMOOTHING * (took_ms / m - self.row_ms)
+        if took_ms > self.budget_ms:
+            self.overruns += 1
+            logger.warning("[Rerank] Took %.1fms for %d candidates, over the %.0fms budget.",
+                           took_ms, m, self.budget_ms)
+
+        new_scores = np.empty(n, dtype=np.float64)
+        new_scores[head] = predicted
+        new_scores[rest] = predicted.min() - 1.0 - np.arange(len(rest))
+        return new_scores
+
+    def _fall_back(self, reason: str, *args: Any) -> None:
+        logger.warning("[Rerank] Keeping first-stage order: " + reason + ".", *args)
+        self.fallbacks += 1
+        return None
+
+
+# ————— Singleton & Access Helpers ————— #
+
+_stage: Optional[RerankStage] = None
+_stage_dir: Optional[Path] = None          # Feature store version _stage was loaded from
+
+def rerank_stage() -> Optional[RerankStage]:
+    """Returns the installed re-ranking stage, or None (first stage only)."""
+    return _stage
+
+def load_rerank_stage() -> Optional[RerankStage]:
+    """
+    Installs a stage from the newest feature store under SEARCH_FEATURES_DIR
+    and, if SEARCH_RERANK_MODEL is set, the joblib-saved model it names
+    (else LinearReranker). Without a feature store, re-ranking stays off.
+    """
+    global _stage, _stage_dir
+    from django.conf import settings
+    from .engine import current_index_dir
+
+    directory = current_index_dir(settings.SEARCH_FEATURES_DIR)
+    if directory is None or directory == _stage_dir:
+        return _stage   # Nothing built, or already serving this version
+
+    store = FeatureStore.load(directory)
+    model_path = getattr(settings, "SEARCH_RERANK_MODEL", None)
+    if model_path:
+        import joblib
+        model = joblib.load(model_path)
+    else:
+        model = LinearReranker()
+
+    _stage = RerankStage(store, model, budget_ms=settings.SEARCH_RERANK_BUDGET_MS)
+    _stage_dir = directory
+    logger.info("[Rerank] Loaded %d feature rows from %s.", len(store), directory)
+    return _stage
+
+
+# ————— Offline Feature Build ————— #
+
+def build_feature_store() -> FeatureStore:
+    """
+    Aggregates engagement counts for every indexed document with one
+    grouped query per type.
+    """
+    from django.apps import apps
+    from django.db.models import Count, Q
+    from .engine import DOC_MODELS, DOC_TYPES
+
+    model = lambda doc_type: apps.get_model(DOC_MODELS[doc_type])
+    code = DOC_TYPES.index
+    members = Count("club_membership_set", filter=Q(club_membership_set__status="member"), distinct=True)
+    rows: Dict[Tuple[int, int], Dict[str, float]] = {}
+
+    club_members = dict(model("club").objects.annotate(n=members).values_list("pk", "n"))
+    for pk, n in club_members.items():
+        rows[(code("club"), pk)] = {"members": n}
+
+    followers = dict(
+        model("user").objects.annotate(n=Count("profile__followers", distinct=True)).values_list("pk", "n")
+    )
+    for pk, n in followers.items():
+        rows[(code("user"), pk)] = {"followers": n}
+
+    posts = model("post").objects.values_list(
+        "pk", "like_count", "comment_count", "author_id", "ownership__club_id"
+    )
+    for pk, likes, comments, author_id, club_id in posts.iterator(chunk_size=2000):
+        rows[(code("post"), pk)] = {
+            "likes":     likes,
+            "comments":  comments,
+            "followers": followers.get(author_id, 0),
+            "members":   club_members.get(club_id, 0),
+        }
+
+    events = model("event").objects.annotate(
+        n_attendees=Count("attendancerecord", filter=Q(attendancerecord__status="attending"), distinct=True),
+    ).values_list("pk", "n_attendees", "club_id")
+    for pk, attendees, club_id in events.iterator(chunk_size=2000):
+        rows[(code("event"), pk)] = {
+            "attendees": attendees,
+            "members":   club_members.get(club_id, 0),
+        }
+
+    return FeatureStore.from_rows(rows)
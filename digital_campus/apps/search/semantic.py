@@ -0,0 +1,318 @@
+"""
+apps/search/semantic.py
+
+Optional semantic retrieval: dense sentence embeddings for posts, clubs
+and events, served through an IVF approximate-nearest-neighbour index and
+fused with the BM25F ranking by reciprocal rank fusion (RRF).
+
+Embeddings are computed on CPU with sentence-transformers (an optional
+dependency) by `manage.py build_semantic_index`, which also trains the
+IVF coarse quantizer (spherical k-means) offline. Vectors are stored as
+float16, grouped by inverted list and memory-mapped at load; a query
+embeds once, picks the `nprobe` nearest centroids and scans only those
+lists, so latency tracks list size rather than corpus size.
+
+Semantic mode is off unless SEARCH_SEMANTIC_MODEL is set and an index
+has been built. Documents written after the offline build are found
+lexically until the next one.
+
+Author: Vikram Bhojanala
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# ——— Corpus ———
+SEMANTIC_TYPES = ("post", "club", "event")   # Users are matched lexically only
+
+# ——— IVF Index ———
+NPROBE = 8                  # Inverted lists scanned per query
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 100_000     # Vectors the quantizer is trained on
+ASSIGN_BATCH = 65_536       # Vectors assigned to lists per matmul
+
+# ——— Fusion ———
+RRF_K = 60                  # Rank offset; dampens the weight of the very top ranks
+SEMANTIC_CANDIDATES = 100   # Nearest neighbours fused with the lexical hits
+QUERY_EMBED_CACHE = 1024    # Query embeddings kept per process
+
+
+def default_lists(n: int) -> int:
+    """About sqrt(n) inverted lists, the usual IVF trade-off."""
+    return int(min(max(np.sqrt(n), 1), 4096))
+
+
+def rrf(rankings: Sequence[Sequence[Hashable]], k: int = RRF_K) -> List[Tuple[Hashable, float]]:
+    """
+    Fuses ranked key lists: each key scores sum(1 / (k + rank)) over the
+    lists it appears in (rank from 1). Returns (key, score), best first.
+    """
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])
+
+
+# ————— Embedding ————— #
+
+class Embedder:
+    """
+    CPU sentence-transformers model producing L2-normalized float32
+    vectors. Query embeddings are memoized.
+    """
+
+    def __init__(self, model_name: str) -> None:
+        from sentence_transformers import SentenceTransformer  # Optional dependency
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self._queries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=True,
+            convert_to_numpy=True, show_progress_bar=False,
+        ).astype(np.float32)
+
+    def encode_query(self, query: str) -> np.ndarray:
+        with self._lock:
+            vec = self._queries.get(query)
+        if vec is None:
+            vec = self.encode([query])[0]
+            with self._lock:
+                self._queries[query] = vec
+                if len(self._queries) > QUERY_EMBED_CACHE:
+                    self._queries.popitem(last=False)
+        return vec
+
+
+def document_text(fields: Dict[str, str]) -> str:
+    """The text embedded for a document: its indexed fields, title first."""
+    return " ".join(value for value in fields.values() if value)
+
+
+# ————— Index ————— #
+
+class SemanticIndex:
+    """
+    IVF index over float16 document vectors. Rows are grouped by inverted
+    list; list l holds rows list_offsets[l]:list_offsets[l + 1]. Each row
+    carries the same (id, type, date, flags) attributes as the lexical
+    index, so search filters apply unchanged.
+    """
+
+    def __init__(self, centroids: np.ndarray, vectors: np.ndarray, list_offsets: np.ndarray,
+                 doc_ids: np.ndarray, doc_types: np.ndarray, doc_dates: np.ndarray,
+                 doc_flags: np.ndarray, model_name: str,
+                 built_at: Optional[datetime] = None) -> None:
+        self.centroids = centroids
+        self.vectors = vectors
+        self.list_offsets = list_offsets
+        self.doc_ids = doc_ids
+        self.doc_types = doc_types
+        self.doc_dates = doc_dates
+        self.doc_flags = doc_flags
+        self.model_name = model_name
+        self.built_at = built_at
+        self.embedder: Optional[Embedder] = None
+        self.nprobe = NPROBE
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    # ————— Building ————— #
+    @classmethod
+    def build(cls, vectors: np.ndarray, doc_ids: np.ndarray, doc_types: np.ndarray,
+              doc_dates: np.ndarray, doc_flags: np.ndarray, model_name: str,
+              lists: Optional[int] = None, seed: int = 0) -> "SemanticIndex":
+        """
+        Trains the coarse quantizer on normalized `vectors` and groups
+        the rows by their nearest centroid.
+        """
+        n = len(vectors)
+        centroids = cls._train(vectors, lists or default_lists(n), seed)
+        assign = cls._assign(vectors, centroids)
+
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=len(centroids))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        return cls(
+            centroids, vectors[order].astype(np.float16), offsets,
+            np.asarray(doc_ids, dtype=np.int64)[order], np.asarray(doc_types, dtype=np.int8)[order],
+            np.asarray(doc_dates, dtype=np.int64)[order], np.asarray(doc_flags, dtype=np.uint8)[order],
+            model_name, datetime.now(timezone.utc),
+        )
+
+    @staticmethod
+    def _train(vectors: np.ndarray, lists: int, seed: int) -> np.ndarray:
+        """Spherical k-means (Lloyd iterations on a sample)."""
+        rng = np.random.default_rng(seed)
+        n = len(vectors)
+        if n == 0:
+            return np.zeros((1, vectors.shape[1]), dtype=np.float32)
+
+        sample = vectors[rng.choice(n, size=min(n, KMEANS_SAMPLE), replace=False)]
+        lists = min(lists, len(sample))
+        centroids = sample[rng.choice(len(sample), size=lists, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]  # Keep centroids that lost every member
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        return centroids.astype(np.float32)
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assign = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), ASSIGN_BATCH):
+            batch = vectors[start:start + ASSIGN_BATCH]
+            assign[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+        return assign
+
+    # ————— Search ————— #
+    def nearest(self, qvec: np.ndarray, k: int,
+                keep: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> List[Tuple[int, int]]:
+        """
+        Returns up to k (type code, pk) pairs, most similar first, scanning
+        the nprobe nearest lists. `keep(rows)` narrows candidates to rows
+        passing the search filters.
+        """
+        nprobe = min(self.nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ qvec), nprobe - 1)[:nprobe]
+        rows = np.concatenate([
+            np.arange(self.list_offsets[l], self.list_offsets[l + 1]) for l in probe
+        ])
+        if keep is not None and len(rows):
+            rows = rows[keep(rows)]
+        if not len(rows):
+            return []
+
+        sims = self.vectors[rows].astype(np.float32) @ qvec
+        if len(rows) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            rows, sims = rows[top], sims[top]
+        order = np.argsort(-sims, kind="stable")
+        return [(int(self.doc_types[rows[i]]), int(self.doc_ids[rows[i]])) for i in order]
+
+    def query(self, text: str, k: int = SEMANTIC_CANDIDATES,
+              keep: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> List[Tuple[int, int]]:
+        return self.nearest(self.embedder.encode_query(text), k, keep)
+
+    # ————— Persistence ————— #
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True)
+        for name in ("centroids", "vectors", "list_offsets",
+                     "doc_ids", "doc_types", "doc_dates", "doc_flags"):
+            np.save(directory / f"{name}.npy", getattr(self, name))
+        (directory / "manifest.json").write_text(json.dumps({
+            "model":      self.model_name,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "documents":  len(self.doc_ids),
+            "dimension":  int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+            "lists":      len(self.centroids),
+        }), encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory: Path) -> "SemanticIndex":
+        manifest = json.loads((directory / "manifest.json").read_text(encoding="utf-8"))
+        arrays = {
+            name: np.load(directory / f"{name}.npy", mmap_mode=None if name == "centroids" else "r")
+            for name in ("centroids", "vectors", "list_offsets",
+                         "doc_ids", "doc_types", "doc_dates", "doc_flags")
+        }
+        return cls(**arrays, model_name=manifest["model"],
+                   built_at=datetime.fromisoformat(manifest["created_at"]))
+
+
+# ————— Singleton & Access Helpers ————— #
+
+_semantic: Optional[SemanticIndex] = None
+_semantic_dir: Optional[Path] = None       # Version _semantic was loaded from
+
+def semantic_index() -> Optional[SemanticIndex]:
+    """Returns the installed semantic index, or None (lexical search only)."""
+    return _semantic
+
+def load_semantic_index() -> Optional[SemanticIndex]:
+    """
+    Installs the newest index under SEARCH_SEMANTIC_DIR with its embedding
+    model. Stays off without SEARCH_SEMANTIC_MODEL, an index, or
+    sentence-transformers; an index built with another model is refused.
+    """
+    global _semantic, _semantic_dir
+    from django.conf import settings
+    from .engine import current_index_dir
+
+    model_name = getattr(settings, "SEARCH_SEMANTIC_MODEL", None)
+    directory = current_index_dir(settings.SEARCH_SEMANTIC_DIR) if model_name else None
+    if directory is None or directory == _semantic_dir:
+        return _semantic    # Nothing built, or already serving this version
+
+    index = SemanticIndex.load(directory)
+    if index.model_name != model_name:
+        raise ValueError(f"Semantic index {directory} was built with {index.model_name!r}, not {model_name!r}.")
+
+    try:
+        index.embedder = _semantic.embedder if _semantic and _semantic.model_name == model_name else Embedder(model_name)
+    except ImportError:
+        logger.warning("[Semantic] sentence-transformers is not installed; semantic search disabled.")
+        return None
+
+    _semantic, _semantic_dir = index, directory
+    logger.info("[Semantic] Loaded %d vectors from %s.", len(index), directory)
+    return _semantic
+
+
+# ————— Offline Build ————— #
+
+def build_semantic_index(model_name: str, lists: Optional[int] = None,
+                         batch_size: int = 256) -> SemanticIndex:
+    """
+    Embeds every post, club and event and builds the IVF index.
+    """
+    from .engine import DOC_TYPES, corpus_querysets, document_fields, document_attrs
+
+    embedder = Embedder(model_name)
+    querysets = corpus_querysets()
+    vectors: List[np.ndarray] = []
+    ids, types, dates, flags = [], [], [], []
+    texts: List[str] = []
+
+    def flush() -> None:
+        if texts:
+            vectors.append(embedder.encode(texts, batch_size=64))
+            texts.clear()
+
+    for doc_type in SEMANTIC_TYPES:
+        code = DOC_TYPES.index(doc_type)
+        for obj in querysets[doc_type].iterator(chunk_size=2000):
+            texts.append(document_text(document_fields(doc_type, obj)))
+            date, bits = document_attrs(doc_type, obj)
+            ids.append(obj.pk)
+            types.append(code)
+            dates.append(date)
+            flags.append(bits)
+            if len(texts) >= batch_size:
+                flush()
+    flush()
+
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, embedder.dimension), dtype=np.float32)
+    return SemanticIndex.build(matrix, np.array(ids), np.array(types), np.array(dates),
+                               np.array(flags), model_name, lists=lists)
@@ -0,0 +1,253 @@
+"""
+apps/search/service.py
+
+Optional search sidecar: one local process owns the SearchEngine and
+answers every worker on the host over a Unix socket.
+
+Without it each ASGI/WSGI worker holds (and builds) its own index, so
+memory and rebuild work grow with the worker count. With
+SEARCH_SERVICE_SOCKET set, workers install a RemoteSearchEngine instead:
+a thin client exposing the same search / correction / update methods,
+so engine(), search(), correct() and the signal handlers are unchanged.
+
+Wire format: each frame is a 4-byte big-endian length followed by JSON.
+A request frame carries a list of calls, [[method, args], ...]; the
+reply carries one {"ok": value} or {"error": message} per call, in order.
+Several calls therefore share one round trip (e.g. correcting every
+token of a query), and each thread keeps its connection open between
+requests.
+
+Run the sidecar with `manage.py run_search_service`.
+
+Author: Vikram Bhojanala
+"""
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .engine import SearchEngine, Document, engine, index_metrics, _apply
+
+logger = logging.getLogger(__name__)
+
+# ——— Protocol ———
+HEADER = struct.Struct("!I")        # Frame length prefix
+MAX_FRAME_BYTES = 16 * 1024 * 1024  # Refuse larger frames (corrupt or hostile peers)
+DEFAULT_TIMEOUT = 2.0               # Seconds a worker waits for the sidecar
+
+# Methods a client may call, and whether they write to the index
+READ_METHODS = {"search", "correct_query", "correct_word", "index_metrics"}
+WRITE_METHODS = {"upsert", "remove"}
+
+
+class SearchServiceError(RuntimeError):
+    """
+    The sidecar is unreachable or rejected a call. Subclasses RuntimeError
+    so callers treat it like an uninitialized engine.
+    """
+
+
+# ————— Framing ————— #
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = sock.recv(min(remaining, 65536))
+        if not chunk:
+            raise ConnectionError("Search service connection closed.")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_frame(sock: socket.socket, payload: Any) -> None:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    sock.sendall(HEADER.pack(len(body)) + body)
+
+
+def recv_frame(sock: socket.socket) -> Any:
+    (size,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if size > MAX_FRAME_BYTES:
+        raise ConnectionError(f"Search service frame too large ({size} bytes).")
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+
+# ————— Server ————— #
+
+def _dispatch(se: SearchEngine, method: str, args: List[Any]) -> Any:
+    """
+    Runs one call against the engine and returns a JSON-serializable result.
+    Writes take the same journaled path as in-process ones (engine._apply),
+    so a rebuild running in this process replays them before its swap.
+    """
+    if method == "search":
+        return [[doc.type, doc.id, score] for doc, score in se.search(*args)]
+    if method == "index_metrics":
+        return index_metrics()
+    if method == "upsert":
+        doc_type, pk, fields, attrs = args
+        return _apply("upsert", doc_type, pk, fields, tuple(attrs))
+    if method in WRITE_METHODS:
+        return _apply(method, *args)
+    if method in READ_METHODS:
+        return getattr(se, method)(*args)
+    raise ValueError(f"Unknown search service method {method!r}.")
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Serves calls on one worker connection until it closes."""
+
+    def handle(self) -> None:
+        while True:
+            try:
+                calls = recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            # Resolved per frame: a background rebuild may have swapped the index
+            se = engine()
+            replies = []
+            for method, args in calls:
+                try:
+                    replies.append({"ok": _dispatch(se, method, args)})
+                except Exception as e:
+                    logger.exception("[SearchService] %s failed.", method)
+                    replies.append({"error": f"{type(e).__name__}: {e}"})
+
+            try:
+                send_frame(self.request, replies)
+            except OSError:
+                return
+
+
+class SearchServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Threaded Unix socket server for the global SearchEngine of this process.
+    """
+    daemon_threads = True
+
+    def __init__(self, path: Path) -> None:
+        path = Path(path)
+        if path.exists():
+            path.unlink()  # Stale socket from a previous run
+        path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(str(path), _Handler)
+        os.chmod(path, 0o660)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+# ————— Client ————— #
+
+class RemoteSearchEngine:
+    """
+    Client for the search sidecar with the query and update interface of
+    SearchEngine. Each thread reuses one connection; a broken connection
+    is reopened once before the call fails.
+    """
+
+    def __init__(self, path: Path, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    # ————— Transport ————— #
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self._local.sock = sock
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call_many(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Any]:
+        """
+        Sends several calls in one frame and returns their results in order.
+        Raises SearchServiceError if the sidecar is unreachable or any call failed.
+        """
+        payload = [[method, list(args)] for method, args in calls]
+        for attempt in (1, 2):
+            try:
+                sock = getattr(self._local, "sock", None) or self._connect()
+                send_frame(sock, payload)
+                replies = recv_frame(sock)
+                break
+            except (OSError, ValueError) as e:
+                self._close()
+                if attempt == 2:
+                    raise SearchServiceError(f"Search service at {self.path} unavailable: {e}") from e
+
+        results = []
+        for reply in replies:
+            if "error" in reply:
+                raise SearchServiceError(reply["error"])
+            results.append(reply["ok"])
+        return results
+
+    def call(self, method: str, *args: Any) -> Any:
+        return self.call_many([(method, args)])[0]
+
+    # ————— SearchEngine Interface ————— #
+    def search(self, query: str, top_k: int = 20, early_termination: bool = True,
+               types: Optional[Iterable[str]] = None, since: Optional[int] = None,
+               until: Optional[int] = None, featured: Optional[bool] = None,
+               rerank: bool = True, semantic: bool = True) -> List[Tuple[Document, float]]:
+        hits = self.call("search", query, top_k, early_termination,
+                         list(types) if types is not None else None, since, until, featured,
+                         rerank, semantic)
+        return [(Document(id=pk, type=doc_type), score) for doc_type, pk, score in hits]
+
+    def correct_query(self, query: str, threshold: int = 80) -> str:
+        return self.call("correct_query", query, threshold)
+
+    def correct_word(self, token: str, threshold: int = 80) -> str:
+        return self.call("correct_word", token, threshold)
+
+    def correct_words(self, tokens: Sequence[str], threshold: int = 80) -> List[str]:
+        """Corrects several tokens in a single round trip."""
+        if not tokens:
+            return []
+        return self.call_many([("correct_word", (token, threshold)) for token in tokens])
+
+    def upsert(self, doc_type: str, pk: int, fields: Dict[str, str],
+               attrs: Tuple[int, int] = (0, 0)) -> None:
+        # Index writes run in on_commit hooks: an unreachable sidecar must not fail the save
+        try:
+            self.call("upsert", doc_type, pk, fields, list(attrs))
+        except SearchServiceError as e:
+            logger.warning("[SearchService] Dropped upsert of %s %s: %s", doc_type, pk, e)
+
+    def remove(self, doc_type: str, pk: int) -> None:
+        try:
+            self.call("remove", doc_type, pk)
+        except SearchServiceError as e:
+            logger.warning("[SearchService] Dropped removal of %s %s: %s", doc_type, pk, e)
+
+
+def service_socket() -> Optional[Path]:
+    """
+    Returns the configured sidecar socket path, or None for in-process mode.
+    """
+    from django.conf import settings
+    path = getattr(settings, "SEARCH_SERVICE_SOCKET", None)
+    return Path(path) if path else None
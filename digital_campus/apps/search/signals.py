@@ -0,0 +1,123 @@
+"""
+apps/search/signals.py
+
+Keeps the global SearchEngine and autocomplete SuggestIndex in sync with
+Post, User, Profile, Club and Event writes, and bumps the query cache
+generation of the written type. Index updates run after the surrounding
+transaction commits, so rolled-back rows never reach them. The engine
+module (and its scientific stack) is only imported once a warm-up has
+started; before that there is no index to update.
+
+Author: Vikram Bhojanala
+"""
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.posts.models import Post, PostOwnership
+from apps.users.models import Profile
+from apps.clubs.models import Club
+from apps.events.models import Event
+from .cache import bump_generation
+from .warmup import started
+from .suggest import (
+    index_suggestion, remove_suggestion,
+    post_suggestion, user_suggestion, club_suggestion, event_suggestion,
+)
+
+# Saves touching only other fields (e.g. last_login) leave the indexed text unchanged
+USER_INDEXED_FIELDS = {"username", "first_name", "last_name"}
+
+
+def index_document(doc_type, obj):
+    if started():
+        from .engine import index_document
+        index_document(doc_type, obj)
+
+
+def remove_document(doc_type, pk):
+    if started():
+        from .engine import remove_document
+        remove_document(doc_type, pk)
+
+
+# ————— Posts ————— #
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    transaction.on_commit(lambda: index_document("post", instance))
+    transaction.on_commit(lambda: index_suggestion(post_suggestion, instance))
+    transaction.on_commit(lambda: bump_generation("post"))
+
+
+@receiver(post_save, sender=PostOwnership)
+def index_post_ownership(sender, instance, **kwargs):
+    # Club posts are also matched on the club's name
+    transaction.on_commit(lambda: index_document("post", instance.post))
+    transaction.on_commit(lambda: bump_generation("post"))
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_document("post", pk))
+    transaction.on_commit(lambda: remove_suggestion("Post", pk))
+    transaction.on_commit(lambda: bump_generation("post"))
+
+
+# ————— Users ————— #
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not USER_INDEXED_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(lambda: index_document("user", instance))
+    transaction.on_commit(lambda: index_suggestion(user_suggestion, instance))
+    transaction.on_commit(lambda: bump_generation("user"))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def unindex_user(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_document("user", pk))
+    transaction.on_commit(lambda: remove_suggestion("User", pk))
+    transaction.on_commit(lambda: bump_generation("user"))
+
+
+@receiver(post_save, sender=Profile)
+def index_profile(sender, instance, **kwargs):
+    # Bio is a ranked field; avatar changes: posts and events resolve their image through this entry
+    transaction.on_commit(lambda: index_document("user", instance.user))
+    transaction.on_commit(lambda: index_suggestion(user_suggestion, instance.user))
+    transaction.on_commit(lambda: bump_generation("user"))
+
+
+# ————— Clubs & Events ————— #
+@receiver(post_save, sender=Club)
+def index_club(sender, instance, **kwargs):
+    transaction.on_commit(lambda: index_document("club", instance))
+    transaction.on_commit(lambda: index_suggestion(club_suggestion, instance))
+    transaction.on_commit(lambda: bump_generation("club"))
+
+
+@receiver(post_delete, sender=Club)
+def unindex_club(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_document("club", pk))
+    transaction.on_commit(lambda: remove_suggestion("Club", pk))
+    transaction.on_commit(lambda: bump_generation("club"))
+
+
+@receiver(post_save, sender=Event)
+def index_event(sender, instance, **kwargs):
+    transaction.on_commit(lambda: index_document("event", instance))
+    transaction.on_commit(lambda: index_suggestion(event_suggestion, instance))
+    transaction.on_commit(lambda: bump_generation("event"))
+
+
+@receiver(post_delete, sender=Event)
+def unindex_event(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_document("event", pk))
+    transaction.on_commit(lambda: remove_suggestion("Event", pk))
+    transaction.on_commit(lambda: bump_generation("event"))
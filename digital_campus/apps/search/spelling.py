@@ -0,0 +1,103 @@
+"""
+apps/search/spelling.py
+
+SymSpell-style spell correction for search queries.
+
+Every dictionary word is indexed under all strings reachable by deleting
+up to `max_distance` characters from its prefix. A lookup generates the
+same deletes for the query token and only verifies the handful of words
+sharing one, so correction cost does not depend on dictionary size.
+
+Author: Vikram Bhojanala
+"""
+
+import threading
+from typing import Dict, List, Optional, Set
+from rapidfuzz import fuzz
+from rapidfuzz.distance import Levenshtein
+
+
+# ——— Index Parameters ———
+MAX_EDIT_DISTANCE = 2   # Largest edit distance considered a typo
+PREFIX_LENGTH = 7       # Only the prefix is expanded into deletes (bounds memory)
+
+
+class SpellIndex:
+    """
+    Deletion index over a dictionary of words with frequencies.
+    Safe to extend while other threads are looking words up.
+    """
+
+    def __init__(self, max_distance: int = MAX_EDIT_DISTANCE,
+                 prefix_length: int = PREFIX_LENGTH) -> None:
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words: Dict[str, int] = {}           # word -> frequency
+        self._deletes: Dict[str, List[str]] = {}  # delete variant -> words
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    # ————— Building ————— #
+    def add(self, word: str, count: int = 1) -> None:
+        """
+        Adds `word` to the dictionary, or bumps its frequency if known.
+        """
+        with self._lock:
+            if word in self.words:
+                self.words[word] += count
+                return
+
+            self.words[word] = count
+            for variant in self._variants(word):
+                self._deletes.setdefault(variant, []).append(word)
+
+    def _variants(self, word: str) -> Set[str]:
+        """
+        Returns the word's prefix plus every string reachable from it
+        by deleting up to max_distance characters.
+        """
+        prefix = word[:self.prefix_length]
+        variants = {prefix}
+        frontier = {prefix}
+
+        for _ in range(self.max_distance):
+            frontier = {
+                w[:i] + w[i + 1:]
+                for w in frontier if len(w) > 1
+                for i in range(len(w))
+            }
+            variants |= frontier
+
+        return variants
+
+    # ————— Lookup ————— #
+    def lookup(self, token: str, score_cutoff: float = 0) -> Optional[str]:
+        """
+        Returns the closest known word to `token` (fewest edits, then most
+        frequent), or None if nothing is within max_distance edits or the
+        match scores below `score_cutoff` (RapidFuzz ratio, 0–100).
+        """
+        if token in self.words:
+            return token
+
+        best, best_key = None, None
+        for variant in self._variants(token):
+            for candidate in self._deletes.get(variant, ()):
+                distance = Levenshtein.distance(token, candidate, score_cutoff=self.max_distance)
+                if distance > self.max_distance:
+                    continue
+                key = (distance, -self.words[candidate])
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+
+        if best is not None and fuzz.ratio(token, best) >= score_cutoff:
+            return best
+        return None
+
+    def correct(self, token: str, score_cutoff: float = 0) -> str:
+        """
+        Returns the correction for `token`, or the token itself.
+        """
+        return self.lookup(token, score_cutoff) or token
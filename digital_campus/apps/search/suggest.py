@@ -0,0 +1,350 @@
+"""
+apps/search/suggest.py
+
+In-memory prefix index powering the /autocomplete endpoint.
+
+Post titles, usernames, club names and event titles are indexed under
+every word they contain (a sorted key list searched with bisect), next to
+a precomputed display payload. A keystroke is answered from memory with
+no database access.
+
+Each worker holds its own index. Its signal handlers keep it current
+with its own writes; writes made in other workers show up as newer
+query-cache generations (cache.py), and an index built before those is
+rebuilt in the background, at most every SUGGEST_REFRESH seconds. The
+index is never built inside a request: until the first build finishes,
+autocomplete answers with no suggestions.
+
+Avatars are resolved at response time, through the owning user/club
+entry, so profile picture changes and expiring storage URLs never leave
+stale links behind.
+
+Author: Vikram Bhojanala
+"""
+
+import re
+import time
+import bisect
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import localtime
+
+logger = logging.getLogger(__name__)
+
+# ——— Lookup Limits ———
+SUGGEST_TYPES = ("Post", "User", "Club", "Event")   # Response order
+PER_TYPE_LIMIT = 5
+MAX_SCAN = 500          # Keys inspected per lookup, bounds very short prefixes
+SNIPPET_CHARS = 50
+SUGGEST_REFRESH = 60    # Minimum seconds between rebuilds for writes made in other workers
+SUGGEST_DOC_TYPES = ("post", "user", "club", "event")   # Generations the index follows
+
+DEFAULT_IMAGE = "digital_campus/images/default.jpg"
+
+
+@dataclass
+class Suggestion:
+    """
+    One autocomplete entry with its precomputed display payload.
+
+    `image` is a (storage, name) pair for entries owning an avatar;
+    `image_of` points posts and events at the entry whose avatar they show.
+    """
+    type: str
+    pk: int
+    label: str
+    url: str
+    tokens: Tuple[str, ...]
+    subtitle: str = ""
+    snippet: str = ""
+    image: Optional[Tuple[Any, str]] = None
+    image_of: Optional[Tuple[str, int]] = None
+
+
+def _tokens(text: str) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(re.findall(r"\w+", text.lower())))
+
+
+def _snippet(text: str) -> str:
+    return (text[:SNIPPET_CHARS] + '…') if len(text) > SNIPPET_CHARS else text
+
+
+def _file(field: Any) -> Optional[Tuple[Any, str]]:
+    return (field.storage, field.name) if field else None
+
+
+# ————— Payload Builders ————— #
+
+def post_suggestion(post: Any) -> Suggestion:
+    return Suggestion(
+        type="Post",
+        pk=post.pk,
+        label=post.title,
+        url=reverse('posts:post-detail', args=[post.pk]),
+        tokens=_tokens(post.title),
+        subtitle=f"Posted By: {post.author.username}",
+        snippet=_snippet(post.content),
+        image_of=("User", post.author_id),
+    )
+
+
+def user_suggestion(user: Any) -> Suggestion:
+    try:
+        image = _file(user.profile.image)
+    except Exception:  # Profile not created yet (its own signal fills this in)
+        image = None
+
+    return Suggestion(
+        type="User",
+        pk=user.pk,
+        label=user.username,
+        url=reverse('common:user-posts', args=[user.username]),
+        tokens=_tokens(user.username),
+        image=image,
+    )
+
+
+def club_suggestion(club: Any) -> Suggestion:
+    return Suggestion(
+        type="Club",
+        pk=club.pk,
+        label=club.name,
+        url=reverse('clubs:club-detail', args=[club.slug]),
+        tokens=_tokens(club.name),
+        snippet=_snippet(club.description),
+        image=_file(club.avatar),
+    )
+
+
+def event_suggestion(event: Any) -> Suggestion:
+    host = event.club if event.club_id else event.created_by
+    when = localtime(event.starts_at).strftime('%b %d, %I:%M %p')
+    return Suggestion(
+        type="Event",
+        pk=event.pk,
+        label=event.title,
+        url=reverse('events:event-detail', args=[event.pk]),
+        tokens=_tokens(event.title),
+        subtitle=f"{event.location or '—'} · {when}  · {host}",
+        snippet=_snippet(event.description),
+        image_of=("Club", event.club_id) if event.club_id else ("User", event.created_by_id),
+    )
+
+
+# ————— Index ————— #
+
+class SuggestIndex:
+    """
+    Sorted (token, type, pk) keys over all entries; a prefix lookup is a
+    bisect plus a short forward scan.
+    """
+
+    def __init__(self) -> None:
+        self._keys: List[Tuple[str, str, int]] = []
+        self._entries: Dict[Tuple[str, int], Suggestion] = {}
+        self._lock = threading.Lock()
+        self.generations: Tuple[int, ...] = ()   # SUGGEST_DOC_TYPES generations built from
+        self.built_at = 0.0                      # time.monotonic() of the build
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def build(self, suggestions: List[Suggestion]) -> None:
+        """
+        Replaces the whole index in one sort.
+        """
+        entries = {(s.type, s.pk): s for s in suggestions}
+        keys = sorted((token, s.type, s.pk) for s in entries.values() for token in s.tokens)
+        with self._lock:
+            self._entries, self._keys = entries, keys
+
+    def add(self, s: Suggestion) -> None:
+        with self._lock:
+            self._discard(s.type, s.pk)
+            self._entries[(s.type, s.pk)] = s
+            for token in s.tokens:
+                bisect.insort(self._keys, (token, s.type, s.pk))
+
+    def remove(self, type: str, pk: int) -> None:
+        with self._lock:
+            self._discard(type, pk)
+
+    def _discard(self, type: str, pk: int) -> None:
+        old = self._entries.pop((type, pk), None)
+        if old is None:
+            return
+        for token in old.tokens:
+            i = bisect.bisect_left(self._keys, (token, type, pk))
+            if i < len(self._keys) and self._keys[i] == (token, type, pk):
+                del self._keys[i]
+
+    # ————— Lookup ————— #
+    def lookup(self, term: str, viewer_pk: Optional[int] = None,
+               limit: int = PER_TYPE_LIMIT) -> List[Dict[str, Any]]:
+        """
+        Returns up to `limit` payloads per type whose label has a word
+        starting with each word of `term`, grouped in SUGGEST_TYPES order.
+        """
+        return self.payloads(self.match(term, limit), viewer_pk)
+
+    def match(self, term: str, limit: int = PER_TYPE_LIMIT) -> List[Tuple[str, int]]:
+        """
+        Returns the (type, pk) keys of lookup(), without building payloads.
+        """
+        words = _tokens(term)
+        if not words:
+            return []
+
+        # Scan on the longest (most selective) word, verify the rest
+        anchor = max(words, key=len)
+        found: Dict[str, List[Tuple[str, int]]] = {t: [] for t in SUGGEST_TYPES}
+
+        with self._lock:
+            i = bisect.bisect_left(self._keys, (anchor,))
+            end = min(len(self._keys), i + MAX_SCAN)
+            seen = set()
+
+            while i < end and self._keys[i][0].startswith(anchor):
+                _, type, pk = self._keys[i]
+                i += 1
+                if (type, pk) in seen or len(found[type]) >= limit:
+                    continue
+                seen.add((type, pk))
+
+                s = self._entries[(type, pk)]
+                if all(any(t.startswith(w) for t in s.tokens) for w in words):
+                    found[type].append((type, pk))
+
+        return [key for type in SUGGEST_TYPES for key in found[type]]
+
+    def payloads(self, keys: List[Tuple[str, int]],
+                 viewer_pk: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Builds the JSON payloads of `keys`, skipping entries removed since.
+        """
+        with self._lock:
+            return [
+                self._payload(self._entries[key], viewer_pk)
+                for key in keys if key in self._entries
+            ]
+
+    def _payload(self, s: Suggestion, viewer_pk: Optional[int]) -> Dict[str, Any]:
+        """
+        Builds the JSON payload; caller must hold the lock.
+        """
+        image = s.image
+        if s.image_of is not None:
+            owner = self._entries.get(s.image_of)
+            image = owner.image if owner else None
+
+        url = s.url
+        if s.type == "User" and s.pk == viewer_pk:
+            url = reverse('profile')
+
+        payload = {
+            'label': s.label,
+            'value': s.label,
+            'type':  s.type,
+            'url':   url,
+            'image': image[0].url(image[1]) if image else static(DEFAULT_IMAGE),
+        }
+        if s.subtitle:
+            payload['subtitle'] = s.subtitle
+        if s.snippet:
+            payload['snippet'] = s.snippet
+        return payload
+
+
+# ————— Singleton & Access Helpers ————— #
+
+_suggest_singleton: Optional[SuggestIndex] = None
+_build_lock = threading.Lock()
+
+def build_suggest_index() -> SuggestIndex:
+    """
+    Builds a SuggestIndex from the database, stamped with the generations
+    read before the rows, so writes landing meanwhile trigger a refresh.
+    """
+    from django.contrib.auth.models import User
+    from apps.posts.models import Post
+    from apps.clubs.models import Club
+    from apps.events.models import Event
+    from .cache import generations
+
+    current = generations(SUGGEST_DOC_TYPES)
+    suggestions = [
+        post_suggestion(p)
+        for p in Post.objects.select_related("author").iterator(chunk_size=2000)
+    ]
+    suggestions += [
+        user_suggestion(u)
+        for u in User.objects.select_related("profile").iterator(chunk_size=2000)
+    ]
+    suggestions += [club_suggestion(c) for c in Club.objects.iterator(chunk_size=2000)]
+    suggestions += [
+        event_suggestion(e)
+        for e in Event.objects.select_related("club", "created_by").iterator(chunk_size=2000)
+    ]
+
+    index = SuggestIndex()
+    index.build(suggestions)
+    index.generations, index.built_at = current, time.monotonic()
+    return index
+
+def _rebuild() -> None:
+    """
+    Builds a fresh global SuggestIndex and swaps it in; a no-op while
+    another build is running.
+    """
+    global _suggest_singleton
+    if not _build_lock.acquire(blocking=False):
+        return
+
+    from django.db import close_old_connections
+    try:
+        _suggest_singleton = build_suggest_index()
+        logger.info("[SuggestIndex] Built with %d entries.", len(_suggest_singleton))
+    except Exception:
+        logger.exception("[SuggestIndex] Build failed.")
+    finally:
+        close_old_connections()
+        _build_lock.release()
+
+def warm_suggester() -> None:
+    """
+    Builds the global SuggestIndex in a background thread.
+    """
+    threading.Thread(target=_rebuild, name="suggest-warmup", daemon=True).start()
+
+def suggester() -> Optional[SuggestIndex]:
+    """
+    Returns the global SuggestIndex, or None until its first build
+    finishes (starting one in the background if none is running).
+    """
+    if _suggest_singleton is None and not _build_lock.locked():
+        warm_suggester()
+    return _suggest_singleton
+
+def refresh_suggester(index: SuggestIndex, current: Tuple[int, ...]) -> None:
+    """
+    Rebuilds in the background if `index` predates the `current`
+    SUGGEST_DOC_TYPES generations, i.e. some worker wrote since, and was
+    built at least SUGGEST_REFRESH seconds ago.
+    """
+    if (current != index.generations and index is _suggest_singleton
+            and time.monotonic() - index.built_at >= SUGGEST_REFRESH and not _build_lock.locked()):
+        warm_suggester()
+
+def index_suggestion(build: Callable[[Any], Suggestion], obj: Any) -> None:
+    """Adds or replaces obj's entry in the global index, if built."""
+    if _suggest_singleton is not None:
+        _suggest_singleton.add(build(obj))
+
+def remove_suggestion(type: str, pk: int) -> None:
+    """Removes an entry from the global index, if built."""
+    if _suggest_singleton is not None:
+        _suggest_singleton.remove(type, pk)
@@ -1,3 +1,431 @@
-from django.test import TestCase
+import json
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import scipy.sparse as sp
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from . import suggest, warmup
+from .cache import GENERATION_CACHE, QueryCache, bump_generation, generations, query_cache
+from .engine import Document, SearchEngine, current_index_dir, write_index
+from .scoring import build_term_matrix, final_score, relevance_scores, score_batch, to_timestamps
+from .spelling import SpellIndex
+from .suggest import MAX_SCAN, SUGGEST_REFRESH, SuggestIndex, Suggestion, _tokens
+
+VOCABULARY = [f"w{i}" for i in range(60)]
+CREATED = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def club(pk, rng):
+    """An indexable club-like object with random title and description words."""
+    words = lambda n: " ".join(rng.choice(VOCABULARY) for _ in range(n))
+    return SimpleNamespace(pk=pk, name=words(rng.randint(1, 4)), description=words(rng.randint(5, 30)),
+                           created_at=CREATED, is_featured=False)
+
+
+def brute_force(se, query, k):
+    """Top-k (pk, score) by scoring every live row, write buffer included."""
+    terms = se.vectorizer.transform([query]).indices
+    matrix = sp.vstack([se.doc_matrix, *se._pending], format="csr")
+    scores = np.where(se.alive, matrix[:, terms] @ se.idf[terms], 0.0)
+    hits = [(int(se.doc_ids[row]), float(scores[row])) for row in np.flatnonzero(scores > 0)]
+    return sorted(hits, key=lambda hit: -hit[1])[:k]
+
+
+class EngineTestCase(SimpleTestCase):
+    """An engine over a seeded random corpus of clubs, searched lexically only."""
+
+    def setUp(self):
+        self.rng = random.Random(7)
+        self.se = SearchEngine()
+        self.se.build_index({"club": [club(pk, self.rng) for pk in range(1, 301)]})
+
+    def search(self, query, k, se=None):
+        hits = (se or self.se).search(query, top_k=k, rerank=False, semantic=False)
+        return [(doc.id, score) for doc, score in hits]
+
+    def queries(self, n=25):
+        return [" ".join(self.rng.sample(VOCABULARY, self.rng.randint(1, 4))) for _ in range(n)]
+
+    def assertSameTopK(self, got, expected):
+        """Equal scores in order; ties at the k-th score may pick different pks."""
+        self.assertEqual(len(got), len(expected))
+        np.testing.assert_allclose([s for _, s in got], [s for _, s in expected], rtol=1e-9)
+        if expected:
+            cutoff = expected[-1][1] * (1 + 1e-9)
+            self.assertEqual({pk for pk, s in got if s > cutoff}, {pk for pk, s in expected if s > cutoff})
+
+
+class TopKTests(EngineTestCase):
+
+    def test_matches_brute_force(self):
+        for query in self.queries():
+            for k in (1, 5, 20):
+                with self.subTest(query=query, k=k):
+                    self.assertSameTopK(self.search(query, k), brute_force(self.se, query, k))
+
+    def test_exhaustive_scoring_agrees(self):
+        for query in self.queries():
+            exhaustive = self.se.search(query, top_k=10, early_termination=False, rerank=False, semantic=False)
+            self.assertSameTopK(self.search(query, 10), [(doc.id, score) for doc, score in exhaustive])
+
+
+class IncrementalUpdateTests(EngineTestCase):
+
+    def write_some(self):
+        for pk in range(1, 21):
+            self.se.remove("club", pk)
+        for pk in range(21, 31):           # Replaced in place
+            self.se.upsert("club", pk, {"title": "w1 w2", "content": "w3 w3 w3"})
+        for pk in range(1000, 1010):       # New
+            self.se.upsert("club", pk, {"title": "w4", "content": "w5 w6"})
+
+    def test_writes_are_searchable(self):
+        self.write_some()
+        pks = {pk for pk, _ in self.search("w1 w2 w3 w4 w5 w6", 400)}
+        self.assertTrue(pks.isdisjoint(range(1, 21)))
+        self.assertTrue(pks.issuperset(range(21, 31)))
+        self.assertTrue(pks.issuperset(range(1000, 1010)))
+        self.assertEqual(self.se.live_count, 290)
+
+    def test_write_buffer_matches_brute_force(self):
+        self.write_some()
+        for query in self.queries():
+            with self.subTest(query=query):
+                self.assertSameTopK(self.search(query, 10), brute_force(self.se, query, 10))
+
+    def test_compaction_keeps_results(self):
+        self.write_some()
+        queries = self.queries()
+        before = [self.search(query, 10) for query in queries]
+        self.se.compact()
+
+        self.assertEqual(self.se._pending, [])
+        self.assertEqual(len(self.se.alive), 290)
+        self.assertEqual(self.se.live_count, 290)
+        for query, hits in zip(queries, before):
+            with self.subTest(query=query):
+                self.assertSameTopK(self.search(query, 10), hits)
+
+    def test_appends_grow_amortized(self):
+        for pk in range(2000, 2100):
+            self.se.upsert("club", pk, {"title": "w7"})
+        self.assertGreaterEqual(self.se._capacity, len(self.se.alive))
+        self.assertEqual(len(self.se.doc_ids), 400)
+        self.assertEqual(self.se.doc_ids[-1], 2099)
+
+
+class PersistenceTests(EngineTestCase):
+
+    def setUp(self):
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name) / "index"
+
+    def test_memory_mapped_load_matches(self):
+        self.se.upsert("club", 1000, {"title": "w1 w2"})
+        self.se.remove("club", 1)
+        loaded = SearchEngine.load(write_index(self.se, self.root))
+
+        self.assertEqual(loaded.live_count, self.se.live_count)
+        self.assertEqual(loaded.built_at, self.se.built_at)
+        for query in self.queries():
+            with self.subTest(query=query):
+                self.assertSameTopK(self.search(query, 10, se=loaded), self.search(query, 10))
+
+    def test_loaded_index_takes_writes(self):
+        loaded = SearchEngine.load(write_index(self.se, self.root))
+        loaded.upsert("club", 1000, {"title": "w1 w1 w1"})
+        self.assertIn(1000, [pk for pk, _ in self.search("w1", 400, se=loaded)])
+
+    def test_current_points_at_newest_and_old_versions_are_pruned(self):
+        self.assertIsNone(current_index_dir(self.root))
+        written = [write_index(self.se, self.root, keep=2) for _ in range(3)]
+
+        self.assertEqual(current_index_dir(self.root), written[-1])
+        self.assertFalse(written[0].exists())
+        self.assertTrue(written[1].exists())
+
+
+class EngineSpellingTests(EngineTestCase):
+
+    def test_built_with_the_index_not_on_first_query(self):
+        self.assertIn("w17", self.se.spelling.words)
+        with mock.patch.object(SearchEngine, "_spell_index", side_effect=AssertionError("built in request")):
+            self.assertEqual(self.se.correct_query("w17x"), "w17")
+
+    def test_built_on_load(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        loaded = SearchEngine.load(write_index(self.se, Path(tmp.name)))
+        self.assertEqual(loaded.spelling.words, self.se.spelling.words)
+
+    def test_upserted_words_are_correctable(self):
+        self.se.upsert("club", 1000, {"title": "telescope"})
+        self.assertEqual(self.se.correct_query("telescpe"), "telescope")
+
+
+class SpellIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = SpellIndex()
+        for word, count in (("robotics", 5), ("robotic", 1), ("chess", 3), ("chase", 1),
+                            ("engineering", 2)):
+            self.index.add(word, count)
+
+    def test_known_word_is_kept(self):
+        self.assertEqual(self.index.lookup("chess"), "chess")
+
+    def test_corrects_within_two_edits(self):
+        self.assertEqual(self.index.lookup("robotcs"), "robotics")     # Deletion
+        self.assertEqual(self.index.lookup("chesss"), "chess")         # Insertion
+        self.assertEqual(self.index.lookup("cgess"), "chess")          # Substitution
+        self.assertEqual(self.index.lookup("rbootics"), "robotics")    # Two edits
+
+    def test_typo_past_the_prefix(self):
+        self.assertEqual(self.index.lookup("engineerinj"), "engineering")
+
+    def test_fewest_edits_then_most_frequent(self):
+        self.assertEqual(self.index.lookup("chass"), "chess")   # One edit from both; chess is commoner
+        self.assertEqual(self.index.lookup("robotc"), "robotic")     # One edit beats two, however common
+
+    def test_too_far_or_below_cutoff(self):
+        self.assertIsNone(self.index.lookup("xyzzy"))
+        self.assertIsNone(self.index.lookup("robts", score_cutoff=95))
+        self.assertEqual(self.index.correct("xyzzy"), "xyzzy")
+
+    def test_add_bumps_frequency(self):
+        self.index.add("chase", 10)
+        self.assertEqual(self.index.lookup("chass"), "chase")
+        self.assertEqual(len(self.index), 5)
+
+
+def suggestion(type, pk, label):
+    return Suggestion(type=type, pk=pk, label=label, url=f"/{type}/{pk}/", tokens=_tokens(label))
+
+
+class SuggestIndexTests(SimpleTestCase):
+
+    def setUp(self):
+        self.index = SuggestIndex()
+        self.index.build([
+            suggestion("Event", 1, "Robotics Demo Night"),
+            suggestion("Club", 1, "Robotics Club"),
+            suggestion("Post", 1, "New robot arm"),
+            suggestion("Post", 2, "Chess night recap"),
+            suggestion("User", 1, "roberta"),
+        ])
+
+    def test_prefix_matches_grouped_by_type(self):
+        self.assertEqual(
+            self.index.match("rob"),
+            [("Post", 1), ("User", 1), ("Club", 1), ("Event", 1)],
+        )
+
+    def test_every_word_must_match_a_prefix(self):
+        self.assertEqual(self.index.match("robotics n"), [("Event", 1)])
+        self.assertEqual(self.index.match("night"), [("Post", 2), ("Event", 1)])
+        self.assertEqual(self.index.match("robot chess"), [])
+        self.assertEqual(self.index.match("  "), [])
+
+    def test_limit_per_type(self):
+        self.index.build([suggestion("Post", pk, f"robot {pk}") for pk in range(10)]
+                         + [suggestion("Club", 1, "Robotics Club")])
+        found = self.index.match("robot", limit=3)
+        self.assertEqual(len([key for key in found if key[0] == "Post"]), 3)
+        self.assertIn(("Club", 1), found)
+
+    def test_scan_is_bounded(self):
+        self.index.build([suggestion("Post", pk, f"a{pk:04d}") for pk in range(MAX_SCAN + 100)])
+        self.assertLessEqual(len(self.index.match("a", limit=MAX_SCAN * 2)), MAX_SCAN)
+
+    def test_add_replaces_and_remove_drops(self):
+        self.index.add(suggestion("Post", 1, "Chess openings"))
+        self.assertEqual(self.index.match("robot"), [("Club", 1), ("Event", 1)])
+        self.assertEqual(self.index.match("chess"), [("Post", 1), ("Post", 2)])
+
+        self.index.remove("Post", 2)
+        self.assertEqual(self.index.match("chess"), [("Post", 1)])
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.payloads([("Post", 2)]), [])
+
+
+class SuggesterTests(SimpleTestCase):
+
+    def setUp(self):
+        caches[GENERATION_CACHE].clear()
+        self.addCleanup(caches[GENERATION_CACHE].clear)
+        patcher = mock.patch.object(suggest, "warm_suggester")
+        self.warm = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def built(self, age):
+        index = SuggestIndex()
+        index.build([suggestion("Club", 1, "Robotics Club")])
+        index.generations = generations(suggest.SUGGEST_DOC_TYPES)
+        index.built_at = suggest.time.monotonic() - age
+        patcher = mock.patch.object(suggest, "_suggest_singleton", index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return index
+
+    def autocomplete(self, term):
+        from .views import autocomplete
+        request = RequestFactory().get("/search/autocomplete/", {"term": term})
+        request.user = AnonymousUser()
+        return autocomplete(request)
+
+    def test_empty_until_built_never_built_in_request(self):
+        with mock.patch.object(suggest, "build_suggest_index", side_effect=AssertionError("built in request")):
+            self.assertEqual(self.autocomplete("rob").content, b"[]")
+        self.warm.assert_called_once()
+
+    def test_serves_the_built_index(self):
+        self.built(age=0)
+        self.assertEqual([r["label"] for r in json.loads(self.autocomplete("rob").content)], ["Robotics Club"])
+        self.warm.assert_not_called()
+
+    def test_write_elsewhere_triggers_a_throttled_rebuild(self):
+        index = self.built(age=0)
+        bump_generation("club")
+        self.autocomplete("rob")
+        self.warm.assert_not_called()               # Built too recently
+
+        index.built_at -= SUGGEST_REFRESH
+        self.autocomplete("rob")
+        self.warm.assert_called_once()
+
+
+class WarmupCachingTests(SimpleTestCase):
+
+    def setUp(self):
+        caches[GENERATION_CACHE].clear()
+        self.addCleanup(caches[GENERATION_CACHE].clear)
+        query_cache.clear()
+        self.addCleanup(query_cache.clear)
+
+    def results(self, status, se):
+        from .views import search_results
+        with mock.patch.dict(warmup._state, status=status), \
+                mock.patch("apps.search.engine.engine", return_value=se, side_effect=None if se else RuntimeError):
+            return search_results("robotics", "clubs", "", {"since": None, "until": None, "featured": None})
+
+    def test_results_from_warm_up_are_not_served_once_ready(self):
+        self.assertEqual(self.results(warmup.WARMING, None)["ids"], {"clubs": []})
+
+        se = mock.Mock()
+        se.search.return_value = [(Document(id=3, type="club"), 1.0)]
+        se.correct_words.side_effect = lambda tokens, threshold: tokens
+        self.assertEqual(self.results(warmup.READY, se)["ids"], {"clubs": [3]})
+
+
+class MetricsAccessTests(SimpleTestCase):
+
+    def metrics(self, user, token=None):
+        from .views import metrics
+        request = RequestFactory().get("/search/metrics/", headers={"X-Profile": token} if token else {})
+        request.user = user
+        with mock.patch("apps.search.engine.index_metrics", return_value={"index_dir": "/srv/index"}):
+            return metrics(request)
+
+    @override_settings(PROFILING_HEADER_TOKEN="secret")
+    def test_staff_or_token_only(self):
+        staff = SimpleNamespace(is_authenticated=True, is_staff=True)
+        member = SimpleNamespace(is_authenticated=True, is_staff=False)
+        self.assertEqual(self.metrics(AnonymousUser()).status_code, 403)
+        self.assertEqual(self.metrics(member, token="guess").status_code, 403)
+        self.assertEqual(self.metrics(member, token="secret").status_code, 200)
+        self.assertEqual(self.metrics(staff).status_code, 200)
+
+
+class QueryCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        caches[GENERATION_CACHE].clear()
+        self.addCleanup(caches[GENERATION_CACHE].clear)
+        self.cache = QueryCache(maxsize=2)
+        self.computed = 0
+
+    def compute(self):
+        self.computed += 1
+        return [self.computed]
+
+    def test_missing_generations_are_seeded_from_the_clock(self):
+        first = generations(["post", "user"])
+        self.assertEqual(generations(["post", "user"]), first)
+        self.assertGreater(first[0], 10 ** 18)      # Not 0 or 1: never reused after an eviction
+
+    def test_bump_invalidates_only_its_type(self):
+        post, user = generations(["post", "user"])
+        bump_generation("post")
+        self.assertEqual(generations(["post", "user"]), (post + 1, user))
+
+    def test_churn_in_default_cache_keeps_generations(self):
+        first = generations(["post"])
+        default = caches["default"]
+        self.addCleanup(default.clear)
+        for i in range(default._max_entries * 3):       # Enough to cull "default" several times
+            default.set(f"churn:{i}", i)
+        self.assertEqual(generations(["post"]), first)
+
+    def test_bump_seeds_a_missing_counter(self):
+        bump_generation("club")
+        self.assertGreater(generations(["club"])[0], 10 ** 18)
+
+    def test_hits_until_a_type_is_bumped(self):
+        value, gens = self.cache.lookup("q", ["post"], self.compute)
+        self.assertEqual(self.cache.lookup("q", ["post"], self.compute), (value, gens))
+
+        bump_generation("post")
+        value, new_gens = self.cache.lookup("q", ["post"], self.compute)
+        self.assertEqual(value, [2])
+        self.assertNotEqual(new_gens, gens)
+
+    def test_lru_eviction(self):
+        for key in ("a", "b", "a", "c"):
+            self.cache.get_or_compute(key, ["post"], self.compute)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.get_or_compute("a", ["post"], self.compute), [1])
+        self.assertEqual(self.cache.get_or_compute("b", ["post"], self.compute), [4])
+
+
+class BatchScoringTests(SimpleTestCase):
+
+    def setUp(self):
+        rng = random.Random(3)
+        words = [f"{w}z" for w in VOCABULARY]     # None a substring of another, as final_score() matches substrings
+        now = datetime.now(timezone.utc)
+        self.items = [
+            SimpleNamespace(title=" ".join(rng.sample(words, 3)), body=" ".join(rng.sample(words, 8)),
+                            requirements=rng.sample(words, 2), timestamp=now - timedelta(hours=rng.random() * 96))
+            for _ in range(200)
+        ]
+        texts = (f"{item.title} {item.body} {' '.join(item.requirements)}" for item in self.items)
+        self.matrix, self.vocabulary = build_term_matrix(texts)
+        self.timestamps = to_timestamps(item.timestamp for item in self.items)
+
+    def test_matches_final_score(self):
+        for query in ("", "w1z", "w2z w30z w59z", "W7z nothing"):
+            with self.subTest(query=query):
+                expected = [final_score(item, query) for item in self.items]
+                np.testing.assert_allclose(score_batch(self.timestamps, self.matrix, query, self.vocabulary),
+                                           expected, rtol=1e-6)
+
+    def test_relevance_counts_distinct_words(self):
+        scores = relevance_scores(self.matrix, "w1z W1z unknown", self.vocabulary)
+        expected = [0.5 if "w1z" in f"{i.title} {i.body} {' '.join(i.requirements)}".split() else 0.0
+                    for i in self.items]
+        np.testing.assert_array_equal(scores, expected)
+
+    def test_vocabulary_grows(self):
+        matrix, vocabulary = build_term_matrix(["w1z brand-new"], self.vocabulary)
+        self.assertEqual(len(vocabulary), len(self.vocabulary) + 2)
+        self.assertEqual(matrix.shape, (1, len(vocabulary)))
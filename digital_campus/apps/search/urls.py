@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import search, autocomplete
+from .views import search, load_more, autocomplete, metrics, health
 
 
 app_name = "search"
@@ -7,5 +7,8 @@ app_name = "search"
 urlpatterns = [
     # ——— Search ———
     path("search/", search, name="search"),
+    path("search/more/", load_more, name="load-more"),
     path("autocomplete/", autocomplete, name="autocomplete"),
+    path("search/metrics/", metrics, name="metrics"),
+    path("search/health/", health, name="health"),
 ]
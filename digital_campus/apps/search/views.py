@@ -1,27 +1,27 @@
 """
 apps/search/views.py
 
-Implements full-text search and autocomplete using fuzzy matching
-and simple scoring heuristics.
+Implements full-text search and autocomplete on top of the search engine.
 
 Features:
 - Basic query normalization and spell correction
-- Result ranking by relevance
-- Multi-model search across Posts, Users, Clubs, and Events
+- BM25F-ranked results across Posts, Users, Clubs, and Events
+- Type, date-range and featured filters applied inside the engine
+- Bounded candidate sets with per-type cursors and a "load more" endpoint
+- Query result cache (cache.py) invalidated by per-type generations
 - AJAX autocomplete endpoint for real-time suggestions
+- Index metrics endpoint (size, age, rebuild duration) and readiness check
 
 Author: Vikram Bhojanala
 """
 
 import re
 import logging
-from rapidfuzz import process
+from datetime import datetime, time, timezone as dt_timezone
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.db.models import Q
-from django.urls import reverse
-from django.templatetags.static import static
-from django.utils.timezone import localtime
+from django.http import HttpResponseForbidden, JsonResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
 
 # Models
 from django.contrib.auth.models import User
@@ -32,60 +32,214 @@ from apps.events.models import Event
 # Forms
 from .forms import SearchForm
 
+# Metrics access: staff or the X-Profile token, as for /metrics/
+from apps.common.profiling import may_read_metrics
+
+# Search engine: engine.py (NumPy, SciPy, scikit-learn) is imported inside
+# the views, so loading the URLconf does not pull in the ranking stack
+from .suggest import SUGGEST_DOC_TYPES, refresh_suggester, suggester
+from .cache import query_cache, normalize_query
+from .warmup import ready, start_warmup, warmup_status
+
 logger = logging.getLogger(__name__)
 
+# ——— Result Limits ———
+CANDIDATE_CAP = 500     # Ranked hits (or rows, for an empty query) kept per query
+PAGE_SIZE = 10          # Results per type, per page or "load more"
+
+FILTER_TYPES = {        # filter_by value (= result section) -> engine document type
+    'posts':  'post',
+    'users':  'user',
+    'clubs':  'club',
+    'events': 'event',
+}
+
+# Sections' querysets: the relations their result templates render
+SECTION_QUERYSETS = {
+    'posts':  lambda: Post.objects.select_related('author__profile').prefetch_related('attachments'),
+    'users':  lambda: User.objects.select_related('profile'),
+    'clubs':  lambda: Club.objects.all(),
+    'events': lambda: Event.objects.select_related('club', 'created_by'),
+}
+
+# (section, order_by) -> DB ordering applied to the whole candidate set
+ORDERINGS = {
+    ('posts', 'title'):        'title',
+    ('posts', 'date_posted'):  '-date_posted',
+    ('users', 'username'):     'username',
+    ('clubs', 'title'):        'name',
+    ('events', 'title'):       'title',
+    ('events', 'date_posted'): 'starts_at',
+}
+
 
 # ---------------------
 # Utility Functions
 # ---------------------
 
-def correct_spelling(input_word, dictionary_words, scorer_threshold=75):
+def correct_spelling(input_word, scorer_threshold=75):
     """
-    Use RapidFuzz to correct a single word if there's a close enough match.
+    Correct a single word against the search engine's spelling index.
+    Returns the word unchanged if the engine is not initialized.
     """
-    best_match = process.extractOne(input_word, dictionary_words)
-    if best_match and best_match[1] >= scorer_threshold:
-        return best_match[0]
-    return input_word
+    from .engine import engine
+
+    try:
+        return engine().correct_word(input_word, scorer_threshold)
+    except RuntimeError:
+        return input_word
 
 
-def compute_post_score(post, query_tokens):
+def search_filters(cleaned_data):
     """
-    Score a post based on how many tokens match title/content.
-    Weights:
-    - title match: +5
-    - content match: +2
+    Engine filters from a valid SearchForm: {'since', 'until', 'featured'},
+    dates as Unix seconds spanning whole days in the current timezone.
+    Unset filters are None.
     """
-    score = 0
-    title = post.title.lower()
-    content = post.content.lower()
+    def bound(day, at):
+        if day is None:
+            return None
+        return int(timezone.make_aware(datetime.combine(day, at)).timestamp())
 
-    for token in query_tokens:
-        if token in title:
-            score += 5
-        if token in content:
-            score += 2
-    return score
+    return {
+        'since':    bound(cleaned_data.get('date_from'), time.min),
+        'until':    bound(cleaned_data.get('date_to'), time.max),
+        'featured': True if cleaned_data.get('featured') else None,
+    }
 
 
-def get_global_dictionary_of_known_words():
+def ranked_ids(query, sections, filters):
     """
-    Return a set of known words from user and post content for spell correction.
+    Top CANDIDATE_CAP hits for the query as {section: [pk, ...]}, best first.
+    Only `sections` are searched; `filters` are applied inside the engine.
     """
-    words = set()
+    from .engine import engine
 
-    for p in Post.objects.all():
-        words.update(re.findall(r"\w+", p.title.lower()))
-        words.update(re.findall(r"\w+", p.content.lower()))
+    ids = {section: [] for section in sections}
+    try:
+        hits = engine().search(
+            query, top_k=CANDIDATE_CAP,
+            types=[FILTER_TYPES[section] for section in sections], **filters,
+        )
+    except RuntimeError:
+        logger.warning("Search engine not initialized; returning no results.")
+        return ids
 
-    for u in User.objects.all():
-        words.update(re.findall(r"\w+", u.username.lower()))
-        if u.first_name:
-            words.update(re.findall(r"\w+", u.first_name.lower()))
-        if u.last_name:
-            words.update(re.findall(r"\w+", u.last_name.lower()))
+    by_type = {doc_type: section for section, doc_type in FILTER_TYPES.items()}
+    for doc, score in hits:
+        ids[by_type[doc.type]].append(doc.id)
+    return ids
+
+
+def correct_query(query, scorer_threshold=75):
+    """
+    Spell-corrects every token of an already normalized query in one
+    engine call (a single round trip when the engine is the sidecar).
+    """
+    from .engine import engine
 
-    return list(words)
+    tokens = re.findall(r"\w+", query)
+    try:
+        return " ".join(engine().correct_words(tokens, scorer_threshold))
+    except RuntimeError:
+        return " ".join(tokens)
+
+
+def filter_queryset(qs, section, filters):
+    """
+    Applies `filters` to a section's queryset; used only for an empty
+    query, where there are no engine hits to mask.
+    """
+    from .engine import DATE_FIELDS
+
+    date_field = DATE_FIELDS[FILTER_TYPES[section]]
+    if filters['since'] is not None:
+        qs = qs.filter(**{f'{date_field}__gte': datetime.fromtimestamp(filters['since'], dt_timezone.utc)})
+    if filters['until'] is not None:
+        qs = qs.filter(**{f'{date_field}__lte': datetime.fromtimestamp(filters['until'], dt_timezone.utc)})
+    if filters['featured']:
+        if section not in ('clubs', 'events'):
+            return qs.none()
+        qs = qs.filter(is_featured=True)
+    return qs
+
+
+def search_results(query, filter_by, order_by, filters):
+    """
+    Returns {'ids': {section: [pk, ...]}, 'corrected': str, 'generations':
+    (int, ...)} for a search; `generations` identifies the candidate set.
+
+    The candidate set is bounded and in display order; an empty query lists
+    the most recent CANDIDATE_CAP rows per type. Results are served from the
+    query cache, keyed on the normalized query, filter_by, order_by and filters, and
+    dropped as soon as any searched type is written to, so "load more" pages
+    slice the same ranking and deleted rows never reappear. The key also
+    records whether the engine was ready: the empty hits and uncorrected
+    query computed during warm-up are never served once it is.
+    """
+    normalized = normalize_query(query)
+    wanted = [filter_by] if filter_by in FILTER_TYPES else list(FILTER_TYPES)
+
+    def compute():
+        ranked = ranked_ids(normalized, wanted, filters) if normalized else None
+        candidates = {}
+
+        for section in wanted:
+            qs = SECTION_QUERYSETS[section]()
+            ordering = ORDERINGS.get((section, order_by))
+
+            if ranked is None:
+                qs = filter_queryset(qs, section, filters).order_by(ordering or '-pk')
+                candidates[section] = list(qs.values_list('pk', flat=True)[:CANDIDATE_CAP])
+            elif ordering and ranked[section]:
+                qs = qs.filter(pk__in=ranked[section]).order_by(ordering)
+                candidates[section] = list(qs.values_list('pk', flat=True))
+            else:
+                candidates[section] = ranked[section]
+
+        return {'ids': candidates, 'corrected': correct_query(normalized)}
+
+    value, current = query_cache.lookup(
+        ('search', ready(), normalized, filter_by, order_by, tuple(sorted(filters.items()))),
+        [FILTER_TYPES[section] for section in wanted],
+        compute,
+    )
+    return {**value, 'generations': current}
+
+
+def encode_cursor(offset, generations):
+    """Cursor for the candidate set built at `generations`: "offset:g1.g2..."."""
+    return f"{offset}:{'.'.join(str(g) for g in generations)}"
+
+
+def decode_cursor(token):
+    """
+    Parses an encode_cursor() token into (offset, generations); raises
+    ValueError if malformed.
+    """
+    offset, _, gens = token.partition(':')
+    offset = int(offset)
+    if offset < 0 or not gens:
+        raise ValueError(f"Invalid search cursor {token!r}.")
+    return offset, tuple(int(g) for g in gens.split('.'))
+
+
+def fetch_page(section, ids, cursor=0):
+    """
+    Fetches the PAGE_SIZE objects of `section` starting at `cursor` (an
+    offset into the cached candidate list). Returns (objects, next offset
+    or None when the list is exhausted).
+    """
+    from .engine import Document, hydrate
+
+    page = ids[cursor:cursor + PAGE_SIZE]
+    doc_type = FILTER_TYPES[section]
+    hits = hydrate(
+        [(Document(id=pk, type=doc_type), 0.0) for pk in page],
+        querysets={doc_type: SECTION_QUERYSETS[section]()},
+    )
+    next_cursor = cursor + PAGE_SIZE if cursor + PAGE_SIZE < len(ids) else None
+    return [doc.obj for doc, _ in hits], next_cursor
 
 
 # ---------------------
@@ -94,16 +248,21 @@ def get_global_dictionary_of_known_words():
 
 def search(request):
     """
-    Full search handler with optional spell correction and basic result ranking.
-    Supports filter_by (posts, users, clubs, events) and order_by (title, username).
+    Full search handler with optional spell correction and BM25F ranking.
+    Shows the first PAGE_SIZE results per type; further results are
+    fetched through `load_more` with the per-type cursors.
+    Supports filter_by (posts, users, clubs, events), order_by (title, username)
+    and the date_from / date_to / featured filters.
     """
     form = SearchForm(request.GET or None)
     filter_by = request.GET.get('filter_by', 'all')
 
-    posts, users, clubs, events = [], [], [], []
+    results = {section: [] for section in FILTER_TYPES}
+    cursors = {}
     corrected_query = ""
     order_by = ''
     query = ''
+    filters = search_filters({})
 
     logger.debug("Incoming search request: %r", request.GET)
 
@@ -113,74 +272,70 @@ def search(request):
     if form.is_valid():
         query = form.cleaned_data.get('query', '').strip()
         order_by = form.cleaned_data.get('order_by', '')
+        filters = search_filters(form.cleaned_data)
+
+        cached = search_results(query, filter_by, order_by, filters)
+        corrected_query = cached['corrected']
+
+        for section, ids in cached['ids'].items():
+            results[section], offset = fetch_page(section, ids)
+            cursors[section] = encode_cursor(offset, cached['generations']) if offset is not None else None
 
-        # Tokenize and correct spelling
-        tokens = re.findall(r"\w+", query.lower())
-        dict_words = get_global_dictionary_of_known_words()
-        corrected_tokens = [correct_spelling(t, dict_words) for t in tokens]
-        corrected_query = " ".join(corrected_tokens)
-
-        qtoks = corrected_tokens or tokens
-        final_query = query
-
-        # ----- POSTS -----
-        if filter_by in ('all', 'posts'):
-            qs = Post.objects.all()
-            if final_query:
-                qs = qs.filter(Q(title__icontains=final_query) | Q(content__icontains=final_query))
-            scored = [(compute_post_score(p, qtoks), p) for p in qs]
-            posts = [p for score, p in sorted(scored, key=lambda x: x[0], reverse=True)]
-
-        # ----- USERS -----
-        if filter_by in ('all', 'users'):
-            u_qs = User.objects.all()
-            if final_query:
-                u_qs = u_qs.filter(
-                    Q(username__icontains=final_query) |
-                    Q(first_name__icontains=final_query) |
-                    Q(last_name__icontains=final_query) |
-                    Q(profile__bio__icontains=final_query)
-                )
-            users = list(u_qs.order_by('username') if order_by == 'username' else u_qs)
-
-        # ----- CLUBS -----
-        if filter_by in ('all', 'clubs'):
-            c_qs = Club.objects.all()
-            if final_query:
-                c_qs = c_qs.filter(
-                    Q(name__icontains=final_query) |
-                    Q(description__icontains=final_query) | ## Questionable to add or not
-                    Q(slug__icontains=final_query) 
-                )
-            clubs = list(c_qs.order_by('title') if order_by == 'title' else c_qs)
-
-        # ----- EVENTS -----
-        if filter_by in ('all', 'events'):
-            e_qs = Event.objects.all()
-            if final_query:
-                e_qs = e_qs.filter(
-                    Q(title__icontains=final_query) |
-                    Q(description__icontains=final_query) |
-                    Q(location__icontains=final_query) |
-                    Q(created_by__username__icontains=final_query) |
-                    Q(club__name__icontains=final_query) |
-                    Q(requirements__name__icontains=final_query) 
-                )
-            events = list(e_qs.order_by('title') if order_by == 'title' else e_qs)
-        
     return render(request, 'search/search_results.html', {
         'form':            form,
         'query':           query,
         'filter_by':       filter_by,
         'order_by':        order_by,
+        'date_from':       request.GET.get('date_from', ''),
+        'date_to':         request.GET.get('date_to', ''),
+        'featured':        bool(filters['featured']),
         'corrected_query': corrected_query,
-        'posts':           posts,
-        'users':           users,
-        'clubs':           clubs,
-        'events':          events,
+        'cursors':         cursors,
+        'posts':           results['posts'],
+        'users':           results['users'],
+        'clubs':           results['clubs'],
+        'events':          results['events'],
     })
 
 
+def load_more(request):
+    """
+    Returns the next page of one result type as rendered HTML, sliced from
+    the cached candidate set: JSON with `html` and `next_cursor` (null once
+    the type is exhausted).
+
+    The cursor carries the generations of the candidate set it indexes
+    into. If a write has replaced that set since, offsets no longer line
+    up, so the response is 409 with `stale: true` and the client restarts
+    the search instead of showing duplicated or skipped results.
+    """
+    form = SearchForm(request.GET)
+    section = request.GET.get('type', '')
+    try:
+        cursor, cursor_generations = decode_cursor(request.GET.get('cursor', ''))
+    except ValueError:
+        cursor = None
+
+    if section not in FILTER_TYPES or cursor is None or not form.is_valid():
+        return JsonResponse({'error': 'Invalid type, cursor or query.'}, status=400)
+
+    query = form.cleaned_data.get('query', '').strip()
+    order_by = form.cleaned_data.get('order_by', '')
+    filter_by = request.GET.get('filter_by', 'all')
+
+    filters = search_filters(form.cleaned_data)
+
+    cached = search_results(query, filter_by, order_by, filters)
+    if cached['generations'] != cursor_generations:
+        return JsonResponse({'html': '', 'next_cursor': None, 'stale': True}, status=409)
+
+    objs, offset = fetch_page(section, cached['ids'].get(section, []), cursor)
+    html = render_to_string(f'search/helpers/_{section}_list.html', {section: objs}, request=request)
+    next_cursor = encode_cursor(offset, cached['generations']) if offset is not None else None
+
+    return JsonResponse({'html': html, 'next_cursor': next_cursor})
+
+
 # ---------------------
 # Autocomplete View
 # ---------------------
@@ -189,103 +344,52 @@ def autocomplete(request):
     """
     Lightweight endpoint for real-time search suggestions.
     Returns JSON with `label`, `value`, `type`, and `url`.
+    Answered from the in-memory SuggestIndex, without touching the database,
+    and empty until it is built; matches for repeated terms come from the
+    query cache, keyed by the index they were matched against.
     """
-    term = request.GET.get('term', '')
+    term = normalize_query(request.GET.get('term', ''))
     results = []
+    index = suggester() if term else None
 
-    if term:
-        # Posts
-        for post in Post.objects.filter(title__icontains=term)[:5]:
-            if (post.author.profile and post.author.profile.image):
-                image= post.author.profile.image.url
-            elif (post.author.club and post.author.club.avatar):
-                image= post.author.club.avatar.url
-            else:
-                static('images/default.png')
-
-            snippet = (post.content[:50] + '…') if len(post.content) > 50 else post.content
-            subtitle = post.author.username
-
-            results.append({
-                'label': post.title,
-                'value': post.title,
-                'type':  'Post',
-                'url':   reverse('posts:post-detail', args=[post.pk]),
-                'image': image,
-                'subtitle': f"Posted By: {subtitle}",
-                'snippet':  snippet,
-
-            })
-
-        for post in Post.objects.filter(content__icontains=term)[:5]:
-            if (post.author.profile and post.author.profile.image):
-                image= post.author.profile.image.url
-            elif (post.author.club and post.author.club.avatar):
-                image= post.author.club.avatar.url
-            else:
-                static('images/default.png')
-
-            snippet = (post.content[:50] + '…') if len(post.content) > 50 else post.content
-            subtitle = post.author.username
-            # subtitle = f"{event.location or '—'} · {localtime(event.starts_at).strftime('%b %d, %I:%M %p')}"
-            results.append({
-                'label': post.title,
-                'value': post.title,
-                'type':  'Post',
-                'url':   reverse('posts:post-detail', args=[post.pk]),
-                'image': image,
-                'subtitle': f"Posted By: {subtitle}",
-                'snippet':  snippet,
-            })
-        
-
-        # Users
-        for user in User.objects.filter(username__icontains=term)[:5]:
-            url = reverse('profile') if request.user.is_authenticated and user.pk == request.user.pk \
-                  else reverse('common:user-posts', args=[user.username])
-            profile = getattr(user, "profile", None)
-            results.append({
-                'label': user.username,
-                'value': user.username,
-                'type':  'User',
-                'url':   url,
-                'image': profile.image.url if (profile and profile.image) else static('images/default.png')
-            })
-
-        # Clubs
-        for club in Club.objects.filter(name__icontains=term)[:5]:
-            snippet = (club.description[:50] + '…') if len(club.description) > 50 else club.description
-            try:
-                image_url = club.avatar.url
-            except ValueError:
-                image_url = static('images/default.png')
-
-            results.append({
-                'label': club.name,
-                'value': club.name,
-                'type':  'Club',
-                'url':   reverse('clubs:club-detail', args=[club.slug]),
-                'image': image_url,
-                'snippet':  snippet,
-
-            })
-
-        # Events
-        for event in Event.objects.filter(title__icontains=term)[:5]:
-            snippet = (event.description[:50] + '…') if len(event.description) > 50 else event.description
-            if event.club: 
-                subtitle = f"{event.location or '—'} · {localtime(event.starts_at).strftime('%b %d, %I:%M %p')}  · {event.club}"
-            else: 
-                subtitle = f"{event.location or '—'} · {localtime(event.starts_at).strftime('%b %d, %I:%M %p')}  · {event.created_by}"
-            results.append({
-                'label': event.title,
-                'value': event.title,
-                'type':  'Event',
-                'url':   reverse('events:event-detail', args=[event.pk]),
-                'image': event.club.avatar.url if event.club else (event.created_by.profile.image.url if event.created_by.profile and event.created_by.profile.image else static('images/default.png')),
-                'subtitle': subtitle,
-                'snippet':  snippet,
-
-            })
+    if index is not None:
+        viewer_pk = request.user.pk if request.user.is_authenticated else None
+        keys, current = query_cache.lookup(('autocomplete', term, index.generations), SUGGEST_DOC_TYPES,
+                                           lambda: index.match(term))
+        refresh_suggester(index, current)
+        results = index.payloads(keys, viewer_pk=viewer_pk)
 
     return JsonResponse(results, safe=False)
+
+
+# ---------------------
+# Index Metrics View
+# ---------------------
+
+def metrics(request):
+    """
+    Returns the search index metrics as JSON: documents, built_at,
+    age_seconds, build_seconds, rebuilds, failures and last_error.
+    They include the index path and raw error text, so only staff and
+    requests sending the X-Profile token may read them, as for /metrics/.
+    """
+    if not may_read_metrics(request):
+        return HttpResponseForbidden()
+
+    from .engine import index_metrics
+
+    try:
+        data = index_metrics()
+    except RuntimeError as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    return JsonResponse(data)
+
+
+def health(request):
+    """
+    Readiness check: 200 once the search engine is serving, 503 while it
+    is warming up (or failed to). Starts the warm-up if nothing has yet.
+    """
+    start_warmup()
+    status = warmup_status()
+    return JsonResponse(status, status=200 if status['ready'] else 503)
@@ -0,0 +1,167 @@
+"""
+apps/search/warmup.py
+
+Background warm-up of the search engine and autocomplete index.
+
+Nothing here runs during app registry setup: the warm-up starts on the
+first request (or the first engine() call), in a daemon thread, and only
+then imports scikit-learn, NumPy and RapidFuzz and reads the database.
+Until it finishes, searches return no results and the health endpoint
+reports the process as not ready. A failed attempt is retried with
+exponential backoff; once those are spent the process reports failed,
+until a later request restarts the warm-up or a rebuild or reload
+swaps in a working index (mark_ready).
+
+Author: Vikram Bhojanala
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# ——— Warm-up States ———
+COLD = "cold"           # Nothing started yet
+WARMING = "warming"     # Index being loaded or built
+READY = "ready"         # engine() is serving
+FAILED = "failed"       # Every attempt raised; see `error`
+
+# ——— Retries ———
+WARMUP_ATTEMPTS = 5         # Attempts per warm-up before reporting FAILED
+WARMUP_BACKOFF = 1.0        # Seconds before the first retry, doubling after each
+WARMUP_RETRY_AFTER = 60.0   # Seconds after FAILED before a request starts a new warm-up
+
+_state: Dict[str, Any] = {
+    "status":     COLD,
+    "started_at": None,
+    "ready_at":   None,
+    "failed_at":  None,
+    "error":      None,
+}
+_lock = threading.Lock()
+
+
+def start_warmup(sender: Any = None, **kwargs: Any) -> None:
+    """
+    Starts the warm-up thread once per process, or again once a failed
+    one has cooled down. Cheap to call repeatedly, so it doubles as a
+    request_started receiver.
+    """
+    if not _startable():
+        return
+    with _lock:
+        if not _startable():
+            return
+        _state.update(status=WARMING, started_at=time.monotonic(), ready_at=None)
+
+    threading.Thread(target=_warm, name="search-warmup", daemon=True).start()
+
+
+def _startable() -> bool:
+    if _state["status"] == FAILED:
+        return time.monotonic() - _state["failed_at"] >= WARMUP_RETRY_AFTER
+    return _state["status"] == COLD
+
+
+def mark_ready() -> None:
+    """
+    Called after a rebuild or reload swaps in a validated index: a
+    process whose warm-up failed is serving again.
+    """
+    with _lock:
+        if _state["status"] == FAILED:
+            _state.update(status=READY, ready_at=time.monotonic(), error=None)
+            logger.info("[SearchEngine] Ready again after an index swap.")
+
+
+def started() -> bool:
+    """True once a warm-up has begun, i.e. an index exists or is being built."""
+    return _state["status"] != COLD
+
+
+def ready() -> bool:
+    """True while engine() is serving a warmed index."""
+    return _state["status"] == READY
+
+
+def warmup_status() -> Dict[str, Any]:
+    """
+    Returns {'status', 'ready', 'warm_seconds', 'error'} for the health endpoint.
+    """
+    started_at, ready_at = _state["started_at"], _state["ready_at"]
+    return {
+        "status":       _state["status"],
+        "ready":        ready(),
+        "warm_seconds": round(ready_at - started_at, 3) if ready_at and started_at else None,
+        "error":        _state["error"],
+    }
+
+
+def _warm() -> None:
+    from django.db import close_old_connections
+
+    delay = WARMUP_BACKOFF
+    for attempt in range(1, WARMUP_ATTEMPTS + 1):
+        try:
+            _bootstrap()
+            _state.update(status=READY, ready_at=time.monotonic(), error=None)
+            logger.info("[SearchEngine] Ready after %.2fs.", _state["ready_at"] - _state["started_at"])
+            return
+        except Exception as e:
+            _state["error"] = f"{type(e).__name__}: {e}"
+            logger.exception("[SearchEngine] Warm-up attempt %d/%d failed.", attempt, WARMUP_ATTEMPTS)
+        finally:
+            close_old_connections()
+        if attempt < WARMUP_ATTEMPTS:
+            time.sleep(delay)
+            delay *= 2
+
+    with _lock:
+        if _state["status"] == WARMING:     # Unless a swap recovered it meanwhile
+            _state.update(status=FAILED, failed_at=time.monotonic())
+
+
+def _bootstrap() -> None:
+    """
+    Installs the global engine: a sidecar client if SEARCH_SERVICE_SOCKET
+    is set, else the persisted index in SEARCH_INDEX_DIR (memory-mapped),
+    else a fresh build from the database.
+    """
+    from .engine import (
+        connect_engine, load_engine, rebuild_engine, current_index_dir,
+        start_reload_watcher, load_offline_stages,
+    )
+    from .service import service_socket
+    from .suggest import warm_suggester
+
+    warm_suggester()
+
+    socket_path = service_socket()
+    if socket_path is not None:
+        connect_engine(socket_path)
+        logger.info(f"[SearchEngine] Using search service at {socket_path}.")
+        return
+
+    # Workers never rebuild on a schedule: they reload the versions written
+    # by one rebuilding process, keeping a single page-cached copy per host
+    start_reload_watcher(settings.SEARCH_RELOAD_INTERVAL, settings.SEARCH_INDEX_DIR)
+
+    load_offline_stages()
+
+    index_dir = current_index_dir(settings.SEARCH_INDEX_DIR)
+    if index_dir is not None:
+        try:
+            load_engine(index_dir)
+            logger.info(f"[SearchEngine] Loaded index from {index_dir}.")
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"[SearchEngine] Could not load {index_dir}: {e}")
+
+    # Nothing on disk yet: build once in this process (writes made meanwhile
+    # are replayed) until `build_search_index` writes a version to reload
+    logger.warning(f"[SearchEngine] No index under {settings.SEARCH_INDEX_DIR}; building one in-process.")
+    if not rebuild_engine():
+        raise RuntimeError("Initial index build failed; see the rebuild error above.")
@@ -98,6 +98,7 @@ TINYMCE_DEFAULT_CONFIG = {
 
 
 MIDDLEWARE = [
+    "apps.common.profiling.ProfilingMiddleware",  # Outermost: times the whole stack; off unless configured
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -219,6 +220,86 @@ STATIC_ROOT            = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS       = [BASE_DIR / 'apps/common/static']
 
 
+# Search index (written by `manage.py build_search_index`, memory-mapped by workers)
+SEARCH_INDEX_DIR = Path(os.getenv("SEARCH_INDEX_DIR", BASE_DIR / "search_index"))
+
+# Optional search sidecar (`manage.py run_search_service`): when set, workers
+# query the index over this Unix socket instead of each holding a copy
+SEARCH_SERVICE_SOCKET = os.getenv("SEARCH_SERVICE_SOCKET") or None
+
+# Seconds between rebuilds of the search index by the one process that owns
+# rebuilds: the sidecar, or `manage.py build_search_index --every` (0 disables)
+SEARCH_REBUILD_INTERVAL = int(os.getenv("SEARCH_REBUILD_INTERVAL", 3600))
+
+# Seconds between a web worker's checks for a newer index version to reload (0 disables)
+SEARCH_RELOAD_INTERVAL = int(os.getenv("SEARCH_RELOAD_INTERVAL", 60))
+
+# Search re-ranking: features written by `manage.py build_rerank_features`,
+# an optional joblib-saved model (defaults to a linear one) and its per-query budget
+SEARCH_FEATURES_DIR = Path(os.getenv("SEARCH_FEATURES_DIR", BASE_DIR / "search_features"))
+SEARCH_RERANK_MODEL = os.getenv("SEARCH_RERANK_MODEL") or None
+SEARCH_RERANK_BUDGET_MS = float(os.getenv("SEARCH_RERANK_BUDGET_MS", 15))
+
+# Optional semantic search: a sentence-transformers model (e.g. "all-MiniLM-L6-v2")
+# and the vectors `manage.py build_semantic_index` embeds with it
+SEARCH_SEMANTIC_MODEL = os.getenv("SEARCH_SEMANTIC_MODEL") or None
+SEARCH_SEMANTIC_DIR = Path(os.getenv("SEARCH_SEMANTIC_DIR", BASE_DIR / "search_semantic"))
+
+
+# Caches: "default" is per process. "shared" holds state every worker must
+# agree on (search generation counters, fragment versions) and must not cull
+# it; "feeds" holds the precomputed home feeds and rankings
+# (apps/common/fanout.py, for_you.py), which expire. Set REDIS_URL whenever
+# more than one worker runs (with a volatile-* or noeviction policy). Without
+# it, each cache gets its own local-memory store, which is only correct for a
+# single process.
+REDIS_URL = os.getenv("REDIS_URL") or None
+
+if REDIS_URL:
+    SHARED_CACHE = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+    FEEDS_CACHE = SHARED_CACHE
+else:
+    SHARED_CACHE = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shared",                   # Its own store: unnamed LocMem caches share "default"'s
+        "OPTIONS": {"MAX_ENTRIES": 1_000_000},
+    }
+    FEEDS_CACHE = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "feeds",
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        **SHARED_CACHE,
+        "KEY_PREFIX": "shared",
+        "TIMEOUT": None,
+    },
+    "feeds": {
+        **FEEDS_CACHE,
+        "KEY_PREFIX": "feeds",
+    },
+}
+
+
+# Request profiling (apps/common/profiling.py): SQL counts, duplicated queries,
+# DB and total time per view and template, served at /metrics/. Profiles a
+# sample of requests when enabled, and any request sending X-Profile: <token>.
+# /metrics/ answers only staff and requests sending that same header
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", 1.0))
+PROFILING_HEADER_TOKEN = os.getenv("PROFILING_HEADER_TOKEN") or None
+PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", 500))
+PROFILING_SLOW_LOG_RATE = float(os.getenv("PROFILING_SLOW_LOG_RATE", 0.1))
+
+
 # REST Framework and JWT Configuration
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [